@@ -3,4 +3,6 @@ set -o errexit
 
 pip install -r requirements.txt
 python manage.py collectstatic --noinput
-python manage.py migrate --noinput
\ No newline at end of file
+python manage.py migrate --noinput
+# Solo crea la tabla si CV_CACHE_COMPARTIDA=bd
+python manage.py createcachetable
@@ -1,4 +1,16 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+
+from . import exportacion, importacion, visibilidad
+from .busqueda import BusquedaIndexadaMixin, campos_busqueda
+from .imagenes import adjuntar_derivados, campos_imagen
+from .views import SECCIONES_PDF
 from .models import (
     Datospersonales,
     Cursosrealizados,
@@ -17,16 +29,146 @@ admin.site.site_title = "Panel Administrativo"
 admin.site.index_title = "Gestión del Sistema"
 
 
+# =========================
+# LISTADOS ESCALABLES
+# =========================
+class PaginadorAproximado(Paginator):
+    """
+    En PostgreSQL, sin filtros y con tablas grandes, usa la estimación del
+    planner (pg_class.reltuples) en vez de un COUNT(*) completo.
+    """
+
+    UMBRAL = 10000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if connection.vendor == "postgresql" and not qs.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [qs.model._meta.db_table])
+                fila = cursor.fetchone()
+            if fila and fila[0] > self.UMBRAL:
+                return int(fila[0])
+        return super().count
+
+
+class ChangeListConMiniaturas(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # Una sola consulta por página para los derivados de todas las filas
+        adjuntar_derivados(self.result_list, *campos_imagen(self.model))
+
+
+def columna_miniatura(campo, titulo):
+    def miniatura(obj):
+        archivo = getattr(obj, campo)
+        if not archivo:
+            return "—"
+        derivado = getattr(obj, "derivados", {}).get(campo)
+        if not derivado:
+            return archivo.name
+        return format_html(
+            '<img src="{}" alt="" height="48" loading="lazy" decoding="async">', derivado.url("thumb")
+        )
+
+    miniatura.short_description = titulo
+    miniatura.__name__ = f"miniatura_{campo}"
+    return miniatura
+
+
+class CvModelAdmin(BusquedaIndexadaMixin, admin.ModelAdmin):
+    """
+    Base de los admins del CV: perfil unido en la misma consulta,
+    autocompletado en vez de <select> completo, conteos baratos
+    y miniaturas servidas desde los derivados.
+    """
+
+    list_select_related = ("perfil",)
+    autocomplete_fields = ("perfil",)
+    paginator = PaginadorAproximado
+    show_full_result_count = False
+
+    actions = ["mostrar_en_front", "ocultar_del_front"]
+
+    def get_changelist(self, request, **kwargs):
+        return ChangeListConMiniaturas
+
+    @admin.action(description="Mostrar en el front")
+    def mostrar_en_front(self, request, queryset):
+        n = visibilidad.cambiar_visibilidad([queryset], True)
+        self.message_user(request, f"{n} ítems visibles.", messages.SUCCESS)
+
+    @admin.action(description="Ocultar del front")
+    def ocultar_del_front(self, request, queryset):
+        n = visibilidad.cambiar_visibilidad([queryset], False)
+        self.message_user(request, f"{n} ítems ocultos.", messages.SUCCESS)
+
+
+miniatura_certificado = columna_miniatura("certificado_imagen", "Certificado (imagen)")
+miniatura_producto = columna_miniatura("imagenproducto", "Imagen")
+miniatura_foto = columna_miniatura("foto_producto", "Foto")
+
+
 @admin.register(Datospersonales)
-class DatospersonalesAdmin(admin.ModelAdmin):
-    list_display = ("idperfil", "nombres", "apellidos", "perfilactivo", "permitir_impresion")
+class DatospersonalesAdmin(BusquedaIndexadaMixin, admin.ModelAdmin):
+    list_display = ("idperfil", "nombres", "apellidos", "slug", "perfilactivo", "permitir_impresion")
+    paginator = PaginadorAproximado
+    show_full_result_count = False
     list_editable = ("perfilactivo", "permitir_impresion")
     list_filter = ("perfilactivo", "permitir_impresion")
-    search_fields = ("nombres", "apellidos", "numerocedula")
+    search_fields = campos_busqueda("DATOSPERSONALES")
+    actions = ["importar_items", "mostrar_todo", "ocultar_todo", "exportar_pdfs"]
+
+    @admin.action(description="Exportar hojas de vida (ZIP de PDFs)")
+    def exportar_pdfs(self, request, queryset):
+        # El ZIP se emite mientras los PDFs se generan en paralelo
+        response = StreamingHttpResponse(
+            exportacion.exportar_zip(queryset.order_by("pk"), SECCIONES_PDF), content_type="application/zip"
+        )
+        response["Content-Disposition"] = 'attachment; filename="hojas_de_vida.zip"'
+        return response
+
+    @admin.action(description="Mostrar en el front todos sus ítems")
+    def mostrar_todo(self, request, queryset):
+        n = visibilidad.cambiar_visibilidad_perfiles(list(queryset.values_list("pk", flat=True)), True)
+        self.message_user(request, f"{n} ítems visibles.", messages.SUCCESS)
+
+    @admin.action(description="Ocultar del front todos sus ítems")
+    def ocultar_todo(self, request, queryset):
+        n = visibilidad.cambiar_visibilidad_perfiles(list(queryset.values_list("pk", flat=True)), False)
+        self.message_user(request, f"{n} ítems ocultos.", messages.SUCCESS)
+
+    @admin.action(description="Importar ítems desde CSV/JSON")
+    def importar_items(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, "Selecciona un solo perfil para importar.", messages.WARNING)
+            return None
+
+        perfil = queryset.first()
+        archivo = request.FILES.get("archivo")
+        seccion = request.POST.get("seccion")
+        if "aplicar" not in request.POST or not archivo or seccion not in importacion.SECCIONES:
+            return render(request, "admin/cv/importar.html", {
+                **self.admin_site.each_context(request),
+                "perfil": perfil,
+                "secciones": sorted(importacion.SECCIONES),
+            })
+
+        try:
+            filas = importacion.leer_filas(archivo.read().decode("utf-8-sig"), importacion.formato_de(archivo.name))
+        except (ValueError, UnicodeDecodeError) as exc:
+            self.message_user(request, f"No se pudo leer el archivo: {exc}", messages.ERROR)
+            return None
+
+        resultado = importacion.importar(importacion.SECCIONES[seccion], perfil, filas)
+        for fila, mensaje in resultado.errores[:50]:
+            self.message_user(request, f"Fila {fila}: {mensaje}", messages.WARNING)
+        self.message_user(request, f"Importación de {seccion}: {resultado}.", messages.SUCCESS)
+        return None
 
 
 @admin.register(Cursosrealizados)
-class CursosrealizadosAdmin(admin.ModelAdmin):
+class CursosrealizadosAdmin(CvModelAdmin):
     list_display = (
         "nombrecurso",
         "fechainicio",
@@ -35,15 +177,15 @@ class CursosrealizadosAdmin(admin.ModelAdmin):
         "perfil",
         "activarparaqueseveaenfront",
         "certificado_pdf",
-        "certificado_imagen",
+        miniatura_certificado,
     )
     list_editable = ("activarparaqueseveaenfront",)
     list_filter = ("activarparaqueseveaenfront",)
-    search_fields = ("nombrecurso", "entidadpatrocinadora")
+    search_fields = campos_busqueda("CURSOSREALIZADOS")
 
 
 @admin.register(Experiencialaboral)
-class ExperiencialaboralAdmin(admin.ModelAdmin):
+class ExperiencialaboralAdmin(CvModelAdmin):
     list_display = (
         "cargodesempenado",
         "nombrempresa",
@@ -52,47 +194,47 @@ class ExperiencialaboralAdmin(admin.ModelAdmin):
         "perfil",
         "activarparaqueseveaenfront",
         "certificado_pdf",
-        "certificado_imagen",
+        miniatura_certificado,
     )
     list_editable = ("activarparaqueseveaenfront",)
     list_filter = ("activarparaqueseveaenfront",)
-    search_fields = ("cargodesempenado", "nombrempresa")
+    search_fields = campos_busqueda("EXPERIENCIALABORAL")
 
 
 @admin.register(Productosacademicos)
-class ProductosacademicosAdmin(admin.ModelAdmin):
+class ProductosacademicosAdmin(CvModelAdmin):
     list_display = (
         "nombreproducto",   # ✅ ahora es el importante
         "clasificador",
         "perfil",
         "activarparaqueseveaenfront",
-        "imagenproducto",
+        miniatura_producto,
         "certificado_pdf",
-        "certificado_imagen",
+        miniatura_certificado,
     )
     list_editable = ("activarparaqueseveaenfront",)
     list_filter = ("activarparaqueseveaenfront", "clasificador")
-    search_fields = ("nombreproducto", "nombrerecurso", "clasificador")
+    search_fields = campos_busqueda("PRODUCTOSACADEMICOS")
 
 
 @admin.register(Productoslaborales)
-class ProductoslaboralesAdmin(admin.ModelAdmin):
+class ProductoslaboralesAdmin(CvModelAdmin):
     list_display = (
         "nombreproducto",
         "fechaproducto",
         "perfil",
         "activarparaqueseveaenfront",
-        "imagenproducto",
+        miniatura_producto,
         "certificado_pdf",
-        "certificado_imagen",
+        miniatura_certificado,
     )
     list_editable = ("activarparaqueseveaenfront",)
     list_filter = ("activarparaqueseveaenfront",)
-    search_fields = ("nombreproducto", "descripcion")
+    search_fields = campos_busqueda("PRODUCTOSLABORALES")
 
 
 @admin.register(Reconocimientos)
-class ReconocimientosAdmin(admin.ModelAdmin):
+class ReconocimientosAdmin(CvModelAdmin):
     list_display = (
         "tiporeconocimiento",
         "fechareconocimiento",
@@ -100,15 +242,15 @@ class ReconocimientosAdmin(admin.ModelAdmin):
         "perfil",
         "activarparaqueseveaenfront",
         "certificado_pdf",
-        "certificado_imagen",
+        miniatura_certificado,
     )
     list_editable = ("activarparaqueseveaenfront",)
     list_filter = ("tiporeconocimiento", "activarparaqueseveaenfront")
-    search_fields = ("entidadpatrocinadora", "descripcionreconocimiento")
+    search_fields = campos_busqueda("RECONOCIMIENTOS")
 
 
 @admin.register(Ventagarage)
-class VentagarageAdmin(admin.ModelAdmin):
+class VentagarageAdmin(CvModelAdmin):
     list_display = (
         "nombreproducto",
         "estadoproducto",
@@ -116,8 +258,8 @@ class VentagarageAdmin(admin.ModelAdmin):
         "valordelbien",
         "perfil",
         "activarparaqueseveaenfront",
-        "foto_producto",
+        miniatura_foto,
     )
     list_editable = ("activarparaqueseveaenfront",)
     list_filter = ("estadoproducto", "activarparaqueseveaenfront")
-    search_fields = ("nombreproducto", "descripcion")
+    search_fields = campos_busqueda("VENTAGARAGE")
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_migrate
 
 
 class CvConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cv'
+
+    def ready(self):
+        from . import busqueda, signals
+
+        signals.conectar()
+        post_migrate.connect(busqueda.comprobar_tras_migrar, sender=self, dispatch_uid="cv_triggers_fts")
+
+        if getattr(settings, "CV_PDF_PRECARGA", False):
+            # Workers dedicados al PDF: reportlab, Pillow y fuentes listos antes del primer request
+            from . import pdf
+
+            pdf.precargar()
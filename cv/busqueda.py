@@ -0,0 +1,132 @@
+"""
+Búsqueda indexada del admin.
+
+- PostgreSQL: índices GIN con pg_trgm sobre UPPER(columna), que es justo
+  lo que genera `icontains`; la búsqueda normal del admin ya los usa.
+- SQLite: tabla virtual FTS5 (tokenizer trigram) por modelo, sincronizada
+  con triggers; el admin consulta la tabla FTS en vez de hacer LIKE '%..%'.
+"""
+from django.core.management.base import CommandError
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.utils.text import smart_split, unescape_string_literal
+
+# tabla -> (pk, columnas buscables). Debe coincidir con los search_fields del admin.
+CAMPOS_BUSQUEDA = {
+    "DATOSPERSONALES": ("idperfil", ("nombres", "apellidos", "numerocedula")),
+    "CURSOSREALIZADOS": ("idcursorealizado", ("nombrecurso", "entidadpatrocinadora")),
+    "EXPERIENCIALABORAL": ("idexperiencialaboral", ("cargodesempenado", "nombrempresa")),
+    "PRODUCTOSACADEMICOS": ("idproductoacademico", ("nombreproducto", "clasificador")),
+    "PRODUCTOSLABORALES": ("idproductolaboral", ("nombreproducto", "descripcion")),
+    "RECONOCIMIENTOS": ("idreconocimiento", ("entidadpatrocinadora", "descripcionreconocimiento")),
+    "VENTAGARAGE": ("idventagarage", ("nombreproducto", "descripcion")),
+}
+
+# El tokenizer trigram no puede buscar términos de menos de 3 caracteres
+MIN_CARACTERES = 3
+
+
+def campos_busqueda(tabla):
+    return CAMPOS_BUSQUEDA[tabla][1]
+
+
+def tabla_fts(tabla):
+    return f"{tabla}_FTS"
+
+
+# =========================
+# ÍNDICES
+# =========================
+# Los crean las migraciones (0022, con su propia copia del SQL). En SQLite,
+# cualquier migración que reconstruya una de estas tablas (AlterField,
+# AddField único...) borra sus triggers: esa migración tiene que volver a
+# crearlos (ver 0023). Si no, migrate falla aquí en vez de dejar la búsqueda
+# desactualizada sin que nadie lo note.
+SUFIJOS_TRIGGERS = ("ai", "ad", "au")
+
+
+def triggers_faltantes(conexion, campos=CAMPOS_BUSQUEDA):
+    """
+    Triggers FTS que faltan en las tablas FTS existentes (solo SQLite).
+    """
+    if conexion.vendor != "sqlite":
+        return []
+    with conexion.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existentes = {nombre for (nombre,) in cursor.fetchall()}
+    faltan = []
+    for tabla in campos:
+        fts = tabla_fts(tabla)
+        if fts in existentes:
+            faltan += [f"{fts}_{s}" for s in SUFIJOS_TRIGGERS if f"{fts}_{s}" not in existentes]
+    return faltan
+
+
+def comprobar_tras_migrar(sender, using, **kwargs):
+    faltan = triggers_faltantes(connections[using])
+    if faltan:
+        raise CommandError(
+            "Faltan triggers de búsqueda FTS (una migración reconstruyó la tabla): "
+            + ", ".join(faltan) + ". Añade una migración que los vuelva a crear."
+        )
+
+
+# =========================
+# CONSULTA
+# =========================
+# Solo se recuerdan las que existen: una tabla que falta puede aparecer al migrar
+_CON_FTS = set()
+
+
+def _existe_fts(alias, tabla):
+    if (alias, tabla) in _CON_FTS:
+        return True
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [tabla_fts(tabla)])
+        existe = cursor.fetchone() is not None
+    if existe:
+        _CON_FTS.add((alias, tabla))
+    return existe
+
+
+def _terminos(search_term):
+    terminos = []
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        terminos.append(bit)
+    return terminos
+
+
+def filtrar_fts(queryset, search_term):
+    """
+    Filtra con la tabla FTS5 si se puede; devuelve None para usar la
+    búsqueda estándar (otra BD, sin FTS o términos muy cortos).
+    """
+    tabla = queryset.model._meta.db_table
+    if connections[queryset.db].vendor != "sqlite" or tabla not in CAMPOS_BUSQUEDA:
+        return None
+
+    terminos = _terminos(search_term)
+    if not terminos or any(len(t) < MIN_CARACTERES for t in terminos):
+        return None
+    if not _existe_fts(queryset.db, tabla):
+        return None
+
+    fts = tabla_fts(tabla)
+    consulta = " AND ".join('"{}"'.format(t.replace('"', '""')) for t in terminos)
+    return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s', [consulta]))
+
+
+class BusquedaIndexadaMixin:
+    """
+    Para los ModelAdmin: usa FTS5 en SQLite; en PostgreSQL la búsqueda
+    estándar ya va por los índices trigram.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term:
+            filtrado = filtrar_fts(queryset, search_term)
+            if filtrado is not None:
+                return filtrado, False
+        return super().get_search_results(request, queryset, search_term)
@@ -0,0 +1,50 @@
+"""
+Claves de cache versionadas por perfil.
+
+Todo lo que depende de los datos de un perfil (conteos, páginas, PDF) se
+guarda bajo `clave(perfil_id, ...)`. Invalidar = subir la versión del
+perfil: las entradas viejas dejan de leerse y caducan solas.
+
+La cache es la de dos niveles (cv/cache_backend.py): cada worker ve una
+versión nueva como mucho un segundo después de la invalidación.
+"""
+import time
+
+from django.core.cache import cache
+
+TIMEOUT = 60 * 60
+
+
+def _clave_version(perfil_id):
+    return f"cv:perfil:{perfil_id}:version"
+
+
+def _version_inicial():
+    # Si la cache compartida descarta la clave de versión (MAX_ENTRIES del backend
+    # en archivos), volver a 1 resucitaría entradas viejas; un reloj en ms no se repite
+    return time.time_ns() // 1_000_000
+
+
+def version(perfil_id):
+    return cache.get_or_set(_clave_version(perfil_id), _version_inicial, timeout=None)
+
+
+def clave(perfil_id, *partes):
+    return f"cv:perfil:{perfil_id}:v{version(perfil_id)}:" + ":".join(str(p) for p in partes)
+
+
+async def aclave(perfil_id, *partes):
+    # Para las vistas async: un backend de cache en BD no admite llamadas sync desde el event loop
+    version = await cache.aget_or_set(_clave_version(perfil_id), _version_inicial, timeout=None)
+    return f"cv:perfil:{perfil_id}:v{version}:" + ":".join(str(p) for p in partes)
+
+
+def invalidar(perfil_ids):
+    """
+    Sube la versión de cada perfil (una vez por perfil, no por fila).
+    """
+    for perfil_id in set(perfil_ids):
+        try:
+            cache.incr(_clave_version(perfil_id))
+        except ValueError:
+            cache.set(_clave_version(perfil_id), _version_inicial(), timeout=None)
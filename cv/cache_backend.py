@@ -0,0 +1,332 @@
+"""
+Backend de cache en dos niveles para CACHES["default"].
+
+- Nivel 1: LRU en memoria de cada proceso, con tope de bytes y un TTL corto
+  (los valores se guardan serializados, como LocMemCache: quien lee
+  recibe una copia).
+- Nivel 2: una cache compartida entre workers sin servicios extra
+  (CacheArchivos o DatabaseCache, ver settings.py), por alias de CACHES.
+
+Un worker no se entera de lo que otro borra en su nivel 1: por eso el TTL
+local es corto, y más aún para las claves de versión (cv/cache.py), que son
+las que invalidan todo lo demás.
+
+get_or_set() protege contra estampidas: en cada proceso solo un hilo
+calcula una clave, y entre procesos solo el que consigue el candado en la
+cache compartida (add atómico); el resto espera a que aparezca el valor.
+
+Los métodos async (aget, aget_or_set, aincr...) llaman a los sync en el
+hilo de sync_to_async: los candados son threading.Lock y la espera es
+time.sleep, así que un aget_or_set que espera ocupa ese hilo (hasta
+espera_max), no el event loop.
+"""
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.utils.functional import cached_property
+
+from . import metricas
+
+_FALTA = object()
+
+
+class LRU:
+    """
+    Diccionario acotado por bytes, con caducidad por entrada y expulsión
+    de la entrada usada hace más tiempo.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = int(max_bytes)
+        self.bytes = 0
+        self._datos = OrderedDict()  # clave -> (caduca, serializado)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def get(self, clave, default=_FALTA):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return default
+            if entrada[0] <= time.monotonic():
+                self._quitar(clave)
+                return default
+            self._datos.move_to_end(clave)
+        return pickle.loads(entrada[1])
+
+    def set(self, clave, valor, ttl):
+        serializado = pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._quitar(clave)
+            # Una entrada que se comería buena parte del nivel 1 (un PDF enorme) se queda solo en el 2
+            if ttl <= 0 or len(serializado) > self.max_bytes // 8:
+                return
+            self._datos[clave] = (time.monotonic() + ttl, serializado)
+            self.bytes += len(serializado)
+            while self.bytes > self.max_bytes:
+                self._quitar(next(iter(self._datos)))
+
+    def delete(self, clave):
+        with self._lock:
+            return self._quitar(clave)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+            self.bytes = 0
+
+    def _quitar(self, clave):
+        entrada = self._datos.pop(clave, None)
+        if entrada is None:
+            return False
+        self.bytes -= len(entrada[1])
+        return True
+
+
+class CacheArchivos(FileBasedCache):
+    """
+    FileBasedCache con add() e incr() atómicos entre procesos (un candado de
+    archivo para todo el directorio; solo los usan los candados de
+    get_or_set y las versiones de cv/cache.py, son pocos). incr() conserva
+    la caducidad de la entrada: una versión guardada con timeout=None sigue
+    sin caducar.
+    """
+
+    @contextmanager
+    def _candado(self):
+        self._createdir()
+        with open(os.path.join(self._dir, "candado"), "ab") as fh:
+            locks.lock(fh, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(fh)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._candado():
+            return super().add(key, value, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._candado():
+            try:
+                with open(self._key_to_file(key, version), "rb") as fh:
+                    caduca = pickle.load(fh)
+                    valor = pickle.loads(zlib.decompress(fh.read()))
+            except FileNotFoundError:
+                caduca, valor = 0, None
+            ahora = time.time()
+            if caduca is not None and caduca <= ahora:
+                raise ValueError("Key '%s' not found" % key)
+            nuevo = valor + delta
+            self.set(key, nuevo, None if caduca is None else caduca - ahora, version=version)
+            return nuevo
+
+
+class CacheDosNiveles(BaseCache):
+    """
+    OPTIONS:
+      compartida      alias de CACHES del nivel 2 (por defecto "compartida")
+      max_mb_local    tope del nivel 1 por proceso, en MB
+      ttl_local       segundos que una entrada vive en el nivel 1
+      ttl_sufijos     {sufijo de clave: ttl_local}, p. ej. las versiones
+      espera_max      segundos que get_or_set espera al proceso que calcula
+      candado_ttl     caducidad del candado entre procesos (si muere quien calcula)
+
+    KEY_PREFIX, VERSION y TIMEOUT son los de la cache compartida.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        opciones = params.get("OPTIONS", {})
+        self._alias = opciones.get("compartida", "compartida")
+        self.local = LRU(float(opciones.get("max_mb_local", 32)) * 1024 * 1024)
+        self.ttl_local = float(opciones.get("ttl_local", 30))
+        self.ttl_sufijos = dict(opciones.get("ttl_sufijos", {":version": 1}))
+        self.espera_max = float(opciones.get("espera_max", 10))
+        self.candado_ttl = int(opciones.get("candado_ttl", 30))
+        self.estadisticas = {"l1": 0, "l2": 0, "fallo": 0, "espera": 0}
+        self._stats_lock = threading.Lock()
+        self._candados = {}  # clave -> [Lock, usuarios]
+        self._candados_lock = threading.Lock()
+
+    @cached_property
+    def compartida(self):
+        return caches[self._alias]
+
+    # ---------- helpers ----------
+    def _clave_local(self, key, version):
+        return self.compartida.make_and_validate_key(key, version=version)
+
+    def _ttl(self, key, timeout):
+        ttl = self.ttl_local
+        for sufijo, corto in self.ttl_sufijos.items():
+            if key.endswith(sufijo):
+                ttl = min(ttl, corto)
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.compartida.default_timeout
+        return ttl if timeout is None else min(ttl, timeout)
+
+    def _contar(self, resultado):
+        with self._stats_lock:
+            self.estadisticas[resultado] += 1
+        metricas.incrementar("cv_cache_total", {"resultado": resultado})
+
+    @contextmanager
+    def _candado_local(self, clave):
+        # Un Lock por clave mientras alguien lo use: calcular un PDF no bloquea otras claves
+        with self._candados_lock:
+            entrada = self._candados.setdefault(clave, [threading.Lock(), 0])
+            entrada[1] += 1
+        try:
+            with entrada[0]:
+                yield
+        finally:
+            with self._candados_lock:
+                entrada[1] -= 1
+                if not entrada[1]:
+                    del self._candados[clave]
+
+    def _leer(self, key, version):
+        """
+        (valor, nivel) con nivel "l1" / "l2", o (_FALTA, None).
+        """
+        clave = self._clave_local(key, version)
+        valor = self.local.get(clave)
+        if valor is not _FALTA:
+            return valor, "l1"
+        valor = self.compartida.get(key, _FALTA, version=version)
+        if valor is _FALTA:
+            return _FALTA, None
+        self.local.set(clave, valor, self._ttl(key, DEFAULT_TIMEOUT))
+        return valor, "l2"
+
+    # ---------- API de BaseCache ----------
+    def get(self, key, default=None, version=None):
+        valor, nivel = self._leer(key, version)
+        self._contar(nivel or "fallo")
+        return default if valor is _FALTA else valor
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.compartida.set(key, value, timeout, version=version)
+        self.local.set(self._clave_local(key, version), value, self._ttl(key, timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.compartida.add(key, value, timeout, version=version):
+            return False
+        self.local.set(self._clave_local(key, version), value, self._ttl(key, timeout))
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(self._clave_local(key, version))
+        return self.compartida.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self._clave_local(key, version))
+        return self.compartida.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return self._leer(key, version)[1] is not None
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(self._clave_local(key, version))
+        return self.compartida.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.compartida.clear()
+
+    def close(self, **kwargs):
+        self.compartida.close(**kwargs)
+
+    # ---------- API async ----------
+    # Los de BaseCache componen aget / aset / aadd: aget_or_set se saltaría el
+    # candado anti-estampida y aincr no sería atómico. Todos van a su versión sync.
+    async def aget(self, key, default=None, version=None):
+        return await sync_to_async(self.get, thread_sensitive=True)(key, default, version)
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.set, thread_sensitive=True)(key, value, timeout, version)
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.add, thread_sensitive=True)(key, value, timeout, version)
+
+    async def atouch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.touch, thread_sensitive=True)(key, timeout, version)
+
+    async def adelete(self, key, version=None):
+        return await sync_to_async(self.delete, thread_sensitive=True)(key, version)
+
+    async def ahas_key(self, key, version=None):
+        return await sync_to_async(self.has_key, thread_sensitive=True)(key, version)
+
+    async def aincr(self, key, delta=1, version=None):
+        return await sync_to_async(self.incr, thread_sensitive=True)(key, delta, version)
+
+    async def aclear(self):
+        return await sync_to_async(self.clear, thread_sensitive=True)()
+
+    async def aclose(self, **kwargs):
+        return await sync_to_async(self.close, thread_sensitive=True)(**kwargs)
+
+    async def aget_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.get_or_set, thread_sensitive=True)(key, default, timeout, version)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        valor, nivel = self._leer(key, version)
+        if nivel:
+            self._contar(nivel)
+            return valor
+
+        with self._candado_local(self._clave_local(key, version)):
+            # Otro hilo de este proceso pudo calcularlo mientras esperábamos el candado
+            valor, nivel = self._leer(key, version)
+            if nivel:
+                self._contar("espera")
+                return valor
+
+            candado = f"{key}:calculando"
+            propio = self.compartida.add(candado, 1, self.candado_ttl, version=version)
+            if not propio:
+                valor = self._esperar(key, candado, version)
+                if valor is not _FALTA:
+                    self._contar("espera")
+                    return valor
+            self._contar("fallo")
+            try:
+                valor = default() if callable(default) else default
+                if valor is not None:
+                    self.set(key, valor, timeout, version=version)
+            finally:
+                if propio:
+                    self.compartida.delete(candado, version=version)
+        return valor
+
+    def _esperar(self, key, candado, version):
+        """
+        Espera a que otro proceso deje el valor en la cache compartida. Si
+        suelta el candado sin dejarlo (falló) o se agota espera_max, calculamos aquí.
+        """
+        limite = time.monotonic() + self.espera_max
+        pausa = 0.01
+        while time.monotonic() < limite:
+            time.sleep(pausa)
+            pausa = min(pausa * 2, 0.2)
+            valor = self.compartida.get(key, _FALTA, version=version)
+            if valor is not _FALTA:
+                self.local.set(self._clave_local(key, version), valor, self._ttl(key, DEFAULT_TIMEOUT))
+                return valor
+            if self.compartida.get(candado, version=version) is None:
+                break
+        return _FALTA
@@ -0,0 +1,71 @@
+"""
+Calentamiento del proceso antes de atender tráfico.
+
+Con gunicorn --preload corre en el master (gunicorn.conf.py, when_ready):
+lo que se carga aquí lo heredan todos los workers por copy-on-write, y el
+primer request de cada worker ya no paga imports, plantillas ni cache fría.
+"""
+import logging
+import time
+
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+from . import metricas, storage, views
+
+logger = logging.getLogger(__name__)
+
+PLANTILLAS = (
+    "home.html",
+    "secciones/datos_personales.html",
+    "secciones/cursos.html",
+    "secciones/experiencia.html",
+    "secciones/productos_academicos.html",
+    "secciones/productos_laborales.html",
+    "secciones/reconocimientos.html",
+    "secciones/venta_garage.html",
+)
+
+
+def calentar(pdf=True):
+    """
+    Carga el urlconf y compila las plantillas; con `pdf`, importa
+    reportlab / Pillow y registra las fuentes. Luego deja en la cache los
+    conteos y el PDF completo del perfil activo. Nunca falla: sin BD (o
+    sin migrar) solo se salta la parte del perfil.
+
+    Devuelve la lista de pasos hechos (para el log).
+    """
+    inicio = time.perf_counter()
+    hechos = []
+
+    get_resolver().url_patterns
+    for nombre in PLANTILLAS:
+        get_template(nombre)
+    hechos.append(f"{len(PLANTILLAS)} plantillas")
+
+    if pdf:
+        from . import pdf as pdf_cv
+
+        pdf_cv.precargar()
+        hechos.append("reportlab/Pillow/fuentes")
+
+    try:
+        perfil = views._get_perfil_activo()
+        if perfil:
+            views._get_counts(perfil)
+            hechos.append(f"conteos de {perfil.slug or perfil.pk}")
+            if pdf and perfil.permitir_impresion:
+                views.pdf_hoja_vida(perfil)
+                hechos.append("PDF completo en cache")
+    except Exception:
+        logger.exception("Calentamiento: no se pudo preparar el perfil activo")
+    finally:
+        # Nada que no sobreviva a un fork: conexiones a la BD, pool HTTP, métricas del master
+        connections.close_all()
+        storage.cerrar_sesion_http()
+        metricas.reiniciar()
+
+    hechos.append(f"{(time.perf_counter() - inicio) * 1000:.0f} ms")
+    return hechos
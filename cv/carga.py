@@ -0,0 +1,247 @@
+"""
+Generador de carga (solo stdlib + asyncio) para dimensionar el despliegue.
+
+Reproduce mezclas de tráfico ponderadas contra un servidor local: dashboard,
+páginas de sección y PDFs con combinaciones aleatorias de secciones. Cada
+usuario virtual mantiene su conexión HTTP/1.1 abierta (keep-alive), como un
+navegador, y reintenta la conexión si el servidor la cierra.
+"""
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+
+from .views import SECCIONES_PDF
+
+# Tipo de petición -> peso, por mezcla
+MEZCLAS = {
+    "navegacion": {"home": 45, "seccion": 50, "pdf": 5},
+    "mixta": {"home": 30, "seccion": 45, "pdf": 25},
+    "pdf": {"home": 10, "seccion": 15, "pdf": 75},
+}
+
+# Nombres de URL de cv/urls.py por tipo
+SECCIONES = (
+    "datos_personales", "cursos", "experiencia", "productos_academicos",
+    "productos_laborales", "reconocimientos", "venta_garage",
+)
+
+TIMEOUT = 30
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(ordenados) - 1)
+    return ordenados[f] + (ordenados[c] - ordenados[f]) * (k - f)
+
+
+class Trafico:
+    """
+    Elige la siguiente petición (endpoint, ruta) según la mezcla. `rutas`
+    es {nombre_url: ruta} para la raíz; `slugs` reparte el tráfico entre
+    perfiles bajo /cv/<slug>/.
+    """
+
+    def __init__(self, mezcla, rutas, slugs=(), semilla=None):
+        self.tipos = list(MEZCLAS[mezcla])
+        self.pesos = list(MEZCLAS[mezcla].values())
+        self.rutas = rutas
+        self.slugs = list(slugs)
+        self.rng = random.Random(semilla)
+
+    def _prefijo(self):
+        if not self.slugs:
+            return ""
+        return f"/cv/{self.rng.choice(self.slugs)}"
+
+    def siguiente(self):
+        tipo = self.rng.choices(self.tipos, self.pesos)[0]
+        if tipo == "home":
+            return "home", self._prefijo() + self.rutas["home"]
+        if tipo == "seccion":
+            nombre = self.rng.choice(SECCIONES)
+            return nombre, self._prefijo() + self.rutas[nombre]
+        # Flags aleatorios: cada combinación es una entrada distinta de la cache de PDFs
+        flags = [s for s in SECCIONES_PDF if self.rng.random() < 0.5]
+        consulta = "&".join(f"{s}=on" for s in flags)
+        return "imprimir_hoja_vida", self._prefijo() + self.rutas["imprimir_hoja_vida"] + (f"?{consulta}" if consulta else "")
+
+
+class Resultados:
+    def __init__(self):
+        self.latencias = {}
+        self.errores = {}
+        self.bytes = 0
+        self.inicio = time.monotonic()
+        self.fin = None
+
+    def anotar(self, endpoint, segundos, ok, n_bytes=0):
+        self.latencias.setdefault(endpoint, []).append(segundos)
+        if not ok:
+            self.errores[endpoint] = self.errores.get(endpoint, 0) + 1
+        self.bytes += n_bytes
+
+    def resumen(self):
+        duracion = max((self.fin or time.monotonic()) - self.inicio, 1e-9)
+        endpoints = {}
+        for endpoint, tiempos in sorted(self.latencias.items()):
+            ms = [t * 1000 for t in tiempos]
+            endpoints[endpoint] = {
+                "peticiones": len(ms),
+                "rps": round(len(ms) / duracion, 1),
+                "p50_ms": round(_percentil(ms, 50), 1),
+                "p90_ms": round(_percentil(ms, 90), 1),
+                "p99_ms": round(_percentil(ms, 99), 1),
+                "max_ms": round(max(ms), 1),
+                "errores": self.errores.get(endpoint, 0),
+                "tasa_error": round(self.errores.get(endpoint, 0) / len(ms), 4),
+            }
+        total = sum(e["peticiones"] for e in endpoints.values())
+        errores = sum(self.errores.values())
+        todas = [t * 1000 for tiempos in self.latencias.values() for t in tiempos]
+        return {
+            "duracion_s": round(duracion, 2),
+            "peticiones": total,
+            "rps": round(total / duracion, 1),
+            "p50_ms": round(_percentil(todas, 50), 1) if todas else 0,
+            "p99_ms": round(_percentil(todas, 99), 1) if todas else 0,
+            "tasa_error": round(errores / total, 4) if total else 0,
+            "mb_recibidos": round(self.bytes / 2**20, 2),
+            "endpoints": endpoints,
+        }
+
+
+# =========================
+# CLIENTE HTTP/1.1 MÍNIMO
+# =========================
+class Conexion:
+    def __init__(self, host, puerto):
+        self.host = host
+        self.puerto = puerto
+        self.lector = self.escritor = None
+
+    async def _abrir(self):
+        self.lector, self.escritor = await asyncio.open_connection(self.host, self.puerto)
+
+    def cerrar(self):
+        if self.escritor:
+            self.escritor.close()
+        self.lector = self.escritor = None
+
+    async def get(self, ruta):
+        """
+        (status, bytes del cuerpo). Reabre la conexión una vez si el servidor
+        la cerró entre peticiones (max_requests, keep-alive vencido).
+        """
+        for intento in (1, 2):
+            if self.escritor is None:
+                await self._abrir()
+            try:
+                return await self._get(ruta)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.cerrar()
+                if intento == 2:
+                    raise
+
+    async def _get(self, ruta):
+        self.escritor.write(
+            f"GET {ruta} HTTP/1.1\r\nHost: {self.host}:{self.puerto}\r\n"
+            "User-Agent: cv-carga\r\nAccept-Encoding: identity\r\nConnection: keep-alive\r\n\r\n".encode("latin-1")
+        )
+        await self.escritor.drain()
+
+        cabecera = await self.lector.readuntil(b"\r\n\r\n")
+        lineas = cabecera.decode("latin-1").split("\r\n")
+        status = int(lineas[0].split()[1])
+        headers = {}
+        for linea in lineas[1:]:
+            if ":" in linea:
+                k, v = linea.split(":", 1)
+                headers[k.strip().lower()] = v.strip().lower()
+
+        if headers.get("transfer-encoding") == "chunked":
+            n = 0
+            while True:
+                tam = int((await self.lector.readuntil(b"\r\n")).split(b";")[0], 16)
+                await self.lector.readexactly(tam + 2)
+                n += tam
+                if tam == 0:
+                    break
+        elif "content-length" in headers:
+            n = int(headers["content-length"])
+            await self.lector.readexactly(n)
+        else:
+            n = len(await self.lector.read())
+            self.cerrar()
+            return status, n
+
+        if headers.get("connection") == "close":
+            self.cerrar()
+        return status, n
+
+
+async def _usuario(base, trafico, resultados, fin, limite, pausa):
+    partes = urlsplit(base)
+    conexion = Conexion(partes.hostname, partes.port or 80)
+    try:
+        while time.monotonic() < fin and limite():
+            endpoint, ruta = trafico.siguiente()
+            inicio = time.perf_counter()
+            try:
+                status, n = await asyncio.wait_for(conexion.get(partes.path.rstrip("/") + ruta), TIMEOUT)
+                ok = status < 400
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                conexion.cerrar()
+                status, n, ok = 0, 0, False
+            resultados.anotar(endpoint, time.perf_counter() - inicio, ok, n)
+            if pausa:
+                await asyncio.sleep(trafico.rng.expovariate(1 / pausa))
+    finally:
+        conexion.cerrar()
+
+
+async def _ejecutar(base, trafico, concurrencia, duracion, peticiones, pausa):
+    resultados = Resultados()
+    fin = time.monotonic() + duracion
+    emitidas = [0]
+
+    def limite():
+        # Tope global de peticiones (None = solo por duración)
+        if peticiones is None:
+            return True
+        emitidas[0] += 1
+        return emitidas[0] <= peticiones
+
+    await asyncio.gather(*(
+        _usuario(base, trafico, resultados, fin, limite, pausa) for _ in range(concurrencia)
+    ))
+    resultados.fin = time.monotonic()
+    return resultados.resumen()
+
+
+def ejecutar(base, trafico, concurrencia=10, duracion=30.0, peticiones=None, pausa=0.0):
+    """
+    Lanza `concurrencia` usuarios virtuales durante `duracion` segundos (o
+    hasta `peticiones`). `pausa` es el tiempo medio de "lectura" entre
+    peticiones de un usuario (0 = bucle cerrado, máxima presión).
+    """
+    return asyncio.run(_ejecutar(base, trafico, concurrencia, duracion, peticiones, pausa))
+
+
+async def _esperar_puerto(host, puerto, timeout):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            _lector, escritor = await asyncio.open_connection(host, puerto)
+            escritor.close()
+            return True
+        except OSError:
+            await asyncio.sleep(0.2)
+    return False
+
+
+def esperar_servidor(base, timeout=30):
+    partes = urlsplit(base)
+    return asyncio.run(_esperar_puerto(partes.hostname, partes.port or 80, timeout))
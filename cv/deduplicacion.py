@@ -0,0 +1,167 @@
+import hashlib
+import logging
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models import F
+
+from .imagenes import DERIVADOS, ruta_derivado
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE = 64 * 1024
+
+
+def campos_archivo(model):
+    """
+    Nombres de todos los FileField del modelo (incluye ImageField).
+    """
+    return [f.name for f in model._meta.get_fields() if isinstance(f, models.FileField)]
+
+
+def modelos_con_archivos():
+    return [m for m in apps.get_app_config("cv").get_models() if campos_archivo(m)]
+
+
+def sha256_de(archivo):
+    """
+    SHA-256 del contenido, leyendo por bloques y dejando el puntero al inicio.
+    """
+    h = hashlib.sha256()
+    for bloque in archivo.chunks(TAMANO_BLOQUE):
+        h.update(bloque)
+    archivo.seek(0)
+    return h.hexdigest()
+
+
+def nombres_actuales(instance):
+    return {campo: (getattr(instance, campo).name or None) for campo in campos_archivo(type(instance))}
+
+
+# =========================
+# CICLO DE VIDA
+# =========================
+def recordar_nombres(instance):
+    """
+    Guarda los nombres tal como vienen de la BD para detectar reemplazos
+    sin volver a consultar (se llama desde post_init).
+    """
+    originales = {}
+    for campo in campos_archivo(type(instance)):
+        valor = instance.__dict__.get(campo)
+        # Solo cuenta lo que viene como nombre (BD); un upload nuevo no tiene original.
+        originales[campo] = valor if isinstance(valor, str) and valor else None
+    instance._nombres_originales = originales
+
+
+def antes_de_guardar(instance):
+    """
+    Si un archivo recién subido ya existe (mismo hash), el campo pasa a apuntar
+    al blob existente y no se vuelve a subir.
+    """
+    Blobmedia = apps.get_model("cv", "Blobmedia")
+
+    originales = getattr(instance, "_nombres_originales", {})
+    pendientes = {}
+    subidos = {}  # sha -> nombre, para duplicados dentro de la misma instancia
+    for campo in campos_archivo(type(instance)):
+        archivo = getattr(instance, campo)
+        if not archivo or archivo._committed:
+            continue
+
+        sha = sha256_de(archivo)
+        tamano = archivo.size
+        blob = Blobmedia.objects.filter(sha256=sha).first()
+        if blob:
+            setattr(instance, campo, blob.nombre)
+            if originales.get(campo) != blob.nombre:
+                Blobmedia.objects.filter(pk=blob.pk).update(referencias=F("referencias") + 1)
+            continue
+
+        if sha in subidos:
+            setattr(instance, campo, subidos[sha])
+        else:
+            # Se sube ya (lo mismo que haría FileField.pre_save) para conocer el nombre final
+            archivo.save(archivo.name, archivo.file, save=False)
+            subidos[sha] = archivo.name
+        pendientes[campo] = (sha, tamano)
+
+    instance._hashes_pendientes = pendientes
+
+
+def despues_de_guardar(instance):
+    Blobmedia = apps.get_model("cv", "Blobmedia")
+
+    redundantes = set()
+    for campo, (sha, tamano) in getattr(instance, "_hashes_pendientes", {}).items():
+        nombre = getattr(instance, campo).name
+        blob, creado = Blobmedia.objects.get_or_create(
+            sha256=sha, defaults={"nombre": nombre, "tamano": tamano, "referencias": 1}
+        )
+        if creado:
+            continue
+        Blobmedia.objects.filter(pk=blob.pk).update(referencias=F("referencias") + 1)
+        if blob.nombre != nombre:
+            # Otro upload del mismo contenido creó el blob entre antes_de_guardar y aquí:
+            # el campo pasa al archivo del blob y el nuestro sobra
+            type(instance)._default_manager.filter(pk=instance.pk).update(**{campo: blob.nombre})
+            setattr(instance, campo, blob.nombre)
+            redundantes.add(nombre)
+    instance._hashes_pendientes = {}
+    for nombre in redundantes:
+        descartar(nombre)
+
+    originales = getattr(instance, "_nombres_originales", {})
+    actuales = nombres_actuales(instance)
+    for campo, anterior in originales.items():
+        if anterior and anterior != actuales.get(campo):
+            liberar(anterior)
+    instance._nombres_originales = actuales
+
+
+def al_eliminar(instance):
+    for nombre in nombres_actuales(instance).values():
+        if nombre:
+            liberar(nombre)
+
+
+def liberar(nombre):
+    """
+    Resta una referencia al blob; si llega a cero se borran el archivo,
+    sus derivados y los registros. Archivos sin blob (anteriores a la
+    deduplicación) no se tocan.
+    """
+    Blobmedia = apps.get_model("cv", "Blobmedia")
+
+    Blobmedia.objects.filter(nombre=nombre, referencias__gt=0).update(referencias=F("referencias") - 1)
+    huerfanos = list(Blobmedia.objects.filter(nombre=nombre, referencias=0).values_list("pk", flat=True))
+    if not huerfanos:
+        return
+
+    Blobmedia.objects.filter(pk__in=huerfanos).delete()
+    descartar(nombre)
+
+
+def descartar(nombre):
+    """
+    Borra un archivo que ya no usa nadie: su Imagenprocesada ahora y, al
+    confirmar la transacción, el archivo y sus derivados del storage.
+    """
+    Imagenprocesada = apps.get_model("cv", "Imagenprocesada")
+
+    registros = Imagenprocesada.objects.filter(nombre=nombre)
+    # Las rutas registradas (pueden ser de un esquema anterior) y las actuales
+    rutas = {nombre} | {ruta_derivado(nombre, clave) for clave in DERIVADOS}
+    for derivados in registros.values_list("derivados", flat=True):
+        rutas.update((derivados or {}).values())
+    registros.delete()
+    transaction.on_commit(lambda: _borrar_del_storage(sorted(rutas)))
+
+
+def _borrar_del_storage(rutas):
+    for ruta in rutas:
+        try:
+            default_storage.delete(ruta)
+        except Exception:
+            logger.warning("No se pudo borrar %s del storage", ruta)
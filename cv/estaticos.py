@@ -0,0 +1,235 @@
+"""
+CSS crítico y fuentes propias (paso de build, ver optimizar_estaticos).
+
+- CSS crítico: las reglas de la hoja que usan las plantillas de cv
+  (clases, ids y etiquetas que aparecen en ellas), minificadas. base.html
+  las inserta en un <style> y carga la hoja completa sin bloquear el render.
+- Fuentes: los subconjuntos WOFF2 (por unicode-range, p. ej. "latin") de la
+  familia de Google Fonts, con solo los pesos que usa el CSS. Se bajan al
+  hacer el build y se sirven desde nuestros estáticos: sin DNS/TLS extra ni
+  hoja de estilos de terceros bloqueando el primer render.
+
+El resultado queda en <directorio()>/critico.json y fuentes/*.woff2; lo lee
+el tag {% estilos_criticos %} (cv/templatetags/cv_estaticos.py).
+"""
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+
+# Ruta (relativa a STATIC) de lo generado, dentro de cv/static
+RUTA_STATIC = "cv/generado"
+
+GOOGLE_CSS = "https://fonts.googleapis.com/css2"
+# Con un navegador actual Google Fonts responde WOFF2 separado por unicode-range
+AGENTE_WOFF2 = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+# Siempre presentes aunque ninguna plantilla las nombre
+ETIQUETAS_BASE = {"html", "body", "head"}
+
+
+def directorio():
+    return Path(getattr(settings, "CV_ESTATICOS_GENERADOS", None)
+                or Path(apps.get_app_config("cv").path) / "static" / RUTA_STATIC)
+
+
+# =========================
+# PLANTILLAS
+# =========================
+def usados_en_plantillas(raices=None):
+    """
+    (clases, prefijos, ids, etiquetas) de las plantillas de cv (sin admin/).
+    Un `class="estado-{{ x }}"` deja "estado-" como prefijo: vale cualquier
+    clase que empiece así.
+    """
+    if raices is None:
+        raices = [Path(apps.get_app_config("cv").path) / "templates"]
+    clases, prefijos, ids, etiquetas = set(), set(), set(), set(ETIQUETAS_BASE)
+    for raiz in raices:
+        for ruta in Path(raiz).rglob("*.html"):
+            if "admin" in ruta.relative_to(raiz).parts:
+                continue
+            texto = ruta.read_text(encoding="utf-8")
+            etiquetas.update(e.lower() for e in re.findall(r"<([a-zA-Z][\w-]*)", texto))
+            for valor in re.findall(r'\bclass\s*=\s*"([^"]*)"', texto):
+                # {% if %}a{% endif %} deja "a"; {{ x }} corta el nombre y lo vuelve prefijo
+                valor = re.sub(r"\{%.*?%\}", " ", valor)
+                valor = re.sub(r"\{\{.*?\}\}", "\0", valor)
+                for token in valor.split():
+                    if "\0" in token:
+                        if token.split("\0")[0]:
+                            prefijos.add(token.split("\0")[0])
+                    else:
+                        clases.add(token)
+            ids.update(re.findall(r'\bid\s*=\s*"([\w-]+)"', texto))
+            for args in re.findall(r"classList\.(?:add|toggle|replace)\(([^)]*)\)", texto):
+                clases.update(re.findall(r"""['"]([\w-]+)['"]""", args))
+    return clases, prefijos, ids, etiquetas
+
+
+# =========================
+# CSS
+# =========================
+def _bloques(texto):
+    """
+    [(preludio, cuerpo)] de primer nivel. Las sentencias sin bloque
+    (@import, @charset) se descartan: no hay ninguna en nuestras hojas.
+    """
+    texto = re.sub(r"/\*.*?\*/", "", texto, flags=re.S)
+    bloques, i = [], 0
+    while True:
+        abre = texto.find("{", i)
+        if abre < 0:
+            return bloques
+        preludio = texto[i:abre].rsplit(";", 1)[-1].strip()
+        nivel, j = 1, abre + 1
+        while nivel and j < len(texto):
+            nivel += {"{": 1, "}": -1}.get(texto[j], 0)
+            j += 1
+        bloques.append((preludio, texto[abre + 1:j - 1]))
+        i = j
+
+
+def _minificar_declaraciones(cuerpo):
+    cuerpo = re.sub(r"\s+", " ", cuerpo).strip()
+    cuerpo = re.sub(r"\s*([:;,])\s*", r"\1", cuerpo)
+    return cuerpo.rstrip(";")
+
+
+def _selector_usado(selector, usados):
+    clases, prefijos, ids, etiquetas = usados
+    # Pseudo-clases, pseudo-elementos y atributos no cambian qué elementos existen
+    limpio = re.sub(r"::?[\w-]+(\([^)]*\))?|\[[^\]]*\]", "", selector)
+    for nombre in re.findall(r"\.([\w-]+)", limpio):
+        if nombre not in clases and not any(nombre.startswith(p) for p in prefijos):
+            return False
+    if any(i not in ids for i in re.findall(r"#([\w-]+)", limpio)):
+        return False
+    for compuesto in re.split(r"[\s>+~]+", limpio):
+        etiqueta = re.match(r"[a-zA-Z][\w-]*", compuesto)
+        if etiqueta and etiqueta.group(0).lower() not in etiquetas:
+            return False
+    return True
+
+
+def css_critico(texto, usados):
+    """
+    Reglas de `texto` con al menos un selector usado (solo esos selectores),
+    y los @media que contengan alguna; minificado. @font-face y @keyframes
+    llegan con la hoja completa.
+    """
+    salida = []
+    for preludio, cuerpo in _bloques(texto):
+        if preludio.startswith("@"):
+            if preludio.startswith(("@media", "@supports")):
+                interior = css_critico(cuerpo, usados)
+                if interior:
+                    salida.append(" ".join(preludio.split()) + f"{{{interior}}}")
+            continue
+        selectores = [re.sub(r"\s+", " ", s).strip() for s in preludio.split(",")]
+        selectores = [s for s in selectores if s and _selector_usado(s, usados)]
+        declaraciones = _minificar_declaraciones(cuerpo)
+        if selectores and declaraciones:
+            salida.append(f"{','.join(selectores)}{{{declaraciones}}}")
+    return "".join(salida)
+
+
+def pesos_de(texto):
+    """
+    Pesos de fuente que usa una hoja (más el normal).
+    """
+    equivalentes = {"normal": 400, "bold": 700}
+    pesos = {400}
+    for valor in re.findall(r"font-weight\s*:\s*(\w+)", texto):
+        if valor.isdigit():
+            pesos.add(int(valor))
+        elif valor in equivalentes:
+            pesos.add(equivalentes[valor])
+    return sorted(pesos)
+
+
+# =========================
+# FUENTES
+# =========================
+def _propiedades(cuerpo):
+    return {k.strip(): v.strip() for k, v in re.findall(r"([\w-]+)\s*:\s*([^;]+);?", cuerpo)}
+
+
+def caras_google(css, subconjuntos):
+    """
+    [{familia, estilo, pesos, unicode_range, subconjunto, url}] del CSS de
+    Google Fonts, solo de los subconjuntos pedidos. Las fuentes variables
+    repiten la misma URL para cada peso: se agrupan en una sola cara.
+    """
+    caras = {}
+    for subconjunto, cuerpo in re.findall(r"/\*\s*([\w-]+)\s*\*/\s*@font-face\s*\{([^}]*)\}", css):
+        if subconjunto not in subconjuntos:
+            continue
+        props = _propiedades(cuerpo)
+        url = re.search(r"url\(([^)]+)\)", props["src"]).group(1).strip("'\"")
+        cara = caras.setdefault(url, {
+            "familia": props["font-family"].strip("'\""),
+            "estilo": props.get("font-style", "normal"),
+            "pesos": [],
+            "unicode_range": props.get("unicode-range", ""),
+            "subconjunto": subconjunto,
+            "url": url,
+        })
+        cara["pesos"].extend(int(p) for p in props.get("font-weight", "400").split())
+    return list(caras.values())
+
+
+def descargar_fuentes(familia, pesos, subconjuntos, destino, sesion):
+    """
+    Baja a `destino` los WOFF2 de la familia y devuelve sus caras con
+    "archivo" (relativo a `destino`). Los archivos ya presentes no se bajan.
+    """
+    params = {"family": f"{familia}:wght@{';'.join(str(p) for p in pesos)}", "display": "swap"}
+    respuesta = sesion.get(GOOGLE_CSS, params=params, headers={"User-Agent": AGENTE_WOFF2}, timeout=20)
+    respuesta.raise_for_status()
+
+    os.makedirs(destino, exist_ok=True)
+    caras = caras_google(respuesta.text, subconjuntos)
+    for cara in caras:
+        cara["pesos"] = [min(cara["pesos"]), max(cara["pesos"])]
+        nombre = "{}-{}-{}-{}-{}.woff2".format(
+            familia.lower().replace(" ", "-"), cara["subconjunto"], cara["estilo"], *cara["pesos"]
+        )
+        ruta = os.path.join(destino, nombre)
+        if not os.path.exists(ruta):
+            archivo = sesion.get(cara.pop("url"), timeout=30)
+            archivo.raise_for_status()
+            with open(ruta, "wb") as fh:
+                fh.write(archivo.content)
+        cara.pop("url", None)
+        cara["archivo"] = f"fuentes/{nombre}"
+    return caras
+
+
+# =========================
+# RESULTADO
+# =========================
+def guardar(hojas, fuentes, destino=None):
+    destino = Path(destino or directorio())
+    os.makedirs(destino, exist_ok=True)
+    with open(destino / "critico.json", "w", encoding="utf-8") as fh:
+        json.dump({"hojas": hojas, "fuentes": fuentes}, fh, ensure_ascii=False, indent=1)
+    cargar.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def cargar():
+    """
+    Contenido de critico.json, o None si no se ha generado (desarrollo sin
+    build: base.html enlaza la hoja completa como siempre).
+    """
+    try:
+        with open(directorio() / "critico.json", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
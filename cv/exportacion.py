@@ -0,0 +1,158 @@
+"""
+Exportación masiva de hojas de vida en PDF dentro de un ZIP.
+
+Los PDFs se renderizan en un pool de procesos (reportlab + PIL son CPU y
+no sueltan el GIL) y el ZIP se va emitiendo por trozos a medida que llegan,
+sin tener el archivo completo en memoria. Al pool solo se envían unos pocos
+perfiles más que procesos hay: con un cliente lento los PDFs ya hechos no
+se acumulan en memoria.
+
+Los PDFs de una exportación no se guardan en la cache: son muchos, se piden
+una vez y echarían del nivel 1 (y del 2) lo que sí usan las vistas.
+"""
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.text import slugify
+
+TAMANO_TROZO = 64 * 1024
+
+# Perfiles en vuelo por proceso del pool
+VENTANA_POR_PROCESO = 2
+
+
+def _cpus():
+    # CPUs asignadas al contenedor, no las de la máquina (igual que gunicorn.conf.py)
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _procesos():
+    procesos = getattr(settings, "CV_EXPORTAR_PROCESOS", None)
+    if procesos is None:
+        procesos = _cpus()
+    return min(procesos, getattr(settings, "CV_EXPORTAR_MAX_PROCESOS", 4))
+
+
+def nombre_pdf(perfil):
+    base = slugify(f"{perfil.apellidos} {perfil.nombres}") or "perfil"
+    return f"{perfil.pk}_{base}.pdf"
+
+
+# =========================
+# RENDER (PROCESOS HIJOS)
+# =========================
+def _iniciar_proceso():
+    # Procesos "spawn": no heredan conexiones ni hilos del servidor
+    import django
+
+    django.setup()
+
+
+def _renderizar(perfil_id, secciones):
+    from .models import Datospersonales
+    from .views import renderizar_pdf
+
+    return renderizar_pdf(Datospersonales.objects.get(pk=perfil_id), secciones)
+
+
+def renderizar_pdfs(perfiles, secciones, procesos=None):
+    """
+    Genera (nombre, bytes) en orden de llegada. Los PDFs ya cacheados se
+    emiten sin renderizar; el resto va al pool, como mucho
+    VENTANA_POR_PROCESO por proceso a la vez, y no se cachea. Con
+    procesos=0 todo se hace aquí (pruebas, pocos perfiles).
+    """
+    from .views import clave_pdf, renderizar_pdf
+
+    pendientes = []
+    for perfil in perfiles:
+        contenido = cache.get(clave_pdf(perfil.pk, secciones))
+        if contenido is not None:
+            yield nombre_pdf(perfil), contenido
+        else:
+            pendientes.append(perfil)
+
+    procesos = _procesos() if procesos is None else procesos
+    if procesos <= 0 or len(pendientes) <= 1:
+        for perfil in pendientes:
+            yield nombre_pdf(perfil), renderizar_pdf(perfil, secciones)
+        return
+
+    procesos = min(procesos, len(pendientes))
+    por_enviar = iter(pendientes)
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_iniciar_proceso,
+    ) as pool:
+        def enviar(n):
+            for perfil in islice(por_enviar, n):
+                futuros[pool.submit(_renderizar, perfil.pk, secciones)] = perfil
+
+        futuros = {}
+        enviar(procesos * VENTANA_POR_PROCESO)
+        while futuros:
+            listos, _ = wait(futuros, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                perfil = futuros.pop(futuro)
+                yield nombre_pdf(perfil), futuro.result()
+                enviar(1)
+
+
+# =========================
+# ZIP EN STREAMING
+# =========================
+class _SalidaZip:
+    """
+    Archivo de solo escritura y no posicionable: zipfile escribe entonces
+    descriptores de datos y lo escrito se puede ir vaciando.
+    """
+
+    def __init__(self):
+        self.trozos = []
+
+    def write(self, datos):
+        self.trozos.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b"".join(self.trozos)
+        self.trozos = []
+        return datos
+
+
+def zip_en_streaming(pdfs):
+    """
+    Recibe (nombre, bytes) y genera los trozos del ZIP.
+    """
+    salida = _SalidaZip()
+    with zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nombre, contenido in pdfs:
+            with zf.open(nombre, "w") as entrada:
+                for i in range(0, len(contenido), TAMANO_TROZO):
+                    entrada.write(contenido[i:i + TAMANO_TROZO])
+                    datos = salida.vaciar()
+                    if datos:
+                        yield datos
+            datos = salida.vaciar()
+            if datos:
+                yield datos
+    yield salida.vaciar()
+
+
+def exportar_zip(perfiles, secciones, procesos=None):
+    """
+    `perfiles`: queryset o lista de Datospersonales.
+    """
+    return zip_en_streaming(renderizar_pdfs(list(perfiles), secciones, procesos))
@@ -0,0 +1,250 @@
+import base64
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, models, transaction
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# CONFIGURACIÓN DE DERIVADOS
+# =========================
+# clave -> (lado máximo en px, formato, extensión, calidad)
+DERIVADOS = {
+    "thumb": (400, "JPEG", "jpg", 82),
+    "thumb2x": (800, "JPEG", "jpg", 80),
+    "webp": (800, "WEBP", "webp", 78),
+    "pdf": (1600, "JPEG", "jpg", 80),
+}
+
+CARPETA_DERIVADOS = "derivados"
+
+# Vista previa embebida en el HTML mientras carga la imagen real
+LADO_PLACEHOLDER = 16
+
+_ejecutor = None
+
+
+def campos_imagen(model):
+    """
+    Nombres de los ImageField de un modelo (foto_perfil, certificado_imagen, ...).
+    """
+    return [f.name for f in model._meta.get_fields() if isinstance(f, models.ImageField)]
+
+
+def modelos_con_imagenes():
+    return [m for m in apps.get_app_config("cv").get_models() if campos_imagen(m)]
+
+
+def ruta_derivado(nombre, clave):
+    # El nombre completo (con extensión): foto.png y foto.jpg no comparten derivados
+    ext = DERIVADOS[clave][2]
+    return f"{CARPETA_DERIVADOS}/{nombre}/{clave}.{ext}"
+
+
+# =========================
+# GENERACIÓN
+# =========================
+def _preparar(img):
+    """
+    Aplica la orientación EXIF y deja la imagen en RGB sin metadatos (EXIF / ICC).
+    """
+    from PIL import Image, ImageOps
+
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        fondo = Image.new("RGB", img.size, (255, 255, 255))
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            fondo.paste(img, mask=img.getchannel("A"))
+        else:
+            fondo.paste(img.convert("RGB"))
+        img = fondo
+    img.info = {}
+    return img
+
+
+def _codificar(img, lado, formato, calidad):
+    from PIL import Image
+
+    copia = img.copy()
+    copia.thumbnail((lado, lado), Image.LANCZOS)
+    buffer = io.BytesIO()
+    opciones = {"quality": calidad}
+    if formato == "JPEG":
+        opciones.update(optimize=True, progressive=True)
+    else:
+        opciones.update(method=4)
+    copia.save(buffer, format=formato, **opciones)
+    return buffer.getvalue()
+
+
+def _placeholder(img):
+    """
+    JPEG de 16px en base64 (data URI) para pintar mientras carga la imagen.
+    """
+    copia = img.copy()
+    copia.thumbnail((LADO_PLACEHOLDER, LADO_PLACEHOLDER))
+    buffer = io.BytesIO()
+    copia.save(buffer, format="JPEG", quality=40)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def generar_derivados(nombre):
+    """
+    Genera todos los derivados de `nombre` en el storage por defecto
+    y deja constancia en Imagenprocesada.
+    """
+    # Pillow se importa al generar, no al cargar el módulo (lo usan las vistas HTML, ver cv/pdf.py)
+    from PIL import Image
+
+    Imagenprocesada = apps.get_model("cv", "Imagenprocesada")
+
+    try:
+        with default_storage.open(nombre, "rb") as fh:
+            with Image.open(fh) as original:
+                original.load()
+                img = _preparar(original)
+    except Exception as exc:
+        logger.warning("No se pudo abrir %s para derivados: %s", nombre, exc)
+        Imagenprocesada.objects.update_or_create(
+            nombre=nombre, defaults={"derivados": {}, "error": str(exc)[:200]}
+        )
+        return None
+
+    derivados = {}
+    for clave, (lado, formato, _ext, calidad) in DERIVADOS.items():
+        destino = ruta_derivado(nombre, clave)
+        if default_storage.exists(destino):
+            default_storage.delete(destino)
+        derivados[clave] = default_storage.save(destino, ContentFile(_codificar(img, lado, formato, calidad)))
+
+    obj, _ = Imagenprocesada.objects.update_or_create(
+        nombre=nombre,
+        defaults={
+            "derivados": derivados,
+            "ancho": img.width,
+            "alto": img.height,
+            "placeholder": _placeholder(img),
+            "error": "",
+        },
+    )
+    return obj
+
+
+def _trabajo(nombre):
+    try:
+        generar_derivados(nombre)
+    except Exception:
+        logger.exception("Fallo generando derivados de %s", nombre)
+    finally:
+        close_old_connections()
+
+
+def _get_ejecutor():
+    global _ejecutor
+    if _ejecutor is None:
+        hilos = getattr(settings, "CV_DERIVADOS_HILOS", 2)
+        _ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="cv-derivados")
+    return _ejecutor
+
+
+def programar_derivados(nombre):
+    """
+    Encola la generación al confirmar la transacción.
+    Con CV_DERIVADOS_SINCRONO=True (tests / scripts) se ejecuta en el acto.
+    """
+    if getattr(settings, "CV_DERIVADOS_SINCRONO", False):
+        transaction.on_commit(lambda: generar_derivados(nombre))
+    else:
+        transaction.on_commit(lambda: _get_ejecutor().submit(_trabajo, nombre))
+
+
+def nombres_pendientes(instance):
+    """
+    Nombres de imagen de la instancia que todavía no tienen derivados. Un
+    registro con error (o sin derivados) no cuenta como hecho: un fallo
+    transitorio del storage se reintenta al guardar o con generar_derivados.
+    """
+    Imagenprocesada = apps.get_model("cv", "Imagenprocesada")
+
+    nombres = set()
+    for campo in campos_imagen(type(instance)):
+        archivo = getattr(instance, campo)
+        if archivo and archivo.name:
+            nombres.add(archivo.name)
+    if not nombres:
+        return set()
+
+    hechos = set(
+        Imagenprocesada.objects.filter(nombre__in=nombres, error="")
+        .exclude(derivados={})
+        .values_list("nombre", flat=True)
+    )
+    return nombres - hechos
+
+
+# =========================
+# LECTURA (VIEWS / TEMPLATES)
+# =========================
+def _consulta_derivados(nombres):
+    Imagenprocesada = apps.get_model("cv", "Imagenprocesada")
+    return Imagenprocesada.objects.filter(nombre__in=nombres).exclude(derivados={})
+
+
+def derivados_por_nombre(nombres):
+    """
+    {nombre_original: Imagenprocesada} en una sola consulta.
+    """
+    nombres = {n for n in nombres if n}
+    if not nombres:
+        return {}
+    return {obj.nombre: obj for obj in _consulta_derivados(nombres)}
+
+
+async def aderivados_por_nombre(nombres):
+    nombres = {n for n in nombres if n}
+    if not nombres:
+        return {}
+    return {obj.nombre: obj async for obj in _consulta_derivados(nombres)}
+
+
+def _nombres_archivo(items, campos):
+    nombres = []
+    for it in items:
+        for campo in campos:
+            archivo = getattr(it, campo, None)
+            if archivo and archivo.name:
+                nombres.append(archivo.name)
+    return nombres
+
+
+def _asignar_derivados(items, campos, encontrados):
+    for it in items:
+        it.derivados = {}
+        for campo in campos:
+            archivo = getattr(it, campo, None)
+            if archivo and archivo.name in encontrados:
+                it.derivados[campo] = encontrados[archivo.name]
+    return items
+
+
+def adjuntar_derivados(items, *campos):
+    """
+    Deja en cada item `item.derivados = {campo: Imagenprocesada}` para
+    que el template pueda pintar miniaturas y srcset sin más consultas.
+    """
+    items = list(items)
+    return _asignar_derivados(items, campos, derivados_por_nombre(_nombres_archivo(items, campos)))
+
+
+async def aadjuntar_derivados(items, *campos):
+    # `items` ya materializado (lista): desde el event loop no se puede iterar un queryset
+    encontrados = await aderivados_por_nombre(_nombres_archivo(items, campos))
+    return _asignar_derivados(items, campos, encontrados)
@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from . import cache as cache_cv
+from .models import (
+    Cursosrealizados,
+    Experiencialaboral,
+    Productosacademicos,
+    Productoslaborales,
+    Reconocimientos,
+    Ventagarage,
+)
+
+# Clave = related_name en Datospersonales
+SECCIONES = {
+    "cursos": Cursosrealizados,
+    "experiencias": Experiencialaboral,
+    "productos_academicos": Productosacademicos,
+    "productos_laborales": Productoslaborales,
+    "reconocimientos": Reconocimientos,
+    "venta_garage": Ventagarage,
+}
+
+TAMANO_LOTE = 500
+
+
+class ResultadoImportacion:
+    def __init__(self):
+        self.creados = 0
+        self.errores = []  # [(numero_fila, "mensaje"), ...]
+
+    def error(self, fila, mensaje):
+        self.errores.append((fila, mensaje))
+
+    def __str__(self):
+        return f"{self.creados} creados, {len(self.errores)} filas con errores"
+
+
+# =========================
+# LECTURA DE ARCHIVOS
+# =========================
+def leer_filas(contenido, formato):
+    """
+    `contenido` en texto; devuelve una lista de dicts.
+    """
+    if formato == "json":
+        datos = json.loads(contenido)
+        if isinstance(datos, dict):
+            datos = datos.get("items", [])
+        if not isinstance(datos, list):
+            raise ValueError("El JSON debe ser una lista de objetos o {\"items\": [...]}.")
+        return datos
+    if formato == "csv":
+        return list(csv.DictReader(io.StringIO(contenido)))
+    raise ValueError(f"Formato no soportado: {formato}")
+
+
+def formato_de(nombre_archivo):
+    return "json" if nombre_archivo.lower().endswith(".json") else "csv"
+
+
+# =========================
+# IMPORTACIÓN
+# =========================
+def campos_importables(model):
+    """
+    Campos concretos editables, sin pk, sin perfil y sin archivos.
+    """
+    return {
+        f.name: f
+        for f in model._meta.concrete_fields
+        if f.editable and not f.primary_key and f.name != "perfil" and not isinstance(f, models.FileField)
+    }
+
+
+def _claves_unicas(model):
+    """
+    Campos (sin perfil) de cada UniqueConstraint del modelo, ej.
+    uq_curso_perfil_nombre_fechas -> ("nombrecurso", "fechainicio", "fechafin").
+    """
+    return [
+        (c.name, tuple(f for f in c.fields if f != "perfil"))
+        for c in model._meta.constraints
+        if isinstance(c, models.UniqueConstraint) and "perfil" in c.fields
+    ]
+
+
+def _construir(model, perfil, fila, campos):
+    desconocidos = set(fila) - set(campos)
+    if desconocidos:
+        raise ValidationError(f"Columnas desconocidas: {', '.join(sorted(desconocidos))}")
+
+    valores = {}
+    for nombre, valor in fila.items():
+        if isinstance(valor, str):
+            valor = valor.strip()
+            if valor == "" and not isinstance(campos[nombre], (models.CharField, models.TextField)):
+                valor = None
+        valores[nombre] = valor
+
+    # El perfil ya cargado se asigna como objeto: los clean() no lo vuelven a consultar
+    obj = model(perfil=perfil, **valores)
+    obj.full_clean(exclude=["perfil"], validate_unique=False, validate_constraints=False)
+    return obj
+
+
+def importar(model, perfil, filas, lote=TAMANO_LOTE, dry_run=False):
+    """
+    Valida todas las filas (perfil cargado una vez, restricciones únicas
+    comprobadas contra un set en memoria) e inserta las válidas con
+    bulk_create por lotes. bulk_create no manda post_save: la cache del
+    perfil se invalida aquí, una vez por importación.
+    """
+    resultado = ResultadoImportacion()
+    campos = campos_importables(model)
+    claves = _claves_unicas(model)
+
+    existentes = {
+        nombre: set(model.objects.filter(perfil=perfil).values_list(*cols))
+        for nombre, cols in claves
+    }
+
+    validos = []
+    for numero, fila in enumerate(filas, start=1):
+        if not isinstance(fila, dict):
+            resultado.error(numero, "La fila no es un objeto.")
+            continue
+        try:
+            obj = _construir(model, perfil, fila, campos)
+        except ValidationError as exc:
+            mensajes = exc.message_dict if hasattr(exc, "error_dict") else {"__all__": exc.messages}
+            resultado.error(numero, "; ".join(f"{k}: {' '.join(v)}" for k, v in mensajes.items()))
+            continue
+        except (TypeError, ValueError) as exc:
+            resultado.error(numero, str(exc))
+            continue
+
+        repetida = None
+        for nombre, cols in claves:
+            if tuple(getattr(obj, c) for c in cols) in existentes[nombre]:
+                repetida = nombre
+                break
+        if repetida:
+            resultado.error(numero, f"Ya existe un registro igual ({repetida}).")
+            continue
+
+        for nombre, cols in claves:
+            existentes[nombre].add(tuple(getattr(obj, c) for c in cols))
+        validos.append(obj)
+
+    if not dry_run and validos:
+        with transaction.atomic():
+            for i in range(0, len(validos), lote):
+                model.objects.bulk_create(validos[i:i + lote])
+        cache_cv.invalidar({perfil.pk})
+    resultado.creados = len(validos)
+    return resultado
@@ -0,0 +1,130 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Lo que hace un worker antes de su primer request: cargar la app WSGI y el urlconf
+# (que importa cv.views). Imprime una línea JSON con tiempo, memoria y módulos pesados.
+SCRIPT = """
+import json, sys, time
+inicio = time.perf_counter()
+from django_portfolio.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+ms = (time.perf_counter() - inicio) * 1000
+estado = {}
+with open("/proc/self/status") as fh:
+    for linea in fh:
+        if linea.startswith(("VmRSS:", "VmHWM:")):
+            estado[linea.split(":")[0]] = int(linea.split()[1]) * 1024
+print(json.dumps({
+    "ms": ms,
+    "rss": estado.get("VmRSS", 0),
+    "pico_rss": estado.get("VmHWM", 0),
+    "pesados": sorted(m for m in PESADOS if m in sys.modules),
+}))
+"""
+
+# Paquetes que un worker de solo HTML no debe cargar al arrancar (ver cv/pdf.py)
+PESADOS = ("reportlab", "PIL")
+
+# escenario -> (variables de entorno, ms de arranque, MB de RSS)
+ESCENARIOS = {
+    "html": ({"CV_PDF_PRECARGA": "0"}, 900, 64),
+    "pdf": ({"CV_PDF_PRECARGA": "1"}, 1200, 80),
+}
+
+
+def _importtime(stderr):
+    """
+    {paquete raíz: µs propios} a partir de la salida de -X importtime: cada
+    módulo suma su tiempo propio a su paquete (django, reportlab, PIL, ...).
+    """
+    paquetes = {}
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        propio, _acumulado, nombre = linea[len("import time:"):].split("|")
+        raiz = nombre.strip().split(".")[0]
+        paquetes[raiz] = paquetes.get(raiz, 0) + int(propio)
+    return paquetes
+
+
+def medir_arranque(escenario):
+    """
+    Arranca un intérprete limpio con -X importtime y mide un escenario.
+    """
+    entorno, _ms, _mb = ESCENARIOS[escenario]
+    env = {**os.environ, **entorno, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE",
+                                                                            "django_portfolio.settings")}
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"PESADOS = {PESADOS!r}\n{SCRIPT}"],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    if proceso.returncode != 0:
+        raise CommandError(f"El arranque ({escenario}) falló:\n{proceso.stderr[-2000:]}")
+    datos = json.loads(proceso.stdout.strip().splitlines()[-1])
+    datos["importtime_us"] = _importtime(proceso.stderr)
+    return datos
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de arranque en frío de un worker (python -X importtime): tiempo hasta "
+        "tener la app y el urlconf cargados, RSS y paquetes más caros, con y sin precarga "
+        "del PDF. Falla si se pasa del presupuesto o si el worker HTML carga reportlab/Pillow."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=5)
+        parser.add_argument("--escenario", choices=sorted(ESCENARIOS), action="append", default=None)
+        parser.add_argument("--top", type=int, default=10, help="Paquetes más caros a listar.")
+        parser.add_argument("--holgura", type=float, default=1.0, help="Multiplica los presupuestos (máquinas lentas).")
+        parser.add_argument("--salida", default=None, help="JSON con los resultados.")
+
+    def handle(self, *args, **options):
+        fallos = []
+        resultados = {}
+        for escenario in options["escenario"] or sorted(ESCENARIOS):
+            _entorno, presupuesto_ms, presupuesto_mb = ESCENARIOS[escenario]
+            muestras = [medir_arranque(escenario) for _ in range(options["repeticiones"])]
+
+            ms = statistics.median(m["ms"] for m in muestras)
+            mb = statistics.median(m["rss"] for m in muestras) / 2**20
+            importtime = {
+                paquete: statistics.median(m["importtime_us"].get(paquete, 0) for m in muestras)
+                for paquete in muestras[0]["importtime_us"]
+            }
+            top = sorted(importtime.items(), key=lambda x: x[1], reverse=True)[:options["top"]]
+            resultados[escenario] = {
+                "ms": round(ms, 1),
+                "rss_mb": round(mb, 1),
+                "pesados": muestras[0]["pesados"],
+                "importtime_ms": {p: round(us / 1000, 1) for p, us in top},
+            }
+
+            self.stdout.write(f"== {escenario}: {ms:.0f} ms (presupuesto {presupuesto_ms * options['holgura']:.0f}), "
+                              f"RSS {mb:.1f} MB (presupuesto {presupuesto_mb * options['holgura']:.0f})")
+            for paquete, us in top:
+                self.stdout.write(f"  {paquete:<28}{us / 1000:>9.1f} ms")
+
+            if ms > presupuesto_ms * options["holgura"]:
+                fallos.append(f"{escenario}: arranque {ms:.0f} ms > {presupuesto_ms * options['holgura']:.0f} ms")
+            if mb > presupuesto_mb * options["holgura"]:
+                fallos.append(f"{escenario}: RSS {mb:.1f} MB > {presupuesto_mb * options['holgura']:.0f} MB")
+            if escenario == "html" and muestras[0]["pesados"]:
+                fallos.append(f"html: se importan al arrancar {', '.join(muestras[0]['pesados'])}")
+
+        if options["salida"]:
+            with open(options["salida"], "w", encoding="utf-8") as fh:
+                json.dump(resultados, fh, indent=2, ensure_ascii=False)
+
+        if fallos:
+            for f in fallos:
+                self.stderr.write(f"FUERA DE PRESUPUESTO {f}")
+            raise CommandError(f"{len(fallos)} presupuestos de arranque superados.")
+        self.stdout.write(self.style.SUCCESS("Arranque dentro del presupuesto."))
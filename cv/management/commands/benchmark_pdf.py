@@ -0,0 +1,190 @@
+import io
+import itertools
+import json
+import os
+import platform
+import re
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+
+import PIL
+import reportlab
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from cv import sinteticos
+from cv.pdf import render_hoja_vida
+from cv.views import SECCIONES_PDF
+
+BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "benchmarks", "baseline_pdf.json")
+
+# (ítems por sección, imágenes en la galería). El juego completo incluye los
+# rápidos para que un solo baseline sirva a los dos modos.
+ESCENARIOS_RAPIDOS = [(0, 0), (10, 4)]
+ESCENARIOS = ESCENARIOS_RAPIDOS + [(10, 0), (50, 20), (200, 50), (500, 0), (500, 200)]
+
+
+def _combinaciones(modo):
+    if modo == "todas":
+        return [c for n in range(len(SECCIONES_PDF) + 1) for c in itertools.combinations(SECCIONES_PDF, n)]
+    # ninguna, cada sección sola y todas juntas
+    return [()] + [(s,) for s in SECCIONES_PDF] + [SECCIONES_PDF]
+
+
+def clave(n_items, n_imagenes, secciones):
+    return f"items={n_items},imagenes={n_imagenes},secciones={'+'.join(secciones) or '-'}"
+
+
+def _reiniciar_pico_rss():
+    # Linux: escribir 5 en clear_refs reinicia VmHWM (pico de RSS) del proceso
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _pico_rss():
+    try:
+        with open("/proc/self/status") as fh:
+            for linea in fh:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(ordenados) - 1)
+    return ordenados[f] + (ordenados[c] - ordenados[f]) * (k - f)
+
+
+def comparar(resultados, baseline, tolerancia, margen_ms=5.0):
+    """
+    Lista de regresiones (textos) contra el baseline: p50 o tamaño por encima
+    de la tolerancia, número de páginas distinto (cambio de layout) o un
+    escenario que el baseline no tiene (no se puede dar por bueno).
+    `margen_ms` evita falsos positivos en renders de pocos milisegundos.
+    """
+    regresiones = []
+    for nombre, actual in resultados["escenarios"].items():
+        base = baseline.get("escenarios", {}).get(nombre)
+        if not base:
+            regresiones.append(f"{nombre}: no está en el baseline; regenéralo con --guardar-baseline")
+            continue
+        if actual["p50_ms"] > max(base["p50_ms"] * (1 + tolerancia), base["p50_ms"] + margen_ms):
+            regresiones.append(f"{nombre}: p50 {base['p50_ms']:.1f} -> {actual['p50_ms']:.1f} ms")
+        if actual["bytes"] > base["bytes"] * (1 + tolerancia):
+            regresiones.append(f"{nombre}: tamaño {base['bytes']} -> {actual['bytes']} bytes")
+        if actual["paginas"] != base["paginas"]:
+            regresiones.append(f"{nombre}: páginas {base['paginas']} -> {actual['paginas']}")
+    return regresiones
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark del generador de PDF con perfiles sintéticos (0-500 ítems por sección, "
+        "0-200 imágenes): percentiles de latencia, pico de RSS, tamaño y páginas por "
+        "combinación de secciones; compara contra un baseline JSON. No deja datos en la BD "
+        "(los derivados de imagen se generan en el acto, no en on_commit)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=5)
+        parser.add_argument("--combinaciones", choices=["basicas", "todas"], default="basicas")
+        parser.add_argument("--rapido", action="store_true", help="Solo escenarios pequeños (CI).")
+        parser.add_argument("--semilla", type=int, default=2024)
+        parser.add_argument("--salida", default=None, help="JSON con los resultados.")
+        parser.add_argument("--baseline", default=BASELINE)
+        parser.add_argument("--tolerancia", type=float, default=0.25, help="Ej. 0.25 = 25%% peor que el baseline.")
+        parser.add_argument("--margen-ms", type=float, default=5.0, help="Diferencia mínima de p50 a reportar.")
+        parser.add_argument("--guardar-baseline", action="store_true", help="Escribe los resultados como baseline.")
+
+    def handle(self, *args, **options):
+        escenarios = ESCENARIOS_RAPIDOS if options["rapido"] else ESCENARIOS
+        combinaciones = _combinaciones(options["combinaciones"])
+        rng = sinteticos.semilla(options["semilla"])
+
+        resultados = {
+            "entorno": {
+                "python": platform.python_version(),
+                "reportlab": reportlab.Version,
+                "pillow": PIL.__version__,
+                "maquina": platform.machine(),
+                "cpus": os.cpu_count(),
+            },
+            "repeticiones": options["repeticiones"],
+            "escenarios": {},
+        }
+
+        # Media en un directorio temporal y todo dentro de una transacción que se deshace.
+        # Esa transacción nunca confirma, así que los derivados de imagen (on_commit) se
+        # generan en el acto con CV_DERIVADOS_SINCRONO: el PDF se mide como en producción.
+        media = tempfile.mkdtemp(prefix="cv-bench-")
+        storages = {
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": media}},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }
+        try:
+            with override_settings(STORAGES=storages, CV_DERIVADOS_SINCRONO=True):
+                with transaction.atomic():
+                    for i, (n_items, n_imagenes) in enumerate(escenarios):
+                        perfil = sinteticos.crear_perfil_completo(rng, 9_000_000_000 + i, n_items, n_imagenes)
+                        for secciones in combinaciones:
+                            nombre = clave(n_items, n_imagenes, secciones)
+                            resultados["escenarios"][nombre] = self._medir(perfil, secciones, options["repeticiones"])
+                            self.stdout.write(f"{nombre}: {resultados['escenarios'][nombre]}")
+                    transaction.set_rollback(True)
+        finally:
+            shutil.rmtree(media, ignore_errors=True)
+
+        if options["salida"]:
+            with open(options["salida"], "w", encoding="utf-8") as fh:
+                json.dump(resultados, fh, indent=2, ensure_ascii=False)
+
+        if options["guardar_baseline"]:
+            os.makedirs(os.path.dirname(options["baseline"]), exist_ok=True)
+            with open(options["baseline"], "w", encoding="utf-8") as fh:
+                json.dump(resultados, fh, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Baseline guardado en {options['baseline']}."))
+            return
+
+        if not os.path.exists(options["baseline"]):
+            self.stdout.write(self.style.WARNING("Sin baseline; usa --guardar-baseline para crearlo."))
+            return
+        with open(options["baseline"], encoding="utf-8") as fh:
+            regresiones = comparar(resultados, json.load(fh), options["tolerancia"], options["margen_ms"])
+        if regresiones:
+            for r in regresiones:
+                self.stderr.write(f"REGRESIÓN {r}")
+            raise CommandError(f"{len(regresiones)} regresiones contra el baseline.")
+        self.stdout.write(self.style.SUCCESS("Sin regresiones contra el baseline."))
+
+    def _medir(self, perfil, secciones, repeticiones):
+        tiempos = []
+        pdf = b""
+        _reiniciar_pico_rss()
+        for _ in range(repeticiones):
+            buffer = io.BytesIO()
+            inicio = time.perf_counter()
+            render_hoja_vida(perfil, secciones, buffer)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            pdf = buffer.getvalue()
+        return {
+            "p50_ms": round(_percentil(tiempos, 50), 1),
+            "p90_ms": round(_percentil(tiempos, 90), 1),
+            "p99_ms": round(_percentil(tiempos, 99), 1),
+            "media_ms": round(statistics.fmean(tiempos), 1),
+            "pico_rss_mb": round(_pico_rss() / 2**20, 1),
+            "bytes": len(pdf),
+            "paginas": len(re.findall(rb"/Type\s*/Page[^s]", pdf)),
+        }
@@ -0,0 +1,29 @@
+from django.contrib.staticfiles.management.commands.collectstatic import Command as CollectstaticCommand
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+class Command(CollectstaticCommand):
+    """
+    collectstatic de siempre, precedido por optimizar_estaticos para que el
+    CSS crítico y las fuentes entren en STATIC_ROOT (y en el manifest).
+    cv va antes de django.contrib.staticfiles en INSTALLED_APPS para que
+    este comando tenga prioridad.
+    """
+
+    help = CollectstaticCommand.help + " Antes genera el CSS crítico y las fuentes propias (optimizar_estaticos)."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--sin-optimizar", action="store_true", help="No ejecutar optimizar_estaticos.")
+
+    def handle(self, **options):
+        if not options["sin_optimizar"]:
+            # Sin red ya se las arregla solo (fuentes previas o Google Fonts); cualquier otro
+            # fallo rompe el deploy: mejor que publicar sin avisar un build a medias
+            try:
+                call_command("optimizar_estaticos", verbosity=options["verbosity"],
+                             stdout=self.stdout._out, stderr=self.stderr._out)
+            except Exception as exc:
+                raise CommandError(f"optimizar_estaticos falló: {exc}. Usa --sin-optimizar para saltarlo.") from exc
+        return super().handle(**options)
@@ -0,0 +1,62 @@
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cv import deduplicacion
+from cv.models import Blobmedia
+
+
+class Command(BaseCommand):
+    help = "Registra por hash los archivos ya subidos y une los duplicados en un solo blob."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Solo informar, sin cambiar nada.")
+
+    def handle(self, *args, **options):
+        # nombre -> [(model, campo), ...] y cuántas filas lo usan
+        usos = defaultdict(list)
+        cuentas = defaultdict(int)
+        for model in deduplicacion.modelos_con_archivos():
+            for campo in deduplicacion.campos_archivo(model):
+                filas = model.objects.exclude(**{campo: ""}).exclude(**{f"{campo}__isnull": True})
+                for nombre in filas.values_list(campo, flat=True):
+                    usos[nombre].append((model, campo))
+                    cuentas[nombre] += 1
+
+        por_hash = defaultdict(list)
+        for nombre in sorted(usos):
+            try:
+                with default_storage.open(nombre, "rb") as fh:
+                    por_hash[deduplicacion.sha256_de(fh)].append(nombre)
+            except Exception as exc:
+                self.stderr.write(f"Omitido {nombre}: {exc}")
+
+        duplicados = 0
+        for sha, nombres in por_hash.items():
+            canonico, repetidos = nombres[0], nombres[1:]
+            duplicados += len(repetidos)
+            if options["dry_run"]:
+                continue
+
+            with transaction.atomic():
+                for nombre in repetidos:
+                    for model, campo in set(usos[nombre]):
+                        model.objects.filter(**{campo: nombre}).update(**{campo: canonico})
+                Blobmedia.objects.update_or_create(
+                    sha256=sha,
+                    defaults={
+                        "nombre": canonico,
+                        "tamano": default_storage.size(canonico),
+                        "referencias": sum(cuentas[n] for n in nombres),
+                    },
+                )
+                # El archivo, sus derivados y su Imagenprocesada (se borran del storage al confirmar)
+                for nombre in repetidos:
+                    deduplicacion.descartar(nombre)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(por_hash)} archivos únicos, {duplicados} duplicados"
+            + (" (dry-run)." if options["dry_run"] else " unificados.")
+        ))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cv import exportacion
+from cv.models import Datospersonales
+from cv.views import SECCIONES_PDF
+
+
+class Command(BaseCommand):
+    help = "Exporta en un ZIP los PDFs de hoja de vida de todos los perfiles (o de los indicados)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("salida", help="Ruta del ZIP a escribir.")
+        parser.add_argument("--perfiles", type=int, nargs="+", help="idperfil a exportar (por defecto, todos).")
+        parser.add_argument("--secciones", nargs="+", choices=SECCIONES_PDF, default=list(SECCIONES_PDF))
+        parser.add_argument("--procesos", type=int, default=None,
+                            help="Procesos de render (0 = en este proceso; por defecto, CPUs).")
+
+    def handle(self, *args, **options):
+        perfiles = Datospersonales.objects.order_by("pk")
+        if options["perfiles"]:
+            perfiles = perfiles.filter(pk__in=options["perfiles"])
+        perfiles = list(perfiles)
+        if not perfiles:
+            raise CommandError("No hay perfiles que exportar.")
+
+        inicio = time.monotonic()
+        with open(options["salida"], "wb") as fh:
+            for trozo in exportacion.exportar_zip(perfiles, options["secciones"], options["procesos"]):
+                fh.write(trozo)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(perfiles)} PDFs en {options['salida']} ({time.monotonic() - inicio:.1f}s)."
+        ))
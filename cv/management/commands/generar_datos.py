@@ -0,0 +1,128 @@
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from cv import sinteticos
+from cv.models import Cursosrealizados, Datospersonales
+
+# Las cédulas sintéticas empiezan aquí (10 dígitos) para no pisar las reales
+CEDULA_BASE = 9_100_000_000
+
+
+def _rango(texto):
+    """
+    "5" -> (5, 5); "0-20" -> (0, 20).
+    """
+    try:
+        partes = [int(p) for p in texto.split("-", 1)]
+    except ValueError:
+        raise CommandError(f"Rango inválido: {texto}")
+    minimo, maximo = partes[0], partes[-1]
+    if minimo < 0 or maximo < minimo:
+        raise CommandError(f"Rango inválido: {texto}")
+    return minimo, maximo
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera perfiles sintéticos válidos con sus ítems, imágenes de certificado y PDFs "
+        "(bulk_create por lotes, reproducible con --semilla)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--perfiles", type=int, default=100)
+        parser.add_argument("--items", default="0-20", help="Ítems por sección y perfil: N o MIN-MAX.")
+        parser.add_argument("--imagenes", default="0-5", help="Imágenes de galería por perfil: N o MIN-MAX.")
+        parser.add_argument("--pdfs", type=float, default=0.2, help="Fracción de cursos con certificado PDF.")
+        parser.add_argument("--imagenes-distintas", type=int, default=40,
+                            help="Imágenes generadas una vez y reutilizadas (cada fila guarda su copia).")
+        parser.add_argument("--semilla", type=int, default=1)
+        parser.add_argument("--lote", type=int, default=500)
+        parser.add_argument("--sin-validar", action="store_true", help="No ejecutar full_clean (más rápido).")
+
+    def handle(self, *args, **options):
+        rng = sinteticos.semilla(options["semilla"])
+        items_min, items_max = _rango(options["items"])
+        imgs_min, imgs_max = _rango(options["imagenes"])
+        validar = not options["sin_validar"]
+        lote = options["lote"]
+
+        # Bytes de imágenes generados una sola vez: generar miles de fotos es lo más lento
+        muestras = [
+            (img.name.rsplit(".", 1)[1], img.read())
+            for img in (sinteticos.imagen_aleatoria(rng) for _ in range(max(options["imagenes_distintas"], 1)))
+        ]
+        pdf = sinteticos.pdf_minimo().read()
+
+        inicio_cedulas = self._primera_cedula_libre()
+        inicio = time.monotonic()
+        total_items = 0
+        total_archivos = 0
+
+        for desde in range(0, options["perfiles"], lote):
+            indices = range(inicio_cedulas + desde, inicio_cedulas + min(desde + lote, options["perfiles"]))
+            perfiles = [sinteticos.perfil(rng, i) for i in indices]
+            if validar:
+                self._validar(perfiles)
+
+            with transaction.atomic():
+                perfiles = Datospersonales.objects.bulk_create(perfiles)
+
+                filas = {}
+                for perfil in perfiles:
+                    n_items = rng.randint(items_min, items_max)
+                    por_modelo = sinteticos.items(rng, perfil, n_items)
+                    total_archivos += self._adjuntar_archivos(rng, por_modelo, rng.randint(imgs_min, imgs_max),
+                                                              muestras, pdf, options["pdfs"])
+                    for model, objs in por_modelo.items():
+                        filas.setdefault(model, []).extend(objs)
+
+                for model, objs in filas.items():
+                    if validar:
+                        self._validar(objs)
+                    model.objects.bulk_create(objs, batch_size=lote)
+                    total_items += len(objs)
+
+            self.stdout.write(f"{desde + len(perfiles)}/{options['perfiles']} perfiles...")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['perfiles']} perfiles, {total_items} ítems y {total_archivos} archivos "
+            f"en {time.monotonic() - inicio:.1f}s. Siguientes pasos opcionales: "
+            "deduplicar_medios y generar_derivados."
+        ))
+
+    def _primera_cedula_libre(self):
+        ultima = (
+            Datospersonales.objects.filter(numerocedula__gte=str(CEDULA_BASE))
+            .order_by("-numerocedula").values_list("numerocedula", flat=True).first()
+        )
+        return int(ultima) + 1 if ultima else CEDULA_BASE
+
+    def _adjuntar_archivos(self, rng, por_modelo, n_imagenes, muestras, pdf, fraccion_pdf):
+        """
+        Copias de las imágenes de muestra en los campos de galería y PDFs de
+        certificado en una fracción de los cursos. Se suben al storage
+        configurado en el bulk_create (FileField.pre_save).
+        """
+        def copia(rng, nombre):
+            ext, datos = rng.choice(muestras)
+            return ContentFile(datos, name=f"{nombre}.{ext}")
+
+        asignadas = sinteticos.repartir_imagenes(rng, por_modelo, n_imagenes, fabrica=copia)
+        certificados = 0
+        for obj in por_modelo.get(Cursosrealizados, []):
+            if rng.random() < fraccion_pdf:
+                obj.certificado_pdf = ContentFile(pdf, name="certificado.pdf")
+                certificados += 1
+        return asignadas + certificados
+
+    def _validar(self, objs):
+        for obj in objs:
+            try:
+                # Unicidad: garantizada por construcción (índices en nombres y cédulas)
+                obj.full_clean(validate_unique=False, validate_constraints=False)
+            except ValidationError as exc:
+                raise CommandError(f"Fila sintética inválida ({type(obj).__name__}): {exc}")
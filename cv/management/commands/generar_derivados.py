@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from cv import imagenes
+
+
+class Command(BaseCommand):
+    help = "Genera (o regenera) los derivados de todas las imágenes subidas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todas", action="store_true", help="Regenerar también las ya procesadas.")
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in imagenes.modelos_con_imagenes():
+            campos = imagenes.campos_imagen(model)
+            for instance in model.objects.only("pk", *campos).iterator():
+                nombres = (
+                    {getattr(instance, c).name for c in campos if getattr(instance, c)}
+                    if options["todas"]
+                    else imagenes.nombres_pendientes(instance)
+                )
+                for nombre in nombres:
+                    imagenes.generar_derivados(nombre)
+                    total += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Derivados generados para {total} imágenes."))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cv import importacion
+from cv.models import Datospersonales
+
+
+class Command(BaseCommand):
+    help = "Importa ítems del CV (cursos, experiencias, productos, ...) desde CSV o JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("seccion", choices=sorted(importacion.SECCIONES))
+        parser.add_argument("archivo")
+        parser.add_argument("--perfil", type=int, help="idperfil (por defecto, el perfil activo).")
+        parser.add_argument("--formato", choices=["csv", "json"], help="Por defecto, según la extensión.")
+        parser.add_argument("--lote", type=int, default=importacion.TAMANO_LOTE)
+        parser.add_argument("--dry-run", action="store_true", help="Solo validar.")
+
+    def handle(self, *args, **options):
+        if options["perfil"]:
+            perfil = Datospersonales.objects.filter(pk=options["perfil"]).first()
+        else:
+            perfil = Datospersonales.objects.filter(perfilactivo=True).order_by("-idperfil").first()
+        if not perfil:
+            raise CommandError("Perfil no encontrado.")
+
+        formato = options["formato"] or importacion.formato_de(options["archivo"])
+        with open(options["archivo"], encoding="utf-8-sig") as fh:
+            try:
+                filas = importacion.leer_filas(fh.read(), formato)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        resultado = importacion.importar(
+            importacion.SECCIONES[options["seccion"]], perfil, filas,
+            lote=options["lote"], dry_run=options["dry_run"],
+        )
+
+        for fila, mensaje in resultado.errores:
+            self.stderr.write(f"Fila {fila}: {mensaje}")
+        sufijo = " (dry-run, nada insertado)" if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{resultado}{sufijo}."))
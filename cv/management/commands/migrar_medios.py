@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from cv import deduplicacion
+from cv.models import Blobmedia, Imagenprocesada
+
+
+def _sha256(contenido):
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def nombres_referenciados():
+    """
+    {nombre: [(model, campo), ...]} de todos los FileField / ImageField,
+    más los derivados registrados (sin filas que actualizar).
+    """
+    usos = {}
+    for model in deduplicacion.modelos_con_archivos():
+        for campo in deduplicacion.campos_archivo(model):
+            filas = model.objects.exclude(**{campo: ""}).exclude(**{f"{campo}__isnull": True})
+            for nombre in filas.values_list(campo, flat=True).distinct():
+                usos.setdefault(nombre, []).append((model, campo))
+
+    for derivados in Imagenprocesada.objects.values_list("derivados", flat=True):
+        for nombre in (derivados or {}).values():
+            usos.setdefault(nombre, [])
+    return usos
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia todos los archivos referenciados por los modelos entre dos storages "
+        "de settings.STORAGES (en paralelo, reanudable y verificando checksum)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("origen", help="Alias en settings.STORAGES (ej. default).")
+        parser.add_argument("destino", help="Alias en settings.STORAGES.")
+        parser.add_argument("--hilos", type=int, default=8)
+        parser.add_argument("--reintentos", type=int, default=4)
+        parser.add_argument("--checkpoint", default=None, help="Archivo de progreso (JSON lines).")
+        parser.add_argument("--actualizar-bd", action="store_true",
+                            help="Si el destino cambia un nombre, actualizar las filas que lo usan.")
+
+    def handle(self, *args, **options):
+        try:
+            origen = storages[options["origen"]]
+            destino = storages[options["destino"]]
+        except Exception as exc:
+            raise CommandError(f"Storage no configurado: {exc}")
+
+        checkpoint = options["checkpoint"] or f".migrar_medios_{options['origen']}_{options['destino']}.jsonl"
+        hechos = self._leer_checkpoint(checkpoint)
+
+        usos = nombres_referenciados()
+        pendientes = [n for n in sorted(usos) if n not in hechos]
+        self.stdout.write(f"{len(usos)} archivos referenciados, {len(pendientes)} pendientes.")
+
+        lock = threading.Lock()
+        errores = []
+        copiados = 0
+        inicio = time.monotonic()
+
+        with open(checkpoint, "a", encoding="utf-8") as cp, ThreadPoolExecutor(max_workers=options["hilos"]) as pool:
+            futuros = {
+                pool.submit(self._copiar_con_reintentos, origen, destino, n, options["reintentos"]): n
+                for n in pendientes
+            }
+            for futuro in as_completed(futuros):
+                nombre = futuros[futuro]
+                try:
+                    nuevo, sha = futuro.result()
+                except Exception as exc:
+                    errores.append((nombre, str(exc)))
+                    self.stderr.write(f"ERROR {nombre}: {exc}")
+                    continue
+
+                with lock:
+                    cp.write(json.dumps({"nombre": nombre, "destino": nuevo, "sha256": sha}) + "\n")
+                    cp.flush()
+                    hechos[nombre] = nuevo
+                    copiados += 1
+
+        renombrados = {n: d for n, d in hechos.items() if d != n and n in usos}
+        if renombrados and options["actualizar_bd"]:
+            self._actualizar_bd(usos, renombrados)
+        elif renombrados:
+            self.stdout.write(self.style.WARNING(
+                f"{len(renombrados)} archivos cambiaron de nombre en destino; usa --actualizar-bd."
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Copiados {copiados} en {time.monotonic() - inicio:.1f}s; {len(errores)} errores."
+        ))
+        if errores:
+            raise CommandError("Hubo errores; vuelve a ejecutar para reintentar solo los pendientes.")
+
+    @transaction.atomic
+    def _actualizar_bd(self, usos, renombrados):
+        """
+        Cambia los nombres en los campos de archivo, en Blobmedia e
+        Imagenprocesada (también las rutas dentro de `derivados`), todo o nada.
+        """
+        for nombre, nuevo in renombrados.items():
+            for model, campo in usos[nombre]:
+                model.objects.filter(**{campo: nombre}).update(**{campo: nuevo})
+            Blobmedia.objects.filter(nombre=nombre).update(nombre=nuevo)
+            Imagenprocesada.objects.filter(nombre=nombre).update(nombre=nuevo)
+
+        for imagen in Imagenprocesada.objects.exclude(derivados={}).only("pk", "derivados"):
+            derivados = {clave: renombrados.get(n, n) for clave, n in imagen.derivados.items()}
+            if derivados != imagen.derivados:
+                Imagenprocesada.objects.filter(pk=imagen.pk).update(derivados=derivados)
+
+    def _leer_checkpoint(self, ruta):
+        hechos = {}
+        if os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as fh:
+                for linea in fh:
+                    try:
+                        dato = json.loads(linea)
+                    except ValueError:
+                        continue  # última línea a medio escribir
+                    hechos[dato["nombre"]] = dato["destino"]
+        return hechos
+
+    def _copiar_con_reintentos(self, origen, destino, nombre, reintentos):
+        espera = 0.5
+        for intento in range(reintentos + 1):
+            try:
+                return self._copiar(origen, destino, nombre)
+            except FileNotFoundError:
+                raise
+            except Exception:
+                if intento == reintentos:
+                    raise
+                time.sleep(espera)
+                espera *= 2
+
+    def _copiar(self, origen, destino, nombre):
+        with origen.open(nombre, "rb") as fh:
+            contenido = fh.read()
+        sha = _sha256(contenido)
+
+        if destino.exists(nombre):
+            with destino.open(nombre, "rb") as fh:
+                if _sha256(fh.read()) == sha:
+                    return nombre, sha
+            destino.delete(nombre)
+
+        nuevo = destino.save(nombre, ContentFile(contenido))
+        with destino.open(nuevo, "rb") as fh:
+            if _sha256(fh.read()) != sha:
+                destino.delete(nuevo)
+                raise IOError(f"Checksum distinto tras copiar {nombre}")
+        return nuevo, sha
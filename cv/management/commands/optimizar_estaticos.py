@@ -0,0 +1,73 @@
+import json
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from cv import estaticos, storage
+
+HOJAS = ("css/dashboard-pro.css",)
+
+
+class Command(BaseCommand):
+    help = (
+        "Paso de build (lo llama collectstatic): CSS crítico de las hojas según las clases que "
+        "usan las plantillas, y subconjuntos WOFF2 de la fuente (Google Fonts) servidos desde "
+        "nuestros estáticos. Sin red, conserva las fuentes ya bajadas o sigue sin ellas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hoja", action="append", default=None, help=f"Ruta static de la hoja (por defecto {HOJAS[0]}).")
+        parser.add_argument("--familia", default=getattr(settings, "CV_FUENTE_FAMILIA", "Inter"))
+        parser.add_argument("--subconjunto", action="append", default=None,
+                            help='Subconjuntos unicode-range de Google Fonts (por defecto "latin").')
+        parser.add_argument("--sin-fuentes", action="store_true", help="No bajar fuentes (la página las pide a Google Fonts).")
+        parser.add_argument("--destino", default=None, help="Directorio de salida (por defecto cv/static/cv/generado).")
+
+    def handle(self, *args, **options):
+        destino = options["destino"] or str(estaticos.directorio())
+        usados = estaticos.usados_en_plantillas()
+
+        hojas, pesos = {}, {400}
+        for hoja in options["hoja"] or HOJAS:
+            ruta = finders.find(hoja)
+            if not ruta:
+                raise CommandError(f"No se encuentra la hoja {hoja} en los estáticos.")
+            with open(ruta, encoding="utf-8") as fh:
+                texto = fh.read()
+            hojas[hoja] = estaticos.css_critico(texto, usados)
+            pesos.update(estaticos.pesos_de(texto))
+            self.stdout.write(f"{hoja}: {len(texto.encode())} -> {len(hojas[hoja].encode())} bytes críticos")
+
+        fuentes = []
+        if not options["sin_fuentes"]:
+            fuentes = self._fuentes(options, sorted(pesos), destino)
+
+        estaticos.guardar(hojas, fuentes, destino)
+        self.stdout.write(self.style.SUCCESS(f"CSS crítico y {len(fuentes)} fuentes en {destino}"))
+
+    def _fuentes(self, options, pesos, destino):
+        try:
+            fuentes = estaticos.descargar_fuentes(
+                options["familia"], pesos, options["subconjunto"] or ["latin"],
+                os.path.join(destino, "fuentes"), storage.sesion_http(),
+            )
+        except Exception as exc:
+            # El build no falla por la red: se reutilizan las fuentes de un build anterior
+            fuentes = self._fuentes_previas(destino)
+            self.stderr.write(f"No se pudieron bajar las fuentes ({exc}); se reutilizan {len(fuentes)} ya presentes.")
+            return fuentes
+        for f in fuentes:
+            tamano = os.path.getsize(os.path.join(destino, f["archivo"]))
+            self.stdout.write(f"{f['archivo']}: pesos {f['pesos'][0]}-{f['pesos'][1]}, {tamano} bytes")
+        return fuentes
+
+    @staticmethod
+    def _fuentes_previas(destino):
+        try:
+            with open(os.path.join(destino, "critico.json"), encoding="utf-8") as fh:
+                previas = json.load(fh)["fuentes"]
+        except (OSError, ValueError, KeyError):
+            return []
+        return [f for f in previas if os.path.exists(os.path.join(destino, f["archivo"]))]
@@ -0,0 +1,145 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from cv import carga
+from cv.models import Datospersonales
+
+APP_WSGI = "django_portfolio.wsgi:application"
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _args_gunicorn(config):
+    """
+    "workers=4,threads=2,worker-class=gthread" -> ["--workers", "4", ...].
+    """
+    args = []
+    for par in filter(None, config.split(",")):
+        if "=" not in par:
+            raise CommandError(f"Configuración de gunicorn inválida: {par} (usa clave=valor)")
+        clave, valor = par.split("=", 1)
+        args += [f"--{clave.strip().replace('_', '-')}", valor.strip()]
+    return args
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga con mezclas de tráfico ponderadas (dashboard, secciones, PDFs con "
+        "flags aleatorios): rps, percentiles y tasa de error por endpoint. Con --gunicorn "
+        "levanta y compara configuraciones de workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Servidor ya en marcha.")
+        parser.add_argument("--mezcla", choices=sorted(carga.MEZCLAS), default="navegacion")
+        parser.add_argument("--concurrencia", type=int, default=20, help="Usuarios virtuales.")
+        parser.add_argument("--duracion", type=float, default=30.0, help="Segundos por ejecución.")
+        parser.add_argument("--peticiones", type=int, default=None, help="Tope de peticiones por ejecución.")
+        parser.add_argument("--pausa", type=float, default=0.0, help="Pausa media entre peticiones de un usuario (s).")
+        parser.add_argument("--perfiles", type=int, default=0,
+                            help="Repartir el tráfico entre N perfiles (/cv/<slug>/) de la BD; 0 = perfil activo.")
+        parser.add_argument("--semilla", type=int, default=1)
+        parser.add_argument("--calentamiento", type=int, default=20, help="Peticiones previas no medidas.")
+        parser.add_argument("--gunicorn", action="append", default=[], metavar="CONFIG",
+                            help='Ej. "workers=4,threads=2,worker-class=gthread". Repetible para comparar.')
+        parser.add_argument("--salida", default=None, help="JSON con los resultados.")
+        parser.add_argument("--max-tasa-error", type=float, default=None,
+                            help="Falla si la tasa de error global la supera (ej. 0.01).")
+
+    def handle(self, *args, **options):
+        rutas = {nombre: reverse(nombre) for nombre in ("home", "imprimir_hoja_vida", *carga.SECCIONES)}
+        slugs = []
+        if options["perfiles"]:
+            slugs = list(
+                Datospersonales.objects.exclude(slug=None).order_by("pk")
+                .values_list("slug", flat=True)[:options["perfiles"]]
+            )
+            if not slugs:
+                raise CommandError("No hay perfiles con slug; ejecuta generar_datos primero.")
+
+        if options["gunicorn"]:
+            ejecuciones = [(config, lambda c=config: self._con_gunicorn(c, rutas, slugs, options))
+                           for config in options["gunicorn"]]
+        else:
+            ejecuciones = [(options["url"], lambda: self._medir(options["url"], rutas, slugs, options))]
+
+        resultados = {}
+        for nombre, ejecutar in ejecuciones:
+            self.stdout.write(f"== {nombre} ({options['mezcla']}, {options['concurrencia']} usuarios)")
+            resultados[nombre] = ejecutar()
+            self._imprimir(resultados[nombre])
+
+        if len(resultados) > 1:
+            self._comparar(resultados)
+
+        if options["salida"]:
+            with open(options["salida"], "w", encoding="utf-8") as fh:
+                json.dump({"opciones": {k: options[k] for k in ("mezcla", "concurrencia", "duracion", "peticiones",
+                                                               "pausa", "perfiles", "semilla")},
+                           "resultados": resultados}, fh, indent=2, ensure_ascii=False)
+
+        if options["max_tasa_error"] is not None:
+            peores = {n: r["tasa_error"] for n, r in resultados.items() if r["tasa_error"] > options["max_tasa_error"]}
+            if peores:
+                raise CommandError(f"Tasa de error por encima de {options['max_tasa_error']}: {peores}")
+
+    def _medir(self, base, rutas, slugs, options):
+        if not carga.esperar_servidor(base, timeout=5):
+            raise CommandError(f"No hay servidor escuchando en {base}.")
+        if options["calentamiento"]:
+            carga.ejecutar(base, carga.Trafico(options["mezcla"], rutas, slugs, semilla=options["semilla"] + 1),
+                           concurrencia=1, duracion=60, peticiones=options["calentamiento"])
+        # Misma semilla en cada ejecución: todas las configuraciones reciben la misma secuencia
+        trafico = carga.Trafico(options["mezcla"], rutas, slugs, semilla=options["semilla"])
+        return carga.ejecutar(base, trafico, options["concurrencia"], options["duracion"],
+                              options["peticiones"], options["pausa"])
+
+    def _con_gunicorn(self, config, rutas, slugs, options):
+        puerto = _puerto_libre()
+        base = f"http://127.0.0.1:{puerto}"
+        comando = [sys.executable, "-m", "gunicorn", APP_WSGI, "--bind", f"127.0.0.1:{puerto}",
+                   "--log-level", "warning", *_args_gunicorn(config)]
+        proceso = subprocess.Popen(comando, cwd=settings.BASE_DIR, env=os.environ.copy())
+        try:
+            if not carga.esperar_servidor(base, timeout=60) or proceso.poll() is not None:
+                raise CommandError(f"gunicorn no arrancó con: {' '.join(comando)}")
+            return self._medir(base, rutas, slugs, options)
+        finally:
+            proceso.send_signal(signal.SIGTERM)
+            try:
+                proceso.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+
+    def _imprimir(self, r):
+        self.stdout.write(
+            f"{r['peticiones']} peticiones en {r['duracion_s']}s: {r['rps']} rps, "
+            f"p50 {r['p50_ms']} ms, p99 {r['p99_ms']} ms, errores {r['tasa_error']:.2%}, {r['mb_recibidos']} MB"
+        )
+        self.stdout.write(f"  {'endpoint':<22}{'n':>7}{'rps':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'error':>8}")
+        for endpoint, e in r["endpoints"].items():
+            self.stdout.write(
+                f"  {endpoint:<22}{e['peticiones']:>7}{e['rps']:>8}{e['p50_ms']:>9}"
+                f"{e['p90_ms']:>9}{e['p99_ms']:>9}{e['tasa_error']:>8.2%}"
+            )
+
+    def _comparar(self, resultados):
+        mejor = max(resultados, key=lambda n: (resultados[n]["tasa_error"] == 0, resultados[n]["rps"]))
+        self.stdout.write("== Comparación")
+        for nombre, r in sorted(resultados.items(), key=lambda x: -x[1]["rps"]):
+            marca = "  <- mejor" if nombre == mejor else ""
+            self.stdout.write(
+                f"  {nombre:<45}{r['rps']:>8} rps  p99 {r['p99_ms']:>8} ms  errores {r['tasa_error']:.2%}{marca}"
+            )
@@ -0,0 +1,143 @@
+"""
+Medición por request: consultas SQL, tiempo en BD, en plantillas y en la vista.
+
+La medición en curso vive en un ContextVar (un request por hilo / tarea),
+así los wrappers de BD y de plantillas no necesitan recibir el request.
+"""
+import contextvars
+import time
+
+from django.conf import settings
+
+_actual = contextvars.ContextVar("cv_medicion", default=None)
+
+# Tope de SQL guardado por request (solo se usa para el log de requests lentos)
+MAX_SQL = 200
+
+
+def ajuste(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+class Medicion:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.db = 0.0
+        self.plantillas = 0.0
+        self.vista = 0.0
+        self.sql = []  # [(segundos, sql)]
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.inicio
+
+    def server_timing(self):
+        total = self.total
+        partes = [
+            f'db;dur={self.db * 1000:.1f};desc="{self.consultas} consultas"',
+            f"tpl;dur={self.plantillas * 1000:.1f}",
+            f"view;dur={self.vista * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ]
+        return ", ".join(partes)
+
+    def como_dict(self):
+        return {
+            "consultas": self.consultas,
+            "db_ms": round(self.db * 1000, 1),
+            "tpl_ms": round(self.plantillas * 1000, 1),
+            "view_ms": round(self.vista * 1000, 1),
+            "total_ms": round(self.total * 1000, 1),
+        }
+
+
+def actual():
+    return _actual.get()
+
+
+def iniciar():
+    medicion = Medicion()
+    return medicion, _actual.set(medicion)
+
+
+def terminar(token):
+    _actual.reset(token)
+
+
+# =========================
+# GANCHOS (BD / PLANTILLAS)
+# =========================
+def wrapper_sql(execute, sql, params, many, context):
+    medicion = _actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracion = time.perf_counter() - inicio
+        medicion.consultas += 1
+        medicion.db += duracion
+        if len(medicion.sql) < MAX_SQL:
+            medicion.sql.append((duracion, sql))
+
+
+def _instalar_wrapper(conexion):
+    if wrapper_sql not in conexion.execute_wrappers:
+        conexion.execute_wrappers.append(wrapper_sql)
+
+
+def _al_conectar(sender, connection, **kwargs):
+    _instalar_wrapper(connection)
+
+
+def instrumentar_bd():
+    """
+    Deja wrapper_sql fijo en cada conexión (las del hilo actual ya abiertas y
+    todas las que se abran después). Fuera de un request no mide nada (sin
+    Medicion en el ContextVar), y bajo ASGI cubre también las consultas del
+    ORM async, que corren en otro hilo con el contexto del request.
+    """
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(_al_conectar, dispatch_uid="cv_medicion_sql")
+    instrumentar_conexiones()
+
+
+def instrumentar_conexiones():
+    # Conexiones del hilo actual abiertas antes de instrumentar_bd() (barato: una búsqueda en lista)
+    from django.db import connections
+
+    for conexion in connections.all(initialized_only=True):
+        _instalar_wrapper(conexion)
+
+
+_plantillas_instrumentadas = False
+
+
+def instrumentar_plantillas():
+    """
+    Envuelve el render de las plantillas del backend de Django (una vez por
+    proceso). Solo mide el render de nivel superior: los {% include %} ya
+    quedan dentro de ese tiempo.
+    """
+    global _plantillas_instrumentadas
+    if _plantillas_instrumentadas:
+        return
+    from django.template.backends.django import Template
+
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        medicion = _actual.get()
+        if medicion is None:
+            return original(self, context, request)
+        inicio = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            medicion.plantillas += time.perf_counter() - inicio
+
+    Template.render = render
+    _plantillas_instrumentadas = True
@@ -0,0 +1,312 @@
+"""
+Métricas en formato de exposición de Prometheus, sin servicios externos.
+
+Cada proceso (worker de gunicorn, etc.) acumula en memoria y vuelca su
+estado a `<CV_METRICAS_DIR>/<pid>.json` como mucho una vez por
+CV_METRICAS_INTERVALO segundos. /metrics suma los archivos de todos los
+procesos: contadores e histogramas se suman (también los de workers ya
+muertos, como en el modo multiproceso de prometheus_client); los gauges
+de memoria solo se muestran para procesos vivos.
+
+Los archivos de procesos muertos se funden en uno solo (muertos.json) al
+leer: con max_requests los workers se reciclan sin parar y el directorio
+no crece con cada uno. Si el sistema reutiliza el pid de un muerto, el
+nuevo proceso funde el archivo viejo antes de escribir el suyo: los
+contadores nunca retroceden.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: runserver, un solo proceso
+    fcntl = None
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_PDF_SEGUNDOS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+BUCKETS_PDF_BYTES = (16e3, 64e3, 256e3, 1e6, 4e6, 16e6, 64e6)
+
+# nombre -> (tipo, ayuda, buckets)
+METRICAS = {
+    "cv_http_request_duration_seconds": ("histogram", "Latencia de requests por vista.", BUCKETS_LATENCIA),
+    "cv_db_consultas_total": ("counter", "Consultas SQL ejecutadas, por vista.", None),
+    "cv_pdf_render_seconds": ("histogram", "Duración del render del PDF (sin cache).", BUCKETS_PDF_SEGUNDOS),
+    "cv_pdf_bytes": ("histogram", "Tamaño de los PDF generados.", BUCKETS_PDF_BYTES),
+    "cv_pdf_cache_total": ("counter", "PDF servidos desde cache (hit) o renderizados (miss).", None),
+    "cv_cache_total": ("counter", "Lecturas de la cache en dos niveles: l1, l2, fallo o espera (estampida).", None),
+    "cv_media_cache_total": ("counter", "Lecturas de media en la cache local de disco.", None),
+    "cv_proceso_memoria_rss_bytes": ("gauge", "Memoria residente de cada proceso vivo.", None),
+}
+
+_lock = threading.Lock()
+_contadores = {}    # (nombre, etiquetas_json) -> valor
+_histogramas = {}   # (nombre, etiquetas_json) -> {"buckets": [...], "sum": x, "count": n}
+_ultimo_volcado = 0.0
+_proceso = (None, None)   # (pid, identificador) del proceso actual
+_pid_comprobado = None    # pid cuyo archivo previo ya se revisó
+
+ARCHIVO_MUERTOS = "muertos.json"
+
+
+def _directorio():
+    directorio = getattr(settings, "CV_METRICAS_DIR", None) or os.path.join(tempfile.gettempdir(), "cv-metricas")
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _etiquetas(etiquetas):
+    return json.dumps(sorted((etiquetas or {}).items()))
+
+
+# =========================
+# REGISTRO
+# =========================
+def incrementar(nombre, etiquetas=None, n=1):
+    clave = (nombre, _etiquetas(etiquetas))
+    with _lock:
+        _contadores[clave] = _contadores.get(clave, 0) + n
+    _volcar_si_toca()
+
+
+def observar(nombre, valor, etiquetas=None):
+    buckets = METRICAS[nombre][2]
+    clave = (nombre, _etiquetas(etiquetas))
+    with _lock:
+        h = _histogramas.setdefault(clave, {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0})
+        for i, limite in enumerate(buckets):
+            if valor <= limite:
+                h["buckets"][i] += 1
+        h["sum"] += valor
+        h["count"] += 1
+    _volcar_si_toca()
+
+
+def _memoria_rss():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _id_proceso():
+    # Distingue este proceso de uno anterior con el mismo pid (y de su padre tras el fork)
+    global _proceso
+    pid = os.getpid()
+    if _proceso[0] != pid:
+        _proceso = (pid, f"{pid}-{time.time_ns()}")
+    return _proceso[1]
+
+
+def volcar():
+    """
+    Escribe el estado de este proceso (atómico: archivo temporal + replace).
+    """
+    global _ultimo_volcado, _pid_comprobado
+    with _lock:
+        datos = {
+            "pid": os.getpid(),
+            "proceso": _id_proceso(),
+            "memoria": _memoria_rss(),
+            "contadores": [[n, e, v] for (n, e), v in _contadores.items()],
+            "histogramas": [[n, e, h] for (n, e), h in _histogramas.items()],
+        }
+        _ultimo_volcado = time.monotonic()
+    directorio = _directorio()
+    ruta = os.path.join(directorio, f"{os.getpid()}.json")
+    if _pid_comprobado != datos["pid"]:
+        # Primer volcado: un archivo con nuestro pid es de un proceso muerto
+        previo = _leer(ruta)
+        if previo is not None and previo.get("proceso") != datos["proceso"]:
+            with _candado(directorio):
+                _fusionar(directorio, [ruta])
+        _pid_comprobado = datos["pid"]
+    _escribir(ruta, datos)
+
+
+def limpiar():
+    """
+    Borra los archivos de todos los procesos. Para el master de gunicorn al
+    arrancar: lo de un despliegue anterior no se suma al actual.
+    """
+    directorio = _directorio()
+    for archivo in os.listdir(directorio):
+        if archivo.endswith((".json", ".tmp")):
+            try:
+                os.remove(os.path.join(directorio, archivo))
+            except FileNotFoundError:
+                pass
+
+
+def reiniciar():
+    """
+    Vacía el estado de este proceso y borra su archivo. Para el master de
+    gunicorn tras calentar: los workers heredan su memoria al hacer fork y
+    no deben contar de nuevo lo que hizo el calentamiento.
+    """
+    global _ultimo_volcado
+    with _lock:
+        _contadores.clear()
+        _histogramas.clear()
+        _ultimo_volcado = 0.0
+    try:
+        os.remove(os.path.join(_directorio(), f"{os.getpid()}.json"))
+    except FileNotFoundError:
+        pass
+
+
+def _volcar_si_toca():
+    if time.monotonic() - _ultimo_volcado >= getattr(settings, "CV_METRICAS_INTERVALO", 1.0):
+        volcar()
+
+
+# =========================
+# EXPOSICIÓN
+# =========================
+def _vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def _candado(directorio):
+    """
+    Exclusión entre procesos para fundir archivos: dos lecturas de /metrics
+    a la vez no suman dos veces el mismo muerto.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directorio, ".candado"), "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _leer(ruta):
+    try:
+        with open(ruta, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir(ruta, datos):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(datos, fh)
+    os.replace(tmp, ruta)
+
+
+def _sumar(contadores, histogramas, datos):
+    for nombre, etiquetas, valor in datos["contadores"]:
+        contadores[(nombre, etiquetas)] = contadores.get((nombre, etiquetas), 0) + valor
+    for nombre, etiquetas, h in datos["histogramas"]:
+        total = histogramas.setdefault((nombre, etiquetas), {"buckets": [0] * len(h["buckets"]), "sum": 0.0, "count": 0})
+        total["buckets"] = [a + b for a, b in zip(total["buckets"], h["buckets"])]
+        total["sum"] += h["sum"]
+        total["count"] += h["count"]
+
+
+def _fusionar(directorio, rutas):
+    """
+    Suma los archivos `rutas` a muertos.json y los borra. Con el candado tomado.
+    """
+    agregado = os.path.join(directorio, ARCHIVO_MUERTOS)
+    contadores, histogramas = {}, {}
+    for ruta in [agregado] + rutas:
+        datos = _leer(ruta)
+        if datos is not None:
+            _sumar(contadores, histogramas, datos)
+    _escribir(agregado, {
+        "pid": None,
+        "memoria": 0,
+        "contadores": [[n, e, v] for (n, e), v in contadores.items()],
+        "histogramas": [[n, e, h] for (n, e), h in histogramas.items()],
+    })
+    for ruta in rutas:
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+
+def _leer_todos():
+    contadores, histogramas, memoria = {}, {}, {}
+    directorio = _directorio()
+    with _candado(directorio):
+        muertos = []
+        for archivo in os.listdir(directorio):
+            if not archivo.endswith(".json") or archivo == ARCHIVO_MUERTOS:
+                continue
+            ruta = os.path.join(directorio, archivo)
+            datos = _leer(ruta)
+            if datos is None:
+                continue
+            if _vivo(datos["pid"]):
+                _sumar(contadores, histogramas, datos)
+                memoria[datos["pid"]] = datos["memoria"]
+            else:
+                muertos.append(ruta)
+        if muertos:
+            _fusionar(directorio, muertos)
+        agregado = _leer(os.path.join(directorio, ARCHIVO_MUERTOS))
+        if agregado is not None:
+            _sumar(contadores, histogramas, agregado)
+    return contadores, histogramas, memoria
+
+
+def _formato_etiquetas(pares):
+    if not pares:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pares) + "}"
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exposicion():
+    """
+    Texto de /metrics (formato de exposición 0.0.4).
+    """
+    volcar()
+    contadores, histogramas, memoria = _leer_todos()
+
+    lineas = []
+    for nombre, (tipo, ayuda, buckets) in METRICAS.items():
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        if tipo == "counter":
+            for (n, etiquetas), valor in sorted(contadores.items()):
+                if n == nombre:
+                    lineas.append(f"{nombre}{_formato_etiquetas(json.loads(etiquetas))} {_numero(valor)}")
+        elif tipo == "histogram":
+            for (n, etiquetas), h in sorted(histogramas.items()):
+                if n != nombre:
+                    continue
+                pares = json.loads(etiquetas)
+                for limite, acumulado in zip(buckets, h["buckets"]):
+                    lineas.append(f"{nombre}_bucket{_formato_etiquetas(pares + [['le', _numero(float(limite))]])} {acumulado}")
+                lineas.append(f"{nombre}_bucket{_formato_etiquetas(pares + [['le', '+Inf']])} {h['count']}")
+                lineas.append(f"{nombre}_sum{_formato_etiquetas(pares)} {_numero(h['sum'])}")
+                lineas.append(f"{nombre}_count{_formato_etiquetas(pares)} {h['count']}")
+        elif nombre == "cv_proceso_memoria_rss_bytes":
+            for pid, valor in sorted(memoria.items()):
+                lineas.append(f'{nombre}{{pid="{pid}"}} {valor}')
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,265 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware as _WhiteNoiseMiddleware
+
+from . import medicion, metricas, perfilador
+
+logger = logging.getLogger("cv.medicion")
+
+# SQL más lentas que se vuelcan al log de un request lento
+SQL_EN_LOG = 10
+
+
+class MedicionMiddleware:
+    """
+    Cuenta consultas y mide BD / plantillas / vista / total de cada request.
+    Lo envía en la cabecera Server-Timing y en una línea JSON de log
+    (muestreada con CV_MEDICION_MUESTREO). Los requests que superan
+    CV_MEDICION_LENTO_MS siempre se registran, con sus SQL más lentas.
+
+    Va primero en MIDDLEWARE para que "total" cubra todo el stack. Sirve
+    igual bajo WSGI y ASGI (sin saltos de hilo en modo async).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = float(medicion.ajuste("CV_MEDICION_MUESTREO", 1.0))
+        self.lento_ms = float(medicion.ajuste("CV_MEDICION_LENTO_MS", 500))
+        medicion.instrumentar_plantillas()
+        medicion.instrumentar_bd()
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+            # Un process_view sync obligaría a Django a saltar a un hilo en cada request
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        medicion.instrumentar_conexiones()
+        m, token = medicion.iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            medicion.terminar(token)
+        return self._completar(request, response, m)
+
+    async def __acall__(self, request):
+        m, token = medicion.iniciar()
+        try:
+            response = await self.get_response(request)
+        finally:
+            medicion.terminar(token)
+        return self._completar(request, response, m)
+
+    def _completar(self, request, response, m):
+        if getattr(request, "_inicio_vista", None) is not None:
+            m.vista = time.perf_counter() - request._inicio_vista
+        # Se suma a lo que haya puesto la vista (ej. fases del PDF)
+        response["Server-Timing"] = ", ".join(filter(None, [m.server_timing(), response.get("Server-Timing")]))
+        self._registrar(request, response, m)
+        self._metricas(request, m)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # La vista incluye su BD y sus plantillas
+        request._inicio_vista = time.perf_counter()
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request._inicio_vista = time.perf_counter()
+
+    def _metricas(self, request, m):
+        match = getattr(request, "resolver_match", None)
+        etiquetas = {"vista": (match.url_name if match else None) or "sin_ruta"}
+        metricas.observar("cv_http_request_duration_seconds", m.total, etiquetas)
+        metricas.incrementar("cv_db_consultas_total", etiquetas, m.consultas)
+
+    def _registrar(self, request, response, m):
+        datos = m.como_dict()
+        lento = datos["total_ms"] >= self.lento_ms
+        if not lento and random.random() >= self.muestreo:
+            return
+
+        match = getattr(request, "resolver_match", None)
+        datos.update({
+            "metodo": request.method,
+            "ruta": request.path,
+            "vista": match.view_name if match else None,
+            "status": response.status_code,
+        })
+        if lento:
+            datos["sql"] = [
+                {"ms": round(segundos * 1000, 1), "sql": sql}
+                for segundos, sql in sorted(m.sql, key=lambda x: x[0], reverse=True)[:SQL_EN_LOG]
+            ]
+            logger.warning("request lento %s", json.dumps(datos, ensure_ascii=False))
+        else:
+            logger.info("request %s", json.dumps(datos, ensure_ascii=False))
+
+
+class PerfiladorMiddleware:
+    """
+    `?_profile=1` (solo staff) devuelve el perfil de cProfile del request
+    en vez de la respuesta; `&_formato=prof` lo da como archivo descargable.
+    Sin el parámetro solo cuesta buscar "_profile=" en el query string.
+
+    Va después de AuthenticationMiddleware (necesita request.user).
+
+    Bajo ASGI el request perfilado se atiende desde un hilo (cProfile mide
+    un solo hilo): entran el ORM y el PDF, no lo que corre en el event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _pedido(request):
+        return "_profile=" in request.META.get("QUERY_STRING", "") and request.GET.get("_profile") == "1"
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        if not self._pedido(request) or not (request.user.is_active and request.user.is_staff):
+            return self.get_response(request)
+        return self._perfilar(request, self.get_response)
+
+    async def __acall__(self, request):
+        if not self._pedido(request):
+            return await self.get_response(request)
+        usuario = await request.auser()
+        if not (usuario.is_active and usuario.is_staff):
+            return await self.get_response(request)
+        return await sync_to_async(self._perfilar)(request, async_to_sync(self.get_response))
+
+    def _perfilar(self, request, get_response):
+        request._perfilando = True
+
+        def atender():
+            response = get_response(request)
+            if response.streaming:
+                # El trabajo de una respuesta en streaming ocurre al consumirla
+                b"".join(response.streaming_content)
+            return response
+
+        _response, perfil = perfilador.perfilar(atender)
+
+        if request.GET.get("_formato") == "prof":
+            response = HttpResponse(perfilador.archivo_prof(perfil), content_type="application/octet-stream")
+            response["Content-Disposition"] = 'attachment; filename="request.prof"'
+            return response
+        return HttpResponse(perfilador.html_reporte(perfil, request.get_full_path()))
+
+
+class CacheControlMiddleware:
+    """
+    Cabeceras Cache-Control / Vary por ruta (url_name), según
+    settings.CV_CACHE_CONTROL. Las rutas sin entrada van como
+    "private, no-cache": solo el navegador guarda, y revalida siempre.
+
+    Nunca se cachean (private, no-store) el admin, los requests perfilados
+    (?_profile, contenido de staff) ni las respuestas que ponen cookies o
+    varían por Cookie / Authorization aunque su ruta tenga política pública.
+    Solo las respuestas 200 a GET/HEAD usan la política de su ruta (las
+    rutas no-store lo son con cualquier estado); si la vista ya puso
+    Cache-Control, se respeta.
+
+    Va antes de SessionMiddleware: así ve el Vary: Cookie que añade la sesión.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    NO_CACHE = {"private": True, "no_cache": True}
+    NO_STORE = {"private": True, "no_store": True}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.politicas = getattr(settings, "CV_CACHE_CONTROL", {})
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        return self._aplicar(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._aplicar(request, await self.get_response(request))
+
+    def _politica(self, request, response):
+        match = getattr(request, "resolver_match", None)
+        if (match and "admin" in match.namespaces) or "_profile=" in request.META.get("QUERY_STRING", ""):
+            return self.NO_STORE
+        politica = self.politicas.get(match.url_name) if match else None
+        if politica and politica.get("no_store"):
+            return self.NO_STORE  # también en errores: un 403 de /metrics no se guarda
+        if politica is None or request.method not in ("GET", "HEAD") or response.status_code != 200:
+            return self.NO_CACHE
+        if politica.get("public") and (response.cookies or self._varia_por_usuario(response)):
+            return self.NO_STORE
+        return politica
+
+    @staticmethod
+    def _varia_por_usuario(response):
+        vary = {v.strip().lower() for v in response.get("Vary", "").split(",")}
+        return bool(vary & {"cookie", "authorization", "*"})
+
+    def _aplicar(self, request, response):
+        politica = self._politica(request, response)
+        if response.has_header("Cache-Control") and politica is not self.NO_STORE:
+            return response
+        if response.has_header("Cache-Control"):
+            del response["Cache-Control"]
+        directivas = {k: v for k, v in politica.items() if k != "vary"}
+        patch_cache_control(response, **directivas)
+        if politica.get("vary"):
+            patch_vary_headers(response, politica["vary"])
+        return response
+
+
+class WhiteNoiseMiddleware(_WhiteNoiseMiddleware):
+    """
+    WhiteNoise sin forzar el modo sync: la búsqueda del archivo estático es
+    en memoria, así que bajo ASGI no hace falta saltar a un hilo por request
+    (un middleware solo-sync pasaría todo el stack a un único hilo).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-19 02:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0018_remove_productosacademicos_nombrerecurso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Imagenprocesada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=255, unique=True)),
+                ('derivados', models.JSONField(blank=True, default=dict)),
+                ('error', models.CharField(blank=True, default='', max_length=200)),
+                ('procesado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'IMAGENESPROCESADAS',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-19 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0019_imagenprocesada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagenprocesada',
+            name='alto',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='imagenprocesada',
+            name='ancho',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='imagenprocesada',
+            name='placeholder',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
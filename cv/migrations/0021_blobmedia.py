@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-19 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0020_imagenprocesada_medidas_placeholder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blobmedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('nombre', models.CharField(db_index=True, max_length=255)),
+                ('tamano', models.BigIntegerField(default=0)),
+                ('referencias', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'BLOBSMEDIA',
+            },
+        ),
+    ]
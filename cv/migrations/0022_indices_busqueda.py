@@ -0,0 +1,72 @@
+from django.db import migrations
+
+# Copia fija de los campos y del SQL al momento de esta migración: no depende
+# de cv/busqueda.py, que puede cambiar después.
+CAMPOS = {
+    "DATOSPERSONALES": ("idperfil", ("nombres", "apellidos", "numerocedula")),
+    "CURSOSREALIZADOS": ("idcursorealizado", ("nombrecurso", "entidadpatrocinadora")),
+    "EXPERIENCIALABORAL": ("idexperiencialaboral", ("cargodesempenado", "nombrempresa")),
+    "PRODUCTOSACADEMICOS": ("idproductoacademico", ("nombreproducto", "clasificador")),
+    "PRODUCTOSLABORALES": ("idproductolaboral", ("nombreproducto", "descripcion")),
+    "RECONOCIMIENTOS": ("idreconocimiento", ("entidadpatrocinadora", "descripcionreconocimiento")),
+    "VENTAGARAGE": ("idventagarage", ("nombreproducto", "descripcion")),
+}
+
+
+def sql_sqlite(tabla, pk, columnas):
+    fts = f"{tabla}_FTS"
+    cols = ", ".join(f'"{c}"' for c in columnas)
+    nuevos = ", ".join(f'new."{c}"' for c in columnas)
+    viejos = ", ".join(f'old."{c}"' for c in columnas)
+    return [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" USING fts5({cols}, '
+        f"content='{tabla}', content_rowid='{pk}', tokenize='trigram')",
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{tabla}" BEGIN '
+        f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new."{pk}", {nuevos}); END',
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{tabla}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old."{pk}", {viejos}); END',
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE ON "{tabla}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old."{pk}", {viejos}); '
+        f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new."{pk}", {nuevos}); END',
+        f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+    ]
+
+
+def crear(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for tabla, (_pk, columnas) in CAMPOS.items():
+            for col in columnas:
+                schema_editor.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{tabla.lower()}_{col}_trgm" '
+                    f'ON "{tabla}" USING gin ((UPPER("{col}"::text)) gin_trgm_ops)'
+                )
+    elif vendor == "sqlite":
+        for tabla, (pk, columnas) in CAMPOS.items():
+            for sql in sql_sqlite(tabla, pk, columnas):
+                schema_editor.execute(sql)
+
+
+def borrar(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for tabla, (_pk, columnas) in CAMPOS.items():
+        if vendor == "postgresql":
+            for col in columnas:
+                schema_editor.execute(f'DROP INDEX IF EXISTS "{tabla.lower()}_{col}_trgm"')
+        elif vendor == "sqlite":
+            fts = f"{tabla}_FTS"
+            for sufijo in ("ai", "ad", "au"):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{sufijo}"')
+            schema_editor.execute(f'DROP TABLE IF EXISTS "{fts}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0021_blobmedia'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, borrar),
+    ]
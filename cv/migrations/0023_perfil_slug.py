@@ -0,0 +1,60 @@
+# Generated by Django 5.1.5 on 2026-10-19 02:33
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# En SQLite, añadir un campo único reconstruye la tabla y se pierden los triggers
+# FTS de 0022: se recrean con una copia fija de su SQL (la tabla FTS sigue ahí).
+FTS = "DATOSPERSONALES_FTS"
+COLUMNAS = '"nombres", "apellidos", "numerocedula"'
+NUEVOS = 'new."nombres", new."apellidos", new."numerocedula"'
+VIEJOS = 'old."nombres", old."apellidos", old."numerocedula"'
+SQL_TRIGGERS = [
+    f'CREATE TRIGGER IF NOT EXISTS "{FTS}_ai" AFTER INSERT ON "DATOSPERSONALES" BEGIN '
+    f'INSERT INTO "{FTS}"(rowid, {COLUMNAS}) VALUES (new."idperfil", {NUEVOS}); END',
+    f'CREATE TRIGGER IF NOT EXISTS "{FTS}_ad" AFTER DELETE ON "DATOSPERSONALES" BEGIN '
+    f'INSERT INTO "{FTS}"("{FTS}", rowid, {COLUMNAS}) VALUES (\'delete\', old."idperfil", {VIEJOS}); END',
+    f'CREATE TRIGGER IF NOT EXISTS "{FTS}_au" AFTER UPDATE ON "DATOSPERSONALES" BEGIN '
+    f'INSERT INTO "{FTS}"("{FTS}", rowid, {COLUMNAS}) VALUES (\'delete\', old."idperfil", {VIEJOS}); '
+    f'INSERT INTO "{FTS}"(rowid, {COLUMNAS}) VALUES (new."idperfil", {NUEVOS}); END',
+    f'INSERT INTO "{FTS}"("{FTS}") VALUES (\'rebuild\')',
+]
+
+
+def rellenar_slugs(apps, schema_editor):
+    Datospersonales = apps.get_model("cv", "Datospersonales")
+    usados = set()
+    for perfil in Datospersonales.objects.order_by("idperfil"):
+        base = slugify(f"{perfil.nombres or ''} {perfil.apellidos or ''}")[:70].strip("-") or "perfil"
+        slug, n = base, 2
+        while slug in usados:
+            slug, n = f"{base}-{n}", n + 1
+        usados.add(slug)
+        Datospersonales.objects.filter(pk=perfil.pk).update(slug=slug)
+
+
+def recrear_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQL_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv', '0022_indices_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datospersonales',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=80, null=True, unique=True),
+        ),
+        migrations.RunPython(recrear_triggers, migrations.RunPython.noop),
+        migrations.RunPython(rellenar_slugs, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='datospersonales',
+            index=models.Index(condition=models.Q(('perfilactivo', True)), fields=['perfilactivo'], name='perfil_activo_idx'),
+        ),
+    ]
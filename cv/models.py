@@ -2,6 +2,7 @@
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
 from django.core.validators import (
     FileExtensionValidator,
     RegexValidator,
@@ -9,7 +10,8 @@ from django.core.validators import (
     MaxValueValidator,
     EmailValidator,
 )
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils.text import slugify
 
 
 # =========================
@@ -171,8 +173,15 @@ class Datospersonales(models.Model):
     # ✅ URL real
     sitioweb = models.URLField(max_length=200, blank=True, null=True)
 
+    # URL pública del perfil (/cv/<slug>/); se genera sola si queda vacía
+    slug = models.SlugField(max_length=80, unique=True, blank=True, null=True)
+
     class Meta:
         db_table = "DATOSPERSONALES"
+        indexes = [
+            # Solo indexa la(s) fila(s) activa(s): buscar el perfil activo no recorre la tabla
+            models.Index(fields=["perfilactivo"], condition=models.Q(perfilactivo=True), name="perfil_activo_idx"),
+        ]
 
     def clean(self):
         super().clean()
@@ -192,10 +201,35 @@ class Datospersonales(models.Model):
         if edad > 65:
             raise ValidationError({"fechanacimiento": "La edad no puede ser mayor a 65 años."})
 
+    INTENTOS_SLUG = 5
+
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        if self.perfilactivo:
-            Datospersonales.objects.exclude(pk=self.pk).update(perfilactivo=False)
+        slug_automatico = not self.slug
+        for intento in range(self.INTENTOS_SLUG):
+            if slug_automatico:
+                self.slug = self._slug_libre()
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                    if self.perfilactivo:
+                        # Solo toca las filas activas (normalmente una), no toda la tabla
+                        Datospersonales.objects.filter(perfilactivo=True).exclude(pk=self.pk).update(perfilactivo=False)
+                return
+            except IntegrityError:
+                # Otro guardado simultáneo se quedó con el mismo slug: se elige otro
+                tomado = Datospersonales.objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                if not (slug_automatico and tomado) or intento == self.INTENTOS_SLUG - 1:
+                    raise
+
+    def _slug_libre(self):
+        base = slugify(f"{self.nombres or ''} {self.apellidos or ''}")[:70].strip("-") or "perfil"
+        usados = set(
+            Datospersonales.objects.filter(slug__startswith=base).exclude(pk=self.pk).values_list("slug", flat=True)
+        )
+        slug, n = base, 2
+        while slug in usados:
+            slug, n = f"{base}-{n}", n + 1
+        return slug
 
     def __str__(self):
         return f"{self.nombres or ''} {self.apellidos or ''}".strip() or f"Perfil {self.idperfil}"
@@ -548,3 +582,64 @@ class Ventagarage(models.Model):
     def clean(self):
         super().clean()
         validar_no_antes_de_nacimiento(self.perfil, self.fecha, "fecha")
+
+
+# =========================
+# DERIVADOS DE IMÁGENES
+# =========================
+class Imagenprocesada(models.Model):
+    """
+    Registro de los derivados generados para una imagen subida
+    (miniatura, miniatura 2x, WebP y JPEG listo para el PDF).
+    """
+
+    nombre = models.CharField(max_length=255, unique=True)
+    derivados = models.JSONField(default=dict, blank=True)
+
+    # Medidas de la imagen ya orientada + vista previa diminuta (data URI)
+    ancho = models.PositiveIntegerField(blank=True, null=True)
+    alto = models.PositiveIntegerField(blank=True, null=True)
+    placeholder = models.TextField(blank=True, default="")
+
+    error = models.CharField(max_length=200, blank=True, default="")
+    procesado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "IMAGENESPROCESADAS"
+
+    def __str__(self):
+        return self.nombre
+
+    def url(self, clave):
+        nombre = self.derivados.get(clave)
+        return default_storage.url(nombre) if nombre else ""
+
+    def medidas(self, lado):
+        """
+        (ancho, alto) que tendrá el derivado de lado máximo `lado`.
+        """
+        if not self.ancho or not self.alto:
+            return None, None
+        escala = min(1.0, lado / max(self.ancho, self.alto))
+        return max(1, round(self.ancho * escala)), max(1, round(self.alto * escala))
+
+
+# =========================
+# ARCHIVOS DEDUPLICADOS
+# =========================
+class Blobmedia(models.Model):
+    """
+    Un archivo físico del storage identificado por su SHA-256.
+    `referencias` cuenta cuántos campos (FileField / ImageField) apuntan a él.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    nombre = models.CharField(max_length=255, db_index=True)
+    tamano = models.BigIntegerField(default=0)
+    referencias = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "BLOBSMEDIA"
+
+    def __str__(self):
+        return f"{self.nombre} ({self.referencias})"
@@ -0,0 +1,111 @@
+"""
+Perfilado bajo demanda (staff): `?_profile=1` en cualquier URL.
+
+- `?_profile=1`           -> árbol de llamadas en HTML + tiempos por librería
+- `?_profile=1&_formato=prof` -> archivo .prof descargable (pstats / snakeviz)
+"""
+import cProfile
+import html
+import io
+import marshal
+import pstats
+
+# Tiempo propio (tottime) agrupado por librería, según la ruta del archivo
+GRUPOS = (
+    ("reportlab", ("/reportlab/",)),
+    ("Pillow", ("/PIL/",)),
+    ("ORM / BD", ("/django/db/", "/sqlite3/", "/psycopg")),
+    ("Plantillas", ("/django/template/",)),
+)
+
+# Ramas por debajo de esta fracción del total no se muestran
+UMBRAL = 0.005
+MAX_PROFUNDIDAD = 40
+
+
+def perfilar(funcion, *args, **kwargs):
+    perfil = cProfile.Profile()
+    resultado = perfil.runcall(funcion, *args, **kwargs)
+    perfil.create_stats()
+    return resultado, perfil
+
+
+def archivo_prof(perfil):
+    return marshal.dumps(perfil.stats)
+
+
+def por_grupo(stats):
+    totales = {nombre: 0.0 for nombre, _ in GRUPOS}
+    totales["Otros"] = 0.0
+    for (archivo, _linea, _func), (_cc, _nc, tt, _ct, _callers) in stats.items():
+        ruta = archivo.replace("\\", "/")
+        for nombre, patrones in GRUPOS:
+            if any(p in ruta for p in patrones):
+                totales[nombre] += tt
+                break
+        else:
+            totales["Otros"] += tt
+    return totales
+
+
+def _nombre(func):
+    archivo, linea, nombre = func
+    if archivo == "~":
+        return nombre
+    return f"{nombre} ({'/'.join(archivo.replace(chr(92), '/').split('/')[-2:])}:{linea})"
+
+
+def _arbol(stats):
+    hijos = {}
+    raices = []
+    for func, (_cc, _nc, _tt, _ct, callers) in stats.items():
+        llamadores = [c for c in callers if c in stats]
+        if not llamadores:
+            raices.append(func)
+        for llamador in llamadores:
+            hijos.setdefault(llamador, []).append(func)
+    return raices, hijos
+
+
+def html_reporte(perfil, titulo):
+    stats = perfil.stats
+    total = max(sum(tt for _cc, _nc, tt, _ct, _c in stats.values()), 1e-9)
+    raices, hijos = _arbol(stats)
+
+    def nodo(func, camino, profundidad):
+        _cc, nc, tt, ct, _c = stats[func]
+        if ct / total < UMBRAL:
+            return ""
+        etiqueta = html.escape(f"{ct * 1000:.1f} ms ({ct / total:.0%}) · propio {tt * 1000:.1f} ms · {nc}× {_nombre(func)}")
+        ramas = ""
+        if profundidad < MAX_PROFUNDIDAD:
+            ramas = "".join(
+                nodo(h, camino | {h}, profundidad + 1)
+                for h in sorted(hijos.get(func, []), key=lambda f: stats[f][3], reverse=True)
+                if h not in camino
+            )
+        if not ramas:
+            return f"<li>{etiqueta}</li>"
+        abierto = " open" if ct / total > 0.1 else ""
+        return f"<li><details{abierto}><summary>{etiqueta}</summary><ul>{ramas}</ul></details></li>"
+
+    grupos = "".join(
+        f"<tr><td>{html.escape(n)}</td><td>{t * 1000:.1f} ms</td><td>{t / total:.0%}</td></tr>"
+        for n, t in sorted(por_grupo(stats).items(), key=lambda x: x[1], reverse=True)
+    )
+    top = io.StringIO()
+    pstats.Stats(perfil, stream=top).sort_stats("tottime").print_stats(25)
+    arbol = "".join(nodo(r, {r}, 0) for r in sorted(raices, key=lambda f: stats[f][3], reverse=True))
+
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'>"
+        f"<title>Perfil {html.escape(titulo)}</title>"
+        "<style>body{font:13px monospace;margin:1.5em}ul{list-style:none;padding-left:1.2em}"
+        "table{border-collapse:collapse}td{padding:2px 10px;border-bottom:1px solid #ddd}</style>"
+        f"</head><body><h1>{html.escape(titulo)}</h1>"
+        f"<p>Total: {total * 1000:.1f} ms</p>"
+        f"<h2>Por librería (tiempo propio)</h2><table>{grupos}</table>"
+        f"<h2>Árbol de llamadas</h2><ul>{arbol}</ul>"
+        f"<h2>Top 25 (tiempo propio)</h2><pre>{html.escape(top.getvalue())}</pre>"
+        "</body></html>"
+    )
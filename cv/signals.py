@@ -0,0 +1,68 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from . import cache as cache_cv
+from . import deduplicacion, imagenes
+from .models import Datospersonales
+from .visibilidad import MODELOS_SECCION
+
+
+# =========================
+# IMÁGENES: derivados al guardar
+# =========================
+def generar_derivados_al_guardar(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for nombre in imagenes.nombres_pendientes(instance):
+        imagenes.programar_derivados(nombre)
+
+
+# =========================
+# ARCHIVOS: deduplicación por hash
+# =========================
+def recordar_nombres(sender, instance, **kwargs):
+    deduplicacion.recordar_nombres(instance)
+
+
+def deduplicar_antes_de_guardar(sender, instance, raw=False, **kwargs):
+    if not raw:
+        deduplicacion.antes_de_guardar(instance)
+
+
+def registrar_despues_de_guardar(sender, instance, raw=False, **kwargs):
+    if not raw:
+        deduplicacion.despues_de_guardar(instance)
+
+
+def liberar_al_eliminar(sender, instance, **kwargs):
+    deduplicacion.al_eliminar(instance)
+
+
+# =========================
+# CACHE: invalidar el perfil al cambiar sus datos
+# =========================
+def invalidar_cache_perfil(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    perfil_id = instance.pk if sender is Datospersonales else instance.perfil_id
+    cache_cv.invalidar([perfil_id])
+
+
+def conectar():
+    for model in (Datospersonales,) + MODELOS_SECCION:
+        uid = model._meta.model_name
+        post_save.connect(invalidar_cache_perfil, sender=model, dispatch_uid=f"cv_cache_save_{uid}")
+        post_delete.connect(invalidar_cache_perfil, sender=model, dispatch_uid=f"cv_cache_del_{uid}")
+
+    for model in deduplicacion.modelos_con_archivos():
+        uid = model._meta.model_name
+        post_init.connect(recordar_nombres, sender=model, dispatch_uid=f"cv_dedup_init_{uid}")
+        pre_save.connect(deduplicar_antes_de_guardar, sender=model, dispatch_uid=f"cv_dedup_pre_{uid}")
+        post_save.connect(registrar_despues_de_guardar, sender=model, dispatch_uid=f"cv_dedup_post_{uid}")
+        post_delete.connect(liberar_al_eliminar, sender=model, dispatch_uid=f"cv_dedup_del_{uid}")
+
+    for model in imagenes.modelos_con_imagenes():
+        post_save.connect(
+            generar_derivados_al_guardar,
+            sender=model,
+            dispatch_uid=f"cv_derivados_{model._meta.model_name}",
+        )
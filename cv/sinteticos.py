@@ -0,0 +1,195 @@
+"""
+Datos sintéticos válidos (pasan validadores y restricciones únicas) para
+benchmarks y pruebas de carga. Todo sale de un `random.Random` con semilla:
+misma semilla, mismos datos.
+"""
+import io
+import itertools
+import random
+from datetime import date, timedelta
+
+from django.core.files.base import ContentFile
+from django.utils.text import slugify
+from PIL import Image, ImageDraw
+
+from .models import (
+    CLASIFICADOR_ACADEMICO_CHOICES,
+    Cursosrealizados,
+    Datospersonales,
+    Experiencialaboral,
+    Productosacademicos,
+    Productoslaborales,
+    Reconocimientos,
+    Ventagarage,
+)
+
+NOMBRES = ["Ana", "Luis", "María", "José", "Lucía", "Andrés", "Sofía", "Mateo", "Valeria", "Diego", "Camila", "Jostin"]
+APELLIDOS = ["Paz", "Mieles", "Zambrano", "Vera", "Cedeño", "Mendoza", "Loor", "Intriago", "Macías", "Alcívar"]
+PALABRAS = (
+    "gestión análisis desarrollo proyecto sistema datos redes seguridad diseño calidad "
+    "investigación docencia procesos logística ventas atención cliente software web"
+).split()
+
+# (ancho, alto, formato) de las imágenes de evidencia, de miniatura a foto de cámara
+TAMANOS_IMAGEN = [
+    (320, 240, "PNG"),
+    (800, 600, "JPEG"),
+    (1280, 960, "WEBP"),
+    (1600, 1200, "JPEG"),
+    (3000, 2000, "JPEG"),
+]
+EXTENSIONES = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+
+FECHA_MIN = date(2000, 1, 1)
+
+
+def texto(rng, palabras):
+    return " ".join(rng.choice(PALABRAS) for _ in range(palabras)).capitalize()
+
+
+def fecha_entre(rng, desde, hasta):
+    return desde + timedelta(days=rng.randint(0, max((hasta - desde).days, 0)))
+
+
+def imagen(rng, ancho, alto, formato, nombre="evidencia"):
+    """
+    Imagen con ruido + figuras (comprime como una foto real, no como un color plano).
+    """
+    ruido = Image.effect_noise((ancho, alto), rng.randint(20, 80))
+    color = Image.new("RGB", (ancho, alto), tuple(rng.randint(0, 255) for _ in range(3)))
+    img = Image.merge("RGB", (ruido, color.getchannel(1), color.getchannel(2)))
+    dibujo = ImageDraw.Draw(img)
+    for _ in range(6):
+        x, y = rng.randint(0, ancho - 1), rng.randint(0, alto - 1)
+        dibujo.rectangle((x, y, x + ancho // 4, y + alto // 4), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    buffer = io.BytesIO()
+    img.save(buffer, format=formato, quality=85)
+    return ContentFile(buffer.getvalue(), name=f"{nombre}.{EXTENSIONES[formato]}")
+
+
+def imagen_aleatoria(rng, nombre="evidencia"):
+    ancho, alto, formato = rng.choice(TAMANOS_IMAGEN)
+    return imagen(rng, ancho, alto, formato, nombre)
+
+
+def pdf_minimo(nombre="certificado"):
+    contenido = (
+        b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+        b"2 0 obj<</Type/Pages/Kids[]/Count 0>>endobj\ntrailer<</Root 1 0 R>>\n%%EOF\n"
+    )
+    return ContentFile(contenido, name=f"{nombre}.pdf")
+
+
+# =========================
+# FILAS (SIN GUARDAR)
+# =========================
+def perfil(rng, indice):
+    """
+    Datospersonales sin guardar. La cédula sale del índice (única y de 10 dígitos).
+    """
+    hoy = date.today()
+    nacimiento = date(hoy.year - rng.randint(25, 60), rng.randint(1, 12), rng.randint(1, 28))
+    nombres = rng.choice(NOMBRES)
+    apellidos = f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}"
+    return Datospersonales(
+        nombres=nombres,
+        apellidos=apellidos,
+        slug=slugify(f"{nombres} {apellidos} {indice}"),
+        fechanacimiento=nacimiento,
+        numerocedula=f"{indice:010d}",
+        descripcionperfil=texto(rng, 12),
+        nacionalidad="Ecuatoriana",
+        lugarnacimiento="Manta",
+        telefonofijo=f"05{rng.randint(1000000, 9999999)}",
+        direcciondomiciliaria=texto(rng, 4),
+        permitir_impresion=True,
+    )
+
+
+def _rango(rng, perfil):
+    # Fechas válidas: desde 2000, no antes de nacer, no futuras
+    desde = max(FECHA_MIN, perfil.fechanacimiento)
+    inicio = fecha_entre(rng, desde, date.today() - timedelta(days=30))
+    return inicio, fecha_entre(rng, inicio, date.today())
+
+
+def items(rng, perfil, n, desde=0):
+    """
+    {modelo: [instancias sin guardar]} con `n` filas por sección. El índice
+    (desde `desde`) va en el nombre, así las restricciones únicas nunca chocan.
+    """
+    filas = {m: [] for m in (Cursosrealizados, Experiencialaboral, Productosacademicos,
+                             Productoslaborales, Reconocimientos, Ventagarage)}
+    for i in range(desde, desde + n):
+        inicio, fin = _rango(rng, perfil)
+        filas[Cursosrealizados].append(Cursosrealizados(
+            perfil=perfil, nombrecurso=f"{texto(rng, 3)} {i}", fechainicio=inicio, fechafin=fin,
+            totalhoras=rng.randint(8, 200), descripcioncurso=texto(rng, 14)[:200],
+            entidadpatrocinadora=texto(rng, 2),
+        ))
+        inicio, fin = _rango(rng, perfil)
+        filas[Experiencialaboral].append(Experiencialaboral(
+            perfil=perfil, nombrempresa=f"{texto(rng, 2)} {i}", cargodesempenado=texto(rng, 2),
+            fechainicio=inicio, fechafin=fin, responsabilidades=texto(rng, 40),
+        ))
+        filas[Productosacademicos].append(Productosacademicos(
+            perfil=perfil, nombreproducto=f"{texto(rng, 4)} {i}",
+            clasificador=rng.choice(CLASIFICADOR_ACADEMICO_CHOICES)[0], descripcion=texto(rng, 30),
+        ))
+        filas[Productoslaborales].append(Productoslaborales(
+            perfil=perfil, nombreproducto=f"{texto(rng, 3)} {i}", fechaproducto=_rango(rng, perfil)[1],
+            descripcion=texto(rng, 30),
+        ))
+        filas[Reconocimientos].append(Reconocimientos(
+            perfil=perfil, tiporeconocimiento=rng.choice(Reconocimientos.TIPO_CHOICES)[0],
+            fechareconocimiento=_rango(rng, perfil)[1], entidadpatrocinadora=f"{texto(rng, 2)} {i}",
+            descripcionreconocimiento=texto(rng, 8)[:100],
+        ))
+        filas[Ventagarage].append(Ventagarage(
+            perfil=perfil, nombreproducto=f"{texto(rng, 2)} {i}", estadoproducto=rng.choice(["Bueno", "Regular"]),
+            fecha=_rango(rng, perfil)[1], valordelbien=rng.randint(1, 99999), descripcion=texto(rng, 12),
+        ))
+    return filas
+
+
+# Campos de imagen que aparecen en la galería del PDF, en orden de reparto
+CAMPOS_GALERIA = [
+    (Cursosrealizados, "certificado_imagen"),
+    (Experiencialaboral, "certificado_imagen"),
+    (Productosacademicos, "imagenproducto"),
+    (Productoslaborales, "imagenproducto"),
+    (Reconocimientos, "certificado_imagen"),
+    (Productosacademicos, "certificado_imagen"),
+    (Productoslaborales, "certificado_imagen"),
+]
+
+
+def repartir_imagenes(rng, filas, n, fabrica=imagen_aleatoria):
+    """
+    Asigna `n` imágenes distintas (tamaños y formatos variados) a los
+    campos de la galería. Devuelve cuántas pudo asignar.
+    `fabrica(rng, nombre)` crea cada archivo.
+    """
+    # Intercaladas entre secciones, para que todas tengan galería
+    por_campo = [[(obj, campo) for obj in filas.get(model, [])] for model, campo in CAMPOS_GALERIA]
+    huecos = [h for grupo in itertools.zip_longest(*por_campo) for h in grupo if h]
+    for i, (obj, campo) in enumerate(huecos[:n]):
+        setattr(obj, campo, fabrica(rng, f"evidencia_{i}"))
+    return min(n, len(huecos))
+
+
+def crear_perfil_completo(rng, indice, n_items=0, n_imagenes=0, lote=500):
+    """
+    Guarda un perfil con `n_items` por sección y `n_imagenes` en la galería.
+    """
+    p = perfil(rng, indice)
+    p.save()
+    filas = items(rng, p, n_items)
+    repartir_imagenes(rng, filas, n_imagenes)
+    for model, objs in filas.items():
+        model.objects.bulk_create(objs, batch_size=lote)
+    return p
+
+
+def semilla(valor):
+    return random.Random(valor)
@@ -0,0 +1,282 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils.module_loading import import_string
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+_sesion = None
+_sesion_lock = threading.Lock()
+
+
+def sesion_http():
+    """
+    Sesión requests compartida (keep-alive + pool) para bajar media remota.
+    """
+    global _sesion
+    if _sesion is None:
+        with _sesion_lock:
+            if _sesion is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                s = requests.Session()
+                adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=2)
+                s.mount("http://", adaptador)
+                s.mount("https://", adaptador)
+                _sesion = s
+    return _sesion
+
+
+def cerrar_sesion_http():
+    # Antes de un fork (gunicorn --preload): cada worker abre su propio pool de conexiones
+    global _sesion
+    with _sesion_lock:
+        if _sesion is not None:
+            _sesion.close()
+            _sesion = None
+
+
+# =========================
+# CACHE LOCAL (READ-THROUGH)
+# =========================
+class CacheLocalStorage(Storage):
+    """
+    Envuelve un storage remoto (Cloudinary u otro) y guarda en disco local
+    los archivos leídos recientemente, con tope de bytes y expulsión LRU.
+
+    Cada entrada guarda su nombre y tamaño; si no coinciden al leer,
+    la entrada se descarta y se vuelve a bajar. Una descarga cuyo tamaño no
+    es el del remoto no se cachea. Datos y metadatos se escriben con
+    archivo temporal + replace: otro worker nunca ve uno a medias.
+
+    El tamaño total se lleva en un contador por proceso; el directorio solo
+    se recorre (y se expulsa) al pasar el tope o cada `intervalo_recuento`
+    segundos, para enterarse de lo que escribieron otros workers.
+    """
+
+    def __init__(self, backend="cloudinary_storage.storage.MediaCloudinaryStorage", backend_options=None,
+                 directorio=None, max_bytes=512 * 1024 * 1024, http=True, intervalo_recuento=60):
+        self.backend = import_string(backend)(**(backend_options or {})) if isinstance(backend, str) else backend
+        self.directorio = str(directorio or os.path.join(tempfile.gettempdir(), "cv-media-cache"))
+        self.max_bytes = int(max_bytes)
+        self.http = http
+        self.intervalo_recuento = float(intervalo_recuento)
+        self.hits = 0
+        self.misses = 0
+        self._bytes = None  # estimación de lo que hay en disco (None: sin contar aún)
+        self._ultimo_recuento = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(self.directorio, exist_ok=True)
+
+    # ---------- entradas en disco ----------
+    def _rutas(self, name):
+        clave = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directorio, clave)
+        return base + ".bin", base + ".json"
+
+    def _tamano_valido(self, name):
+        """
+        Tamaño de la entrada si su nombre y tamaño cuadran con lo guardado; si no, None.
+        """
+        datos, meta = self._rutas(name)
+        try:
+            with open(meta, encoding="utf-8") as fh:
+                info = json.load(fh)
+            if info.get("name") == name and os.path.getsize(datos) == info.get("size"):
+                return info["size"]
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _leer_cache(self, name):
+        datos, _meta = self._rutas(name)
+        if self._tamano_valido(name) is None:
+            self._invalidar(name)
+            return None
+        try:
+            with open(datos, "rb") as fh:
+                contenido = fh.read()
+            os.utime(datos)  # marca de uso para el LRU
+            return contenido
+        except OSError:
+            return None
+
+    def _escribir_atomico(self, ruta, contenido):
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(contenido)
+            os.replace(tmp, ruta)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _escribir_cache(self, name, contenido):
+        datos, meta = self._rutas(name)
+        info = {"name": name, "size": len(contenido), "guardado": time.time()}
+        try:
+            self._escribir_atomico(datos, contenido)
+            self._escribir_atomico(meta, json.dumps(info).encode("utf-8"))
+        except OSError as exc:
+            logger.warning("No se pudo cachear %s: %s", name, exc)
+            return
+
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += len(contenido)
+            toca = (
+                self._bytes is None
+                or self._bytes > self.max_bytes
+                or time.monotonic() - self._ultimo_recuento >= self.intervalo_recuento
+            )
+        if toca:
+            self._expulsar()
+
+    def _invalidar(self, name):
+        for ruta in self._rutas(name):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+    def _expulsar(self):
+        entradas = []
+        total = 0
+        with os.scandir(self.directorio) as it:
+            for e in it:
+                if e.name.endswith(".bin"):
+                    st = e.stat()
+                    entradas.append((st.st_mtime, st.st_size, e.path))
+                    total += st.st_size
+        if total > self.max_bytes:
+            # Se baja al 90% del tope para no expulsar en cada escritura
+            objetivo = self.max_bytes * 0.9
+            for _mtime, tamano, ruta in sorted(entradas):
+                if total <= objetivo:
+                    break
+                for r in (ruta, ruta[:-4] + ".json"):
+                    try:
+                        os.remove(r)
+                    except FileNotFoundError:
+                        pass
+                total -= tamano
+
+        with self._lock:
+            self._bytes = total
+            self._ultimo_recuento = time.monotonic()
+
+    def _descargar(self, name):
+        """
+        (contenido, tamaño en el remoto o None si no se sabe).
+        """
+        if self.http:
+            url = self.backend.url(name)
+            if url.startswith(("http://", "https://")):
+                respuesta = sesion_http().get(url, timeout=20)
+                if respuesta.status_code == 404:
+                    raise FileNotFoundError(name)
+                respuesta.raise_for_status()
+                # Con gzip, Content-Length es el tamaño comprimido
+                largo = respuesta.headers.get("Content-Length")
+                comprimido = respuesta.headers.get("Content-Encoding", "identity") != "identity"
+                return respuesta.content, (int(largo) if largo and not comprimido else None)
+
+        with self.backend.open(name, "rb") as fh:
+            contenido = fh.read()
+        return contenido, self.backend.size(name)
+
+    # ---------- API de Storage ----------
+    def _open(self, name, mode="rb"):
+        if "w" in mode or "a" in mode or "+" in mode:
+            self._invalidar(name)
+            return self.backend.open(name, mode)
+
+        contenido = self._leer_cache(name)
+        if contenido is None:
+            self.misses += 1
+            metricas.incrementar("cv_media_cache_total", {"resultado": "miss"})
+            contenido, tamano = self._descargar(name)
+            if tamano is not None and tamano != len(contenido):
+                raise IOError(f"Descarga incompleta de {name}: {len(contenido)} de {tamano} bytes")
+            self._escribir_cache(name, contenido)
+        else:
+            self.hits += 1
+            metricas.incrementar("cv_media_cache_total", {"resultado": "hit"})
+
+        archivo = ContentFile(contenido, name=name)
+        archivo.mode = mode
+        return archivo
+
+    def save(self, name, content, max_length=None):
+        nombre = self.backend.save(name, content, max_length=max_length)
+        self._invalidar(nombre)
+        return nombre
+
+    def delete(self, name):
+        self._invalidar(name)
+        return self.backend.delete(name)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def size(self, name):
+        tamano = self._tamano_valido(name)
+        return tamano if tamano is not None else self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def get_available_name(self, name, max_length=None):
+        return self.backend.get_available_name(name, max_length=max_length)
+
+    def generate_filename(self, filename):
+        return self.backend.generate_filename(filename)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
+
+
+# =========================
+# STORAGE LENTO (PRUEBAS / DESARROLLO)
+# =========================
+class LatenciaStorage(FileSystemStorage):
+    """
+    FileSystemStorage que simula la latencia de un storage remoto.
+    """
+
+    def __init__(self, latencia=0.05, **kwargs):
+        self.latencia = latencia
+        self.lecturas = 0
+        super().__init__(**kwargs)
+
+    def _open(self, name, mode="rb"):
+        time.sleep(self.latencia)
+        self.lecturas += 1
+        return super()._open(name, mode)
+
+    def size(self, name):
+        time.sleep(self.latencia)
+        return super().size(name)
+
+    def exists(self, name):
+        time.sleep(self.latencia)
+        return super().exists(name)
@@ -0,0 +1,65 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from cv import estaticos
+
+register = template.Library()
+
+
+# Sin fuentes propias (sin build, o el build no pudo bajarlas): las de Google Fonts
+PESOS_GOOGLE = "300;400;500;600;700"
+
+
+def _google_fonts():
+    familia = getattr(settings, "CV_FUENTE_FAMILIA", "Inter")
+    return format_html(
+        '<link rel="preconnect" href="https://fonts.googleapis.com">'
+        '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+        '<link href="{}?family={}:wght@{}&display=swap" rel="stylesheet">',
+        estaticos.GOOGLE_CSS, familia.replace(" ", "+"), PESOS_GOOGLE,
+    )
+
+
+def _font_face(fuente):
+    return (
+        "@font-face{{font-family:'{}';font-style:{};font-weight:{};font-display:swap;"
+        "src:url({}) format('woff2');unicode-range:{}}}"
+    ).format(
+        fuente["familia"], fuente["estilo"], " ".join(str(p) for p in fuente["pesos"]),
+        static(f"{estaticos.RUTA_STATIC}/{fuente['archivo']}"), fuente["unicode_range"],
+    )
+
+
+@register.simple_tag
+def estilos_criticos(hoja):
+    """
+    Con el build hecho (optimizar_estaticos): precarga de las fuentes
+    propias, <style> con sus @font-face y el CSS crítico de `hoja`, y la
+    hoja completa cargada sin bloquear el render (noscript como respaldo).
+    Sin build, o si `hoja` no está en él: el <link> de siempre. Si no hay
+    fuentes propias, la familia se sigue pidiendo a Google Fonts.
+    """
+    if settings.DEBUG:
+        estaticos.cargar.cache_clear()
+    datos = estaticos.cargar()
+    url = static(hoja)
+    fuentes = (datos or {}).get("fuentes") or []
+    externas = "" if fuentes else _google_fonts()
+    if not datos or hoja not in datos["hojas"]:
+        return format_html('{}<link rel="stylesheet" href="{}">', externas, url)
+
+    precargas = format_html_join(
+        "", '<link rel="preload" href="{}" as="font" type="font/woff2" crossorigin>',
+        ((static(f"{estaticos.RUTA_STATIC}/{f['archivo']}"),) for f in fuentes),
+    )
+    # Lo generamos nosotros a partir de nuestras hojas: no lleva datos del usuario
+    css = "".join(_font_face(f) for f in fuentes) + datos["hojas"][hoja]
+    return format_html(
+        '{}{}<style>{}</style>'
+        '<link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        externas, precargas, mark_safe(css.replace("</", "<\\/")), url, url,
+    )
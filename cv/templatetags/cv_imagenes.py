@@ -0,0 +1,50 @@
+from django import template
+from django.utils.html import format_html
+
+from cv.imagenes import DERIVADOS
+
+register = template.Library()
+
+SIZES = "(max-width: 480px) 100vw, 400px"
+
+
+@register.simple_tag
+def imagen_card(item, campo, alt="", css_class=""):
+    """
+    <picture> con WebP + srcset (1x / 2x) a partir de los derivados.
+    Siempre diferida (loading="lazy"); con medidas explícitas y placeholder
+    cuando ya existen los derivados, para no mover el layout al cargar.
+    Si todavía no hay derivados, cae a la imagen original.
+    """
+    archivo = getattr(item, campo, None)
+    if not archivo or not archivo.name:
+        return ""
+
+    derivado = getattr(item, "derivados", {}).get(campo)
+    if not derivado:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="lazy" decoding="async">',
+            archivo.url, alt, css_class,
+        )
+
+    ancho, alto = derivado.medidas(DERIVADOS["thumb"][0])
+    ancho2x, _ = derivado.medidas(DERIVADOS["thumb2x"][0])
+    ancho_webp, _ = derivado.medidas(DERIVADOS["webp"][0])
+    medidas = format_html(' width="{}" height="{}"', ancho, alto) if ancho else ""
+    fondo = (
+        format_html(' style="background:url({}) center / cover no-repeat"', derivado.placeholder)
+        if derivado.placeholder else ""
+    )
+
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{} {}w" sizes="{}">'
+        '<img src="{}" srcset="{} {}w, {} {}w" sizes="{}" alt="{}" class="{}"{}{}'
+        ' loading="lazy" decoding="async">'
+        '</picture>',
+        derivado.url("webp"), ancho_webp or 800, SIZES,
+        derivado.url("thumb"),
+        derivado.url("thumb"), ancho or 400,
+        derivado.url("thumb2x"), ancho2x or 800,
+        SIZES, alt, css_class, medidas, fondo,
+    )
@@ -0,0 +1,16 @@
+from django import template
+from django.urls import reverse
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def url_perfil(context, nombre):
+    """
+    Como {% url %}, pero conserva el slug del perfil que se está viendo
+    (/cv/<slug>/...); en las rutas de la raíz queda la URL del perfil activo.
+    """
+    request = context.get("request")
+    match = getattr(request, "resolver_match", None)
+    slug = match.kwargs.get("slug") if match else None
+    return reverse(nombre, kwargs={"slug": slug}) if slug else reverse(nombre)
@@ -1,3 +1,1228 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from datetime import date
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from .models import Cursosrealizados, Datospersonales
+from .storage import CacheLocalStorage, LatenciaStorage
+
+
+def _crear_perfil(**kwargs):
+    datos = {
+        "nombres": "Ana",
+        "apellidos": "Paz",
+        "fechanacimiento": date(1990, 1, 1),
+        "numerocedula": "1234567890",
+        "perfilactivo": True,
+        "permitir_impresion": True,
+    }
+    datos.update(kwargs)
+    return Datospersonales.objects.create(**datos)
+
+
+class CacheLocalStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.origen = tempfile.mkdtemp()
+        self.cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.origen, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.cache, ignore_errors=True)
+        self.remoto = LatenciaStorage(latencia=0.01, location=self.origen)
+        self.storage = CacheLocalStorage(backend=self.remoto, directorio=self.cache, max_bytes=1000)
+
+    def test_segunda_lectura_no_toca_el_remoto(self):
+        nombre = self.storage.save("a.bin", ContentFile(b"x" * 100))
+        for _ in range(3):
+            with self.storage.open(nombre) as fh:
+                self.assertEqual(fh.read(), b"x" * 100)
+        self.assertEqual(self.remoto.lecturas, 1)
+        self.assertEqual((self.storage.hits, self.storage.misses), (2, 1))
+
+    def test_entrada_corrupta_se_vuelve_a_bajar(self):
+        nombre = self.storage.save("a.bin", ContentFile(b"x" * 100))
+        self.storage.open(nombre).read()
+        with open(self.storage._rutas(nombre)[0], "ab") as fh:
+            fh.write(b"basura")
+        self.assertEqual(self.storage.open(nombre).read(), b"x" * 100)
+        self.assertEqual(self.remoto.lecturas, 2)
+
+    def test_lru_respeta_el_tope(self):
+        for i in range(20):
+            nombre = self.storage.save(f"f{i}.bin", ContentFile(bytes([i]) * 100))
+            self.storage.open(nombre).read()
+        en_cache = [i for i in range(20) if self.storage._tamano_valido(f"f{i}.bin") is not None]
+        self.assertLessEqual(len(en_cache) * 100, 1000)
+        self.assertIn(19, en_cache)
+        self.assertNotIn(0, en_cache)
+
+    def test_no_recorre_el_directorio_en_cada_fallo(self):
+        from unittest import mock
+
+        for i in range(5):
+            self.storage.save(f"f{i}.bin", ContentFile(bytes([i]) * 10))
+        with mock.patch.object(self.storage, "_expulsar", wraps=self.storage._expulsar) as expulsar:
+            for i in range(5):
+                self.storage.open(f"f{i}.bin").read()
+        self.assertEqual(expulsar.call_count, 1)  # el primer recuento; luego basta el contador
+
+    def test_descarga_truncada_no_se_cachea(self):
+        from unittest import mock
+
+        nombre = self.storage.save("a.bin", ContentFile(b"x" * 100))
+        with mock.patch.object(self.remoto, "size", return_value=200):
+            with self.assertRaises(IOError):
+                self.storage.open(nombre)
+        self.assertIsNone(self.storage._tamano_valido(nombre))
+        self.assertEqual([a for a in os.listdir(self.cache) if a.endswith(".tmp")], [])
+
+
+class MigrarMediosTests(TestCase):
+    def setUp(self):
+        self.dir_a = tempfile.mkdtemp()
+        self.dir_b = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), "cp.jsonl")
+        for d in (self.dir_a, self.dir_b, os.path.dirname(self.checkpoint)):
+            self.addCleanup(shutil.rmtree, d, ignore_errors=True)
+
+        ajustes = override_settings(STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage",
+                        "OPTIONS": {"location": self.dir_a}},
+            "destino": {"BACKEND": "django.core.files.storage.FileSystemStorage",
+                        "OPTIONS": {"location": self.dir_b}},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        })
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        perfil = _crear_perfil()
+        for i in range(5):
+            Cursosrealizados.objects.create(
+                perfil=perfil, nombrecurso=f"Curso {i}",
+                fechainicio=date(2020, 1, 1), fechafin=date(2020, 2, 1),
+                certificado_pdf=ContentFile(f"%PDF-{i}".encode(), name=f"c{i}.pdf"),
+            )
+
+    def test_copia_todo_y_es_reanudable(self):
+        call_command("migrar_medios", "default", "destino", checkpoint=self.checkpoint, stdout=io.StringIO())
+        destino = storages["destino"]
+        for curso in Cursosrealizados.objects.all():
+            with destino.open(curso.certificado_pdf.name) as fh:
+                self.assertEqual(fh.read(), curso.certificado_pdf.read())
+
+        with open(self.checkpoint) as fh:
+            self.assertEqual(len(fh.readlines()), 5)
+
+        # Segunda pasada: nada pendiente, el checkpoint no crece
+        call_command("migrar_medios", "default", "destino", checkpoint=self.checkpoint, stdout=io.StringIO())
+        with open(self.checkpoint) as fh:
+            self.assertEqual(len(fh.readlines()), 5)
+
+    def test_actualizar_bd_renombra_blobs_y_derivados(self):
+        from unittest import mock
+
+        from .management.commands.migrar_medios import Command
+        from .models import Blobmedia, Imagenprocesada
+
+        curso = Cursosrealizados.objects.first()
+        nombre = curso.certificado_pdf.name
+        Blobmedia.objects.update_or_create(sha256="a" * 64, defaults={"nombre": nombre, "referencias": 1})
+        Imagenprocesada.objects.create(nombre=nombre, derivados={"thumb": "derivados/t.webp"})
+
+        # El destino guarda todo con otro nombre
+        with mock.patch.object(Command, "_copiar", lambda self, origen, destino, n: (f"nuevo/{n}", "sha")):
+            call_command("migrar_medios", "default", "destino", checkpoint=self.checkpoint,
+                         actualizar_bd=True, stdout=io.StringIO())
+
+        curso.refresh_from_db()
+        self.assertEqual(curso.certificado_pdf.name, f"nuevo/{nombre}")
+        self.assertEqual(Blobmedia.objects.get(sha256="a" * 64).nombre, f"nuevo/{nombre}")
+        imagen = Imagenprocesada.objects.get()
+        self.assertEqual(imagen.nombre, f"nuevo/{nombre}")
+        self.assertEqual(imagen.derivados, {"thumb": "nuevo/derivados/t.webp"})
+
+
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+class AdminChangelistQueriesTests(TestCase):
+    """
+    Los listados del admin hacen un número fijo de consultas por página,
+    sin importar cuántas filas haya (sin N+1 sobre perfil ni derivados).
+    """
+
+    MAX_CONSULTAS = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "clave-segura-123")
+        cls.perfiles = [_crear_perfil(numerocedula=f"{i:010d}", perfilactivo=False) for i in range(1, 4)]
+
+    def _crear_cursos(self, n, desde=0):
+        Cursosrealizados.objects.bulk_create([
+            Cursosrealizados(
+                perfil=self.perfiles[i % 3], nombrecurso=f"Curso {i}",
+                fechainicio=date(2020, 1, 1), fechafin=date(2020, 2, 1),
+                certificado_imagen=f"certificados/imagenes/c{i}.png",
+            )
+            for i in range(desde, desde + n)
+        ])
+
+    def _consultas(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_cursos_consultas_constantes(self):
+        url = "/admin/cv/cursosrealizados/"
+        self._crear_cursos(3)
+        pocas = self._consultas(url)
+        self._crear_cursos(60, desde=3)
+        muchas = self._consultas(url)
+        self.assertEqual(pocas, muchas)
+        self.assertLessEqual(muchas, self.MAX_CONSULTAS)
+
+    def test_todos_los_listados_dentro_del_presupuesto(self):
+        self._crear_cursos(30)
+        for modelo in ("cursosrealizados", "experiencialaboral", "productosacademicos",
+                       "productoslaborales", "reconocimientos", "ventagarage", "datospersonales"):
+            with self.subTest(modelo=modelo):
+                self.assertLessEqual(self._consultas(f"/admin/cv/{modelo}/"), self.MAX_CONSULTAS)
+
+    def test_busqueda_en_todos_los_admins(self):
+        self._crear_cursos(5)
+        for modelo in ("cursosrealizados", "experiencialaboral", "productosacademicos",
+                       "productoslaborales", "reconocimientos", "ventagarage", "datospersonales"):
+            for termino in ("curso", "a", "cur 3"):
+                with self.subTest(modelo=modelo, termino=termino):
+                    self._consultas(f"/admin/cv/{modelo}/?q={termino}")
+
+    def test_busqueda_fts_encuentra_subcadenas(self):
+        from .admin import CursosrealizadosAdmin
+        from django.contrib import admin as django_admin
+
+        self._crear_cursos(5)
+        Cursosrealizados.objects.filter(nombrecurso="Curso 2").update(entidadpatrocinadora="Universidad Técnica")
+        model_admin = CursosrealizadosAdmin(Cursosrealizados, django_admin.site)
+        qs, _ = model_admin.get_search_results(None, Cursosrealizados.objects.all(), "versidad")
+        self.assertEqual([c.nombrecurso for c in qs], ["Curso 2"])
+        qs, _ = model_admin.get_search_results(None, Cursosrealizados.objects.all(), "CURSO 4")
+        self.assertEqual([c.nombrecurso for c in qs], ["Curso 4"])
+
+    def test_tabla_fts_que_falta_no_queda_cacheada(self):
+        from django.db import connection
+
+        from .busqueda import _existe_fts, tabla_fts
+
+        self.assertFalse(_existe_fts("default", "PRUEBA"))
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE "{tabla_fts("PRUEBA")}" (x)')
+        self.assertTrue(_existe_fts("default", "PRUEBA"))
+
+    def test_triggers_fts_tras_migrar(self):
+        from django.core.management.base import CommandError
+        from django.db import connection
+
+        from .busqueda import comprobar_tras_migrar, tabla_fts, triggers_faltantes
+
+        self.assertEqual(triggers_faltantes(connection), [])
+
+        # Lo que deja una migración que reconstruye la tabla sin recrearlos
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER "{tabla_fts("DATOSPERSONALES")}_au"')
+        with self.assertRaisesMessage(CommandError, "DATOSPERSONALES_FTS_au"):
+            comprobar_tras_migrar(None, using="default")
+
+
+class ImportacionTests(TestCase):
+    def test_valida_por_lotes_sin_consultas_por_fila(self):
+        from . import importacion
+
+        perfil = _crear_perfil()
+        Cursosrealizados.objects.create(
+            perfil=perfil, nombrecurso="Existente", fechainicio=date(2020, 1, 1), fechafin=date(2020, 2, 1)
+        )
+        csv_texto = "nombrecurso,fechainicio,fechafin,totalhoras\n" + "".join(
+            f"Curso {i},2021-01-01,2021-02-01,{i + 1}\n" for i in range(200)
+        ) + (
+            "Existente,2020-01-01,2020-02-01,\n"   # choca con uq_curso_perfil_nombre_fechas
+            "Curso 0,2021-01-01,2021-02-01,\n"     # repetida dentro del archivo
+            "Antes,1980-01-01,1980-02-01,\n"       # antes de nacer / antes de 2000
+        )
+        filas = importacion.leer_filas(csv_texto, "csv")
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            resultado = importacion.importar(Cursosrealizados, perfil, filas, lote=100)
+        # Un único SELECT (claves existentes): ni perfil ni unicidad por fila
+        selects = [q for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(len(selects), 1)
+
+        self.assertEqual(resultado.creados, 200)
+        self.assertEqual([fila for fila, _ in resultado.errores], [201, 202, 203])
+        self.assertEqual(perfil.cursos.count(), 201)
+
+    def test_conteos_al_dia_tras_importar(self):
+        from . import importacion
+        from .views import _get_counts
+
+        perfil = _crear_perfil()
+        antes = _get_counts(perfil)["cursos"]
+        filas = [{"nombrecurso": f"Curso {i}", "fechainicio": "2021-01-01", "fechafin": "2021-02-01"}
+                 for i in range(3)]
+
+        importacion.importar(Cursosrealizados, perfil, filas, dry_run=True)
+        self.assertEqual(_get_counts(perfil)["cursos"], antes)
+
+        importacion.importar(Cursosrealizados, perfil, filas)
+        self.assertEqual(_get_counts(perfil)["cursos"], antes + 3)
+
+
+class VisibilidadTests(TestCase):
+    def test_un_update_por_modelo_y_una_invalidacion(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from . import cache as cache_cv
+        from . import visibilidad
+
+        perfil = _crear_perfil()
+        for i in range(20):
+            Cursosrealizados.objects.create(
+                perfil=perfil, nombrecurso=f"Curso {i}", fechainicio=date(2021, 1, 1), fechafin=date(2021, 2, 1)
+            )
+        version = cache_cv.version(perfil.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                n = visibilidad.cambiar_visibilidad_perfiles([perfil.pk], False)
+
+        self.assertEqual(n, 20)
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), len(visibilidad.MODELOS_SECCION))
+        self.assertEqual(cache_cv.version(perfil.pk), version + 1)
+        self.assertFalse(perfil.cursos.filter(activarparaqueseveaenfront=True).exists())
+
+
+class ExportacionTests(TestCase):
+    def test_zip_en_streaming_reutiliza_cache_sin_llenarla(self):
+        import zipfile
+        from unittest import mock
+
+        from django.core.cache import cache
+
+        from . import exportacion
+        from .views import SECCIONES_PDF, clave_pdf, pdf_hoja_vida
+
+        perfiles = [_crear_perfil(numerocedula=f"12345678{i:02d}", nombres=f"Ana {i}") for i in range(3)]
+
+        trozos = list(exportacion.exportar_zip(perfiles, SECCIONES_PDF, procesos=0))
+        with zipfile.ZipFile(io.BytesIO(b"".join(trozos))) as zf:
+            self.assertEqual(len(zf.namelist()), 3)
+            for nombre in zf.namelist():
+                self.assertTrue(zf.read(nombre).startswith(b"%PDF"))
+        for perfil in perfiles:
+            self.assertIsNone(cache.get(clave_pdf(perfil.pk, SECCIONES_PDF)))
+
+        # El que ya cacheó una vista no se vuelve a renderizar
+        pdf_hoja_vida(perfiles[0], SECCIONES_PDF)
+        with mock.patch("cv.pdf.render_hoja_vida") as render:
+            b"".join(exportacion.exportar_zip(perfiles, SECCIONES_PDF, procesos=0))
+        self.assertEqual(render.call_count, 2)
+
+    def test_procesos_del_contenedor_con_tope(self):
+        from unittest import mock
+
+        from . import exportacion
+
+        with mock.patch.object(exportacion, "_cpus", return_value=64):
+            with override_settings(CV_EXPORTAR_PROCESOS=None, CV_EXPORTAR_MAX_PROCESOS=4):
+                self.assertEqual(exportacion._procesos(), 4)
+            with override_settings(CV_EXPORTAR_PROCESOS=2, CV_EXPORTAR_MAX_PROCESOS=4):
+                self.assertEqual(exportacion._procesos(), 2)
+
+    def test_pool_con_ventana_acotada(self):
+        from concurrent.futures import Future
+        from unittest import mock
+
+        from . import exportacion
+        from .views import SECCIONES_PDF
+
+        class PoolEnLinea:
+            enviados = 0
+
+            def __init__(self, max_workers, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def submit(self, fn, *args):
+                PoolEnLinea.enviados += 1
+                futuro = Future()
+                futuro.set_result(fn(*args))
+                return futuro
+
+        perfiles = [_crear_perfil(numerocedula=f"12345678{i:02d}", nombres=f"Ana {i}") for i in range(10)]
+        with mock.patch.object(exportacion, "ProcessPoolExecutor", PoolEnLinea), \
+                mock.patch("cv.views.renderizar_pdf", return_value=b"%PDF"):
+            emitidos = 0
+            for _nombre, _contenido in exportacion.renderizar_pdfs(perfiles, SECCIONES_PDF, procesos=2):
+                emitidos += 1
+                self.assertLessEqual(PoolEnLinea.enviados - emitidos, 2 * exportacion.VENTANA_POR_PROCESO)
+        self.assertEqual((emitidos, PoolEnLinea.enviados), (10, 10))
+
+
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+class PerfilesPorSlugTests(TestCase):
+    def test_slug_unico_y_un_solo_perfil_activo(self):
+        a = _crear_perfil()
+        b = _crear_perfil(numerocedula="1234567891")
+        self.assertEqual(a.slug, "ana-paz")
+        self.assertEqual(b.slug, "ana-paz-2")
+
+        a.refresh_from_db()
+        self.assertFalse(a.perfilactivo)
+        self.assertTrue(b.perfilactivo)
+
+    def test_slug_tomado_por_guardado_simultaneo_se_reintenta(self):
+        from unittest import mock
+
+        _crear_perfil()
+        # Simula que el otro guardado confirmó entre la consulta y el INSERT
+        with mock.patch.object(Datospersonales, "_slug_libre", side_effect=["ana-paz", "ana-paz-2"]):
+            b = _crear_perfil(numerocedula="1234567891")
+        self.assertEqual(b.slug, "ana-paz-2")
+        self.assertEqual(Datospersonales.objects.count(), 2)
+
+    def test_rutas_con_slug_sin_costo_por_perfil(self):
+        from django.urls import reverse
+
+        uno = _crear_perfil(perfilactivo=False)
+        url = reverse("cursos", kwargs={"slug": uno.slug})
+        self.client.get(url)  # calienta caches
+        with self.assertNumQueries(2) as ctx:  # perfil por slug + cursos
+            respuesta = self.client.get(url)
+        self.assertContains(respuesta, f"/cv/{uno.slug}/cursos/")
+
+        for i in range(50):
+            _crear_perfil(numerocedula=f"99999999{i:02d}", perfilactivo=False)
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self.client.get(url)
+
+        self.assertEqual(self.client.get("/cv/no-existe/").status_code, 404)
+
+
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}, CV_MEDICION_MUESTREO=1.0, CV_MEDICION_LENTO_MS=0)
+class MedicionMiddlewareTests(TestCase):
+    def test_server_timing_y_log_de_request_lento(self):
+        perfil = _crear_perfil()
+        with self.assertLogs("cv.medicion", level="WARNING") as logs:
+            respuesta = self.client.get(f"/cv/{perfil.slug}/cursos/")
+
+        cabecera = respuesta["Server-Timing"]
+        for metrica in ("db;dur=", "tpl;dur=", "view;dur=", "total;dur="):
+            self.assertIn(metrica, cabecera)
+        self.assertIn('desc="2 consultas"', cabecera)
+        self.assertIn('"vista": "cursos"', logs.output[0])
+        self.assertIn("CURSOSREALIZADOS", logs.output[0])
+
+
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}, CV_PDF_MUESTREO_MEMORIA=1.0)
+class TrazasPdfTests(TestCase):
+    def test_fases_en_cabeceras_y_metricas(self):
+        from django.contrib.auth.models import User
+
+        perfil = _crear_perfil()
+        for i in range(3):
+            Cursosrealizados.objects.create(
+                perfil=perfil, nombrecurso=f"Curso {i}", fechainicio=date(2021, 1, 1), fechafin=date(2021, 2, 1)
+            )
+
+        respuesta = self.client.get("/imprimir/?cursos=on")
+        self.assertEqual(respuesta.status_code, 200)
+        for fase in ("pdf-consultas", "pdf-tarjetas", "pdf-sidebar", "pdf-guardar"):
+            self.assertIn(fase, respuesta["Server-Timing"])
+        self.assertIn("paginas=1", respuesta["X-PDF-Traza"])
+        self.assertIn(f"bytes={len(respuesta.content)}", respuesta["X-PDF-Traza"])
+        self.assertIn("pico_memoria=", respuesta["X-PDF-Traza"])
+
+        # Segunda vez sale de la cache
+        self.assertIn("cache_hit=1", self.client.get("/imprimir/?cursos=on")["X-PDF-Traza"])
+
+        self.assertEqual(self.client.get("/_metricas/pdf/").status_code, 302)
+        self.client.force_login(User.objects.create_superuser("admin", "a@a.com", "x"))
+        datos = self.client.get("/_metricas/pdf/").json()
+        self.assertGreaterEqual(datos["trazas"], 2)
+        self.assertIn("tarjetas", datos["fases"])
+
+    def test_log_solo_lentos_o_muestreados(self):
+        from . import trazas
+
+        with override_settings(CV_MEDICION_LENTO_MS=10_000, CV_MEDICION_MUESTREO=0):
+            with self.assertNoLogs("cv.trazas", level="INFO"):
+                with trazas.trazar():
+                    pass
+        with override_settings(CV_MEDICION_LENTO_MS=0, CV_MEDICION_MUESTREO=0):
+            with self.assertLogs("cv.trazas", level="WARNING") as logs:
+                with trazas.trazar():
+                    pass
+        self.assertIn("pdf lento", logs.output[0])
+
+    @override_settings(CV_PDF_MUESTREO_MEMORIA=1)
+    def test_una_sola_traza_mide_memoria_a_la_vez(self):
+        import threading
+        import tracemalloc
+
+        from . import trazas
+
+        otras = []
+
+        def otra_traza():
+            with trazas.trazar() as otra:
+                otras.append(otra.memoria)
+
+        with trazas.trazar() as traza:
+            hilo = threading.Thread(target=otra_traza)
+            hilo.start()
+            hilo.join()
+        self.assertTrue(traza.memoria)
+        self.assertEqual(otras, [False])
+        self.assertIsNotNone(traza.pico_memoria)
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+class MetricasTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = override_settings(
+            CV_METRICAS_DIR=directorio,
+            CV_METRICAS_TOKEN="secreto",
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+            },
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.directorio = directorio
+
+    def test_suma_procesos_y_formato_prometheus(self):
+        import json
+
+        # Otro worker (ya muerto) que dejó su archivo
+        with open(os.path.join(self.directorio, "999999999.json"), "w") as fh:
+            json.dump({
+                "pid": 999999999, "memoria": 1,
+                "contadores": [["cv_db_consultas_total", '[["vista", "home"]]', 1000]],
+                "histogramas": [],
+            }, fh)
+
+        _crear_perfil()
+        self.client.get("/")
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        texto = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secreto").content.decode()
+
+        self.assertIn("# TYPE cv_http_request_duration_seconds histogram", texto)
+        self.assertIn('cv_http_request_duration_seconds_bucket{vista="home",le="+Inf"}', texto)
+        total = next(l for l in texto.splitlines() if l.startswith('cv_db_consultas_total{vista="home"}'))
+        self.assertGreater(int(total.split()[-1]), 1000)
+        self.assertIn(f'cv_proceso_memoria_rss_bytes{{pid="{os.getpid()}"}}', texto)
+        self.assertNotIn('pid="999999999"', texto)
+
+    def test_cerrado_por_defecto_sin_token(self):
+        from django.contrib.auth.models import User
+
+        with override_settings(CV_METRICAS_TOKEN=""):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer ").status_code, 403)
+            self.client.force_login(User.objects.create_superuser("admin", "a@a.com", "x"))
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def _archivo(self, pid, valor, proceso=None):
+        import json
+
+        with open(os.path.join(self.directorio, f"{pid}.json"), "w") as fh:
+            json.dump({
+                "pid": pid, "proceso": proceso, "memoria": 1,
+                "contadores": [["cv_db_consultas_total", '[["vista", "muerta"]]', valor]],
+                "histogramas": [],
+            }, fh)
+
+    def test_muertos_se_funden_en_un_archivo(self):
+        from . import metricas
+
+        self._archivo(999999998, 2)
+        self._archivo(999999999, 3)
+        for _ in range(2):
+            contadores = metricas._leer_todos()[0]
+            self.assertEqual(contadores[("cv_db_consultas_total", '[["vista", "muerta"]]')], 5)
+        self.assertEqual(
+            sorted(a for a in os.listdir(self.directorio) if a.endswith(".json")), [metricas.ARCHIVO_MUERTOS]
+        )
+
+    def test_pid_reutilizado_no_pierde_lo_contado(self):
+        from unittest import mock
+
+        from . import metricas
+
+        self._archivo(os.getpid(), 7, proceso="anterior")
+        with mock.patch.object(metricas, "_pid_comprobado", None):
+            metricas.volcar()
+        contadores = metricas._leer_todos()[0]
+        self.assertEqual(contadores[("cv_db_consultas_total", '[["vista", "muerta"]]')], 7)
+
+    def test_limpiar(self):
+        from . import metricas
+
+        self._archivo(999999999, 1)
+        metricas.volcar()
+        metricas.limpiar()
+        self.assertEqual([a for a in os.listdir(self.directorio) if a.endswith(".json")], [])
+
+
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+class PerfiladorTests(TestCase):
+    def test_solo_staff_y_formatos(self):
+        import marshal
+
+        from django.contrib.auth.models import User
+
+        _crear_perfil()
+        self.client.get("/imprimir/?cursos=on")  # deja el PDF en cache
+
+        # Anónimo: respuesta normal
+        self.assertEqual(self.client.get("/imprimir/?cursos=on&_profile=1")["Content-Type"], "application/pdf")
+
+        self.client.force_login(User.objects.create_superuser("admin", "a@a.com", "x"))
+        reporte = self.client.get("/imprimir/?cursos=on&_profile=1").content.decode()
+        self.assertIn("Árbol de llamadas", reporte)
+        self.assertIn("reportlab", reporte)
+        self.assertIn("render_hoja_vida", reporte)  # no sale de la cache
+
+        archivo = self.client.get("/?_profile=1&_formato=prof")
+        self.assertIn("attachment", archivo["Content-Disposition"])
+        self.assertIsInstance(marshal.loads(archivo.content), dict)
+
+        # Solo "1" lo activa: ?_profile=0 es un request normal
+        self.assertEqual(self.client.get("/imprimir/?cursos=on&_profile=0")["Content-Type"], "application/pdf")
+
+
+class BenchmarkPdfTests(TestCase):
+    def test_baseline_y_regresiones(self):
+        import json
+
+        from .management.commands.benchmark_pdf import comparar
+
+        ruta = os.path.join(tempfile.mkdtemp(), "baseline.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(ruta), ignore_errors=True)
+        call_command("benchmark_pdf", rapido=True, repeticiones=1, baseline=ruta, guardar_baseline=True,
+                     stdout=io.StringIO())
+        with open(ruta, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+
+        clave = "items=10,imagenes=4,secciones=experiencia+cursos+reconocimientos+prod_acad+prod_lab+venta"
+        self.assertGreater(baseline["escenarios"][clave]["paginas"], 1)
+        self.assertFalse(Datospersonales.objects.exists())  # todo se deshizo
+
+        peor = json.loads(json.dumps(baseline))
+        peor["escenarios"][clave]["p50_ms"] = baseline["escenarios"][clave]["p50_ms"] * 2 + 10
+        peor["escenarios"][clave]["paginas"] += 1
+        self.assertEqual(len(comparar(peor, baseline, 0.25)), 2)
+        self.assertEqual(comparar(baseline, baseline, 0.25), [])
+
+        # Un escenario que el baseline no tiene cuenta como fallo, no se salta
+        incompleto = json.loads(json.dumps(baseline))
+        del incompleto["escenarios"][clave]
+        self.assertEqual(len(comparar(baseline, incompleto, 0.25)), 1)
+
+    def test_baseline_cubre_todos_los_escenarios(self):
+        import json
+
+        from .management.commands.benchmark_pdf import BASELINE, ESCENARIOS, _combinaciones, clave
+
+        with open(BASELINE, encoding="utf-8") as fh:
+            claves = set(json.load(fh)["escenarios"])
+        for n_items, n_imagenes in ESCENARIOS:
+            for secciones in _combinaciones("basicas"):
+                self.assertIn(clave(n_items, n_imagenes, secciones), claves)
+
+
+class GenerarDatosTests(TestCase):
+    def test_reproducible_y_valido(self):
+        from .models import Ventagarage
+
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        storages = {
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": media}},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }
+        with override_settings(STORAGES=storages):
+            call_command("generar_datos", perfiles=5, items="3", imagenes="2", pdfs=1.0, lote=2,
+                         imagenes_distintas=2, semilla=9, stdout=io.StringIO())
+            primera = list(Ventagarage.objects.order_by("pk").values_list("nombreproducto", "valordelbien"))
+            Datospersonales.objects.all().delete()
+            call_command("generar_datos", perfiles=5, items="3", imagenes="2", pdfs=1.0, lote=2,
+                         imagenes_distintas=2, semilla=9, stdout=io.StringIO())
+
+        self.assertEqual(Datospersonales.objects.count(), 5)
+        self.assertEqual(Cursosrealizados.objects.exclude(certificado_pdf="").count(), 15)
+        self.assertEqual(list(Ventagarage.objects.order_by("pk").values_list("nombreproducto", "valordelbien")),
+                         primera)
+        for curso in Cursosrealizados.objects.all()[:3]:
+            curso.full_clean()
+            self.assertTrue(os.path.exists(os.path.join(media, curso.certificado_pdf.name)))
+
+
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+class PruebaCargaTests(LiveServerTestCase):
+    def test_mezcla_contra_servidor_local(self):
+        import json
+
+        _crear_perfil()
+        ruta = os.path.join(tempfile.mkdtemp(), "carga.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(ruta), ignore_errors=True)
+        call_command("prueba_carga", url=self.live_server_url, mezcla="pdf", concurrencia=3, peticiones=30,
+                     calentamiento=0, salida=ruta, max_tasa_error=0, stdout=io.StringIO())
+
+        with open(ruta, encoding="utf-8") as fh:
+            r = json.load(fh)["resultados"][self.live_server_url]
+        self.assertEqual(r["peticiones"], 30)
+        self.assertIn("imprimir_hoja_vida", r["endpoints"])
+        self.assertEqual(r["tasa_error"], 0)
+
+
+class VistasAsyncTests(TransactionTestCase):
+    def test_mismo_html_y_pdf_en_hilo(self):
+        import re
+        from types import ModuleType
+
+        from asgiref.sync import async_to_sync
+        from django.urls import include, path, reverse
+
+        from . import sinteticos, urls as cv_urls, views_async
+
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajustes = override_settings(STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": media}},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }, CV_PDF_MUESTREO_MEMORIA=0)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        perfil = sinteticos.crear_perfil_completo(sinteticos.semilla(5), 1_000_000_002, 4, 6)
+        rutas = cv_urls.rutas_de(views_async)
+        urls_async = ModuleType("urls_async")
+        urls_async.urlpatterns = rutas + [path("cv/<slug:slug>/", include(rutas))]
+
+        for patron in cv_urls.rutas:
+            url = reverse(patron.name, kwargs={"slug": perfil.slug})
+            if patron.name == "imprimir_hoja_vida":
+                continue
+            sync = self.client.get(url)
+            with override_settings(ROOT_URLCONF=urls_async):
+                asinc = async_to_sync(self.async_client.get)(url)
+            self.assertEqual(asinc.status_code, 200, url)
+            self.assertEqual(asinc.content, sync.content, url)
+
+        with override_settings(ROOT_URLCONF=urls_async):
+            pdf = async_to_sync(self.async_client.get)(
+                reverse("imprimir_hoja_vida", kwargs={"slug": perfil.slug}) + "?cursos=on&experiencia=on"
+            )
+        self.assertEqual(pdf.status_code, 200)
+        self.assertTrue(pdf.content.startswith(b"%PDF"))
+        self.assertIn("paginas=", pdf["X-PDF-Traza"])
+        # Las consultas del render (en un hilo del pool) cuentan para el request
+        consultas = int(re.search(r'desc="(\d+) consultas"', pdf["Server-Timing"]).group(1))
+        self.assertGreaterEqual(consultas, 3)
+
+
+class ArranqueTests(SimpleTestCase):
+    def test_worker_html_no_importa_el_stack_pdf(self):
+        from .management.commands.benchmark_arranque import medir_arranque
+
+        self.assertEqual(medir_arranque("html")["pesados"], [])
+        self.assertEqual(medir_arranque("pdf")["pesados"], ["PIL", "reportlab"])
+
+
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}, CV_PDF_MUESTREO_MEMORIA=0)
+class CalentamientoTests(TestCase):
+    def test_config_gunicorn_y_calentamiento(self):
+        import runpy
+        from unittest import mock
+
+        from django.conf import settings
+        from django.core.cache import cache
+
+        from . import calentamiento
+        from . import cache as cache_cv
+        from .views import SECCIONES_PDF, clave_pdf
+
+        with mock.patch.dict(os.environ, {"PORT": "5000"}):
+            conf = runpy.run_path(os.path.join(settings.BASE_DIR, "gunicorn.conf.py"))
+        self.assertTrue(conf["preload_app"])
+        self.assertEqual(conf["worker_class"], "gthread")
+        self.assertEqual(conf["bind"], "0.0.0.0:5000")
+        self.assertGreaterEqual(conf["workers"], 2)
+        self.assertGreater(conf["max_requests_jitter"], 0)
+
+        perfil = _crear_perfil()
+        cache.clear()
+        hechos = calentamiento.calentar()
+        self.assertIn("PDF completo en cache", hechos)
+        self.assertIsNotNone(cache.get(cache_cv.clave(perfil.pk, "counts")))
+        self.assertTrue(cache.get(clave_pdf(perfil.pk, SECCIONES_PDF)).startswith(b"%PDF"))
+
+
+class CacheDosNivelesTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import caches
+
+        from .cache_backend import CacheDosNiveles
+
+        # Dos "workers" con su propio nivel 1 y la misma cache compartida
+        opciones = {"OPTIONS": {"ttl_local": 30, "ttl_sufijos": {":version": 0.05}, "espera_max": 5}}
+        self.a = CacheDosNiveles("", opciones)
+        self.b = CacheDosNiveles("", opciones)
+        caches["compartida"].clear()
+        self.addCleanup(caches["compartida"].clear)
+
+    def test_niveles_y_copias(self):
+        self.a.set("k", {"x": 1})
+        self.assertEqual(self.b.get("k"), {"x": 1})
+        self.b.get("k")["x"] = 2
+        self.assertEqual(self.b.get("k"), {"x": 1})
+        self.assertEqual(self.b.estadisticas["l2"], 1)
+        self.assertEqual(self.b.estadisticas["l1"], 2)
+        self.assertIsNone(self.b.get("otra"))
+        self.assertEqual(self.b.estadisticas["fallo"], 1)
+
+    def test_version_invalidada_llega_a_otro_worker(self):
+        import time
+
+        self.assertEqual(self.a.get_or_set("p:version", 1, timeout=None), 1)
+        self.assertEqual(self.b.get("p:version"), 1)
+        self.a.incr("p:version")
+        self.assertEqual(self.a.get("p:version"), 2)
+        time.sleep(0.1)
+        self.assertEqual(self.b.get("p:version"), 2)
+
+    def test_estampida_calcula_una_vez(self):
+        import threading
+        import time
+
+        llamadas = []
+
+        def calcular():
+            llamadas.append(1)
+            time.sleep(0.2)
+            return b"%PDF"
+
+        resultados = []
+        hilos = [
+            threading.Thread(target=lambda c=c: resultados.append(c.get_or_set("pdf", calcular)))
+            for c in (self.a, self.b) * 4
+        ]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(resultados, [b"%PDF"] * 8)
+        self.assertEqual(self.a.estadisticas["espera"] + self.b.estadisticas["espera"], 7)
+
+    def test_async_usa_el_candado_y_el_incr_atomico(self):
+        import asyncio
+
+        from asgiref.sync import async_to_sync
+
+        llamadas = []
+
+        def calcular():
+            llamadas.append(1)
+            return b"%PDF"
+
+        async def varios():
+            return await asyncio.gather(*(self.a.aget_or_set("pdf", calcular) for _ in range(4)))
+
+        self.assertEqual(async_to_sync(varios)(), [b"%PDF"] * 4)
+        self.assertEqual(len(llamadas), 1)
+
+        self.a.set("p:version", 1, timeout=None)
+        self.assertEqual(async_to_sync(self.b.aincr)("p:version"), 2)
+        self.assertEqual(self.a.compartida.get("p:version"), 2)
+        self.assertTrue(async_to_sync(self.b.ahas_key)("pdf"))
+
+    def test_lru_respeta_el_tope(self):
+        from .cache_backend import LRU
+
+        lru = LRU(max_bytes=4000)
+        for i in range(20):
+            lru.set(i, bytes(400), ttl=30)
+        self.assertLessEqual(lru.bytes, 4000)
+        self.assertEqual(lru.get(19), bytes(400))
+        self.assertIs(lru.get(0, None), None)
+        lru.set("grande", bytes(1000), ttl=30)
+        self.assertIsNone(lru.get("grande", None))
+
+
+class CacheArchivosTests(SimpleTestCase):
+    def setUp(self):
+        from .cache_backend import CacheArchivos
+
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        # Una instancia por "worker": cada una abre su propio candado
+        self.caches = [CacheArchivos(directorio, {"TIMEOUT": 300}) for _ in range(8)]
+
+    def _en_paralelo(self, funcion):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(len(self.caches)) as pool:
+            return list(pool.map(funcion, self.caches))
+
+    def test_add_atomico(self):
+        self.assertEqual(self._en_paralelo(lambda c: c.add("candado", 1)).count(True), 1)
+
+    def test_incr_atomico_y_sin_caducidad(self):
+        import pickle
+
+        self.caches[0].set("v", 0, timeout=None)
+        self._en_paralelo(lambda c: [c.incr("v") for _ in range(25)])
+        self.assertEqual(self.caches[0].get("v"), 200)
+        with open(self.caches[0]._key_to_file("v"), "rb") as fh:
+            self.assertIsNone(pickle.load(fh))  # caducidad guardada: ninguna
+        with self.assertRaises(ValueError):
+            self.caches[0].incr("falta")
+
+
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+class CacheControlTests(TestCase):
+    def test_politicas_por_ruta(self):
+        perfil = _crear_perfil()
+
+        r = self.client.get("/")
+        self.assertIn("public", r["Cache-Control"])
+        self.assertIn("stale-while-revalidate=", r["Cache-Control"])
+        self.assertIn("stale-if-error=", r["Cache-Control"])
+        self.assertIn("Accept-Encoding", r["Vary"])
+        pdf = self.client.get(f"/cv/{perfil.slug}/imprimir/")["Cache-Control"]
+        self.assertIn("s-maxage=60", pdf)
+        self.assertNotIn("stale-while-revalidate", pdf)
+
+        self.assertEqual(self.client.get("/admin/login/")["Cache-Control"], "private, no-store")
+        self.assertEqual(self.client.get("/metrics")["Cache-Control"], "private, no-store")
+        self.assertEqual(self.client.get("/cv/no-existe/")["Cache-Control"], "private, no-cache")
+
+    def test_respuesta_con_cookie_no_es_publica(self):
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from django.urls import resolve
+
+        from .middleware import CacheControlMiddleware
+
+        def vista(request):
+            response = HttpResponse("hola")
+            response.set_cookie("x", "1")
+            return response
+
+        request = RequestFactory().get("/cursos/")
+        request.resolver_match = resolve("/cursos/")
+        response = CacheControlMiddleware(vista)(request)
+        self.assertEqual(response["Cache-Control"], "private, no-store")
+
+
+class EstaticosTests(SimpleTestCase):
+    def test_css_critico_solo_lo_usado(self):
+        from . import estaticos
+
+        css = """
+        /* comentario */
+        :root { --a: 1px; }
+        .card, .huerfana { padding: 4px ; }
+        .card:hover { color: red }
+        .estado-ok { color: green }
+        nav a.active { margin: 0 }
+        table td { border: 0 }
+        @media (max-width: 900px) { .card { padding: 0 } .huerfana { padding: 1px } }
+        @keyframes giro { from { opacity: 0 } }
+        """
+        usados = ({"card", "active"}, {"estado-"}, set(), {"html", "body", "nav", "a"})
+        self.assertEqual(
+            estaticos.css_critico(css, usados),
+            ":root{--a:1px}.card{padding:4px}.card:hover{color:red}.estado-ok{color:green}"
+            "nav a.active{margin:0}@media (max-width: 900px){.card{padding:0}}",
+        )
+        self.assertEqual(estaticos.pesos_de("b{font-weight:bold}i{font-weight: 600}"), [400, 600, 700])
+
+    def test_caras_google_agrupa_la_fuente_variable(self):
+        from . import estaticos
+
+        css = "".join(
+            f"/* {sub} */\n@font-face {{\n  font-family: 'Inter';\n  font-style: normal;\n  font-weight: {peso};\n"
+            f"  src: url(https://fonts.gstatic.com/s/inter/{sub}.woff2) format('woff2');\n"
+            f"  unicode-range: U+0000-00FF, U+0131;\n}}\n"
+            for peso in (400, 700) for sub in ("cyrillic", "latin")
+        )
+        caras = estaticos.caras_google(css, ["latin"])
+        self.assertEqual(len(caras), 1)
+        self.assertEqual(caras[0]["pesos"], [400, 700])
+        self.assertEqual(caras[0]["url"], "https://fonts.gstatic.com/s/inter/latin.woff2")
+        self.assertEqual(caras[0]["unicode_range"], "U+0000-00FF, U+0131")
+
+    def test_base_inserta_el_css_critico(self):
+        from django.template.loader import render_to_string
+
+        from . import estaticos
+
+        destino = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, destino, ignore_errors=True)
+        self.addCleanup(estaticos.cargar.cache_clear)
+        with override_settings(CV_ESTATICOS_GENERADOS=destino, STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }):
+            estaticos.cargar.cache_clear()
+            html = render_to_string("base.html")
+            self.assertIn('<link rel="stylesheet" href="/static/css/dashboard-pro.css">', html)
+            self.assertIn('<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>', html)
+            self.assertIn("https://fonts.googleapis.com/css2?family=Inter:wght@", html)
+
+            # Build sin fuentes propias: CSS crítico, pero la familia sigue viniendo de Google Fonts
+            call_command("optimizar_estaticos", "--sin-fuentes", stdout=io.StringIO())
+            html = render_to_string("base.html")
+            self.assertIn("<style>:root{", html)
+            self.assertIn(".app-shell{display:grid", html)
+            self.assertIn('rel="preload" href="/static/css/dashboard-pro.css" as="style"', html)
+            self.assertIn("fonts.googleapis.com/css2?family=Inter", html)
+
+            fuente = {"familia": "Inter", "estilo": "normal", "pesos": [400, 700], "unicode_range": "U+0000-00FF",
+                      "subconjunto": "latin", "archivo": "fuentes/inter-latin-normal-400-700.woff2"}
+            estaticos.guardar(estaticos.cargar()["hojas"], [fuente], destino)
+            html = render_to_string("base.html")
+            self.assertIn("fuentes/inter-latin-normal-400-700.woff2", html)
+            self.assertNotIn("fonts.googleapis.com", html)
+
+    def test_collectstatic_falla_si_falla_optimizar(self):
+        from unittest import mock
+
+        from django.core.management.base import CommandError
+
+        with mock.patch("cv.management.commands.optimizar_estaticos.Command.handle", side_effect=ValueError("roto")):
+            with self.assertRaisesMessage(CommandError, "optimizar_estaticos falló: roto"):
+                call_command("collectstatic", interactive=False, stdout=io.StringIO(), stderr=io.StringIO())
+
+
+def _png(color="red", tamano=(1200, 900)):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", tamano, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _media_temporal(test):
+    """
+    MEDIA en un directorio temporal propio del test, con derivados síncronos.
+    """
+    test.media = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, test.media, ignore_errors=True)
+    ajustes = override_settings(CV_DERIVADOS_SINCRONO=True, STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage",
+                    "OPTIONS": {"location": test.media}},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    })
+    ajustes.enable()
+    test.addCleanup(ajustes.disable)
+
+
+def _curso(test, perfil, **kwargs):
+    datos = {"nombrecurso": f"Curso {perfil.cursos.count()}", "fechainicio": date(2020, 1, 1),
+             "fechafin": date(2020, 2, 1)}
+    datos.update(kwargs)
+    with test.captureOnCommitCallbacks(execute=True):
+        return Cursosrealizados.objects.create(perfil=perfil, **datos)
+
+
+class DerivadosTests(TestCase):
+    def setUp(self):
+        _media_temporal(self)
+
+    def _curso(self, perfil, **kwargs):
+        return _curso(self, perfil, **kwargs)
+
+    def test_derivados_al_guardar(self):
+        from .imagenes import DERIVADOS
+        from .models import Imagenprocesada
+
+        curso = self._curso(_crear_perfil(), certificado_imagen=ContentFile(_png(), name="a.png"))
+        obj = Imagenprocesada.objects.get(nombre=curso.certificado_imagen.name)
+
+        self.assertEqual(set(obj.derivados), set(DERIVADOS))
+        for nombre in obj.derivados.values():
+            self.assertTrue(os.path.exists(os.path.join(self.media, nombre)))
+        self.assertEqual((obj.ancho, obj.alto), (1200, 900))
+        self.assertTrue(obj.placeholder.startswith("data:image/jpeg;base64,"))
+        self.assertEqual(obj.error, "")
+
+    def test_misma_base_distinta_extension_no_comparte_derivados(self):
+        from .models import Imagenprocesada
+
+        perfil = _crear_perfil()
+        png = self._curso(perfil, certificado_imagen=ContentFile(_png((255, 0, 0)), name="foto.png"))
+        jpg = self._curso(perfil, certificado_imagen=ContentFile(_png((0, 0, 255)), name="foto.jpg"))
+        rutas = [
+            set(Imagenprocesada.objects.get(nombre=c.certificado_imagen.name).derivados.values())
+            for c in (png, jpg)
+        ]
+        self.assertFalse(rutas[0] & rutas[1])
+
+    def test_img_con_srcset_placeholder_y_medidas(self):
+        from django.urls import reverse
+
+        from .models import Imagenprocesada
+
+        curso = self._curso(_crear_perfil(), certificado_imagen=ContentFile(_png(), name="a.png"))
+        obj = Imagenprocesada.objects.get(nombre=curso.certificado_imagen.name)
+
+        html = self.client.get(reverse("cursos")).content.decode()
+        self.assertIn('<source type="image/webp" srcset="%s 800w"' % obj.url("webp"), html)
+        self.assertIn('srcset="%s 400w, %s 800w"' % (obj.url("thumb"), obj.url("thumb2x")), html)
+        self.assertIn('width="400" height="300"', html)
+        self.assertIn("background:url(%s)" % obj.placeholder, html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_fallo_transitorio_se_reintenta(self):
+        from unittest import mock
+
+        from . import imagenes
+        from .models import Imagenprocesada
+
+        perfil = _crear_perfil()
+        with mock.patch.object(imagenes.default_storage, "open", side_effect=OSError("storage caído")):
+            curso = self._curso(perfil, certificado_imagen=ContentFile(_png(), name="a.png"))
+        nombre = curso.certificado_imagen.name
+        self.assertEqual(Imagenprocesada.objects.get(nombre=nombre).error, "storage caído")
+        self.assertEqual(imagenes.nombres_pendientes(curso), {nombre})
+
+        call_command("generar_derivados", stdout=io.StringIO())
+        obj = Imagenprocesada.objects.get(nombre=nombre)
+        self.assertEqual(obj.error, "")
+        self.assertTrue(obj.derivados)
+        self.assertEqual(imagenes.nombres_pendientes(curso), set())
+
+
+class DeduplicacionTests(TestCase):
+    def setUp(self):
+        _media_temporal(self)
+
+    def test_mismo_contenido_un_solo_archivo(self):
+        from .models import Blobmedia, Imagenprocesada
+
+        perfil = _crear_perfil()
+        datos = _png("blue")
+        a = _curso(self, perfil, certificado_imagen=ContentFile(datos, name="x.png"))
+        b = _curso(self, perfil, certificado_imagen=ContentFile(datos, name="y.png"))
+        self.assertEqual(a.certificado_imagen.name, b.certificado_imagen.name)
+        self.assertEqual(Blobmedia.objects.get().referencias, 2)
+        self.assertEqual(Imagenprocesada.objects.count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            a.delete()
+        self.assertEqual(Blobmedia.objects.get().referencias, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            b.delete()
+        self.assertFalse(Blobmedia.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.media, b.certificado_imagen.name)))
+
+    def test_upload_concurrente_apunta_al_blob_ganador(self):
+        from unittest import mock
+
+        from . import deduplicacion
+        from .models import Blobmedia
+
+        datos = _png("green")
+        ganador = storages["default"].save("ganador.png", ContentFile(datos))
+        perfil = _crear_perfil()
+        real = deduplicacion.despues_de_guardar
+
+        def con_carrera(instance):
+            # Otro worker confirma el mismo contenido entre pre_save y post_save
+            sha, tamano = instance._hashes_pendientes["certificado_imagen"]
+            Blobmedia.objects.create(sha256=sha, nombre=ganador, tamano=tamano, referencias=1)
+            real(instance)
+
+        with mock.patch.object(deduplicacion, "despues_de_guardar", con_carrera):
+            curso = _curso(self, perfil, certificado_imagen=ContentFile(datos, name="perdedor.png"))
+
+        self.assertEqual(curso.certificado_imagen.name, ganador)
+        self.assertEqual(Cursosrealizados.objects.get(pk=curso.pk).certificado_imagen.name, ganador)
+        self.assertEqual(Blobmedia.objects.get().referencias, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.media, "perdedor.png")))
+
+    def test_comando_borra_duplicados_y_sus_derivados(self):
+        from . import imagenes
+        from .models import Blobmedia, Imagenprocesada
+
+        datos = _png("red")
+        storage = storages["default"]
+        storage.save("a.png", ContentFile(datos))
+        storage.save("b.png", ContentFile(datos))
+        perfil = _crear_perfil()
+        uno = _curso(self, perfil)
+        dos = _curso(self, perfil)
+        Cursosrealizados.objects.filter(pk=uno.pk).update(certificado_imagen="a.png")
+        Cursosrealizados.objects.filter(pk=dos.pk).update(certificado_imagen="b.png")
+        imagenes.generar_derivados("a.png")
+        imagenes.generar_derivados("b.png")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("deduplicar_medios", stdout=io.StringIO())
+
+        self.assertEqual(set(Cursosrealizados.objects.values_list("certificado_imagen", flat=True)), {"a.png"})
+        self.assertEqual(Blobmedia.objects.get().referencias, 2)
+        self.assertFalse(storage.exists("b.png"))
+        self.assertFalse(storage.exists(imagenes.ruta_derivado("b.png", "thumb")))
+        self.assertTrue(storage.exists(imagenes.ruta_derivado("a.png", "thumb")))
+        self.assertEqual(list(Imagenprocesada.objects.values_list("nombre", flat=True)), ["a.png"])
@@ -0,0 +1,138 @@
+"""
+Presupuestos de rendimiento por URL: consultas SQL, tiempo total, tiempo de
+plantillas y tamaño de respuesta, con datos realistas y la cache vacía
+(el peor caso). Un N+1 o un camino lento nuevo rompe estos tests.
+
+Toda ruta de cv/urls.py debe tener su presupuesto en PRESUPUESTOS.
+"""
+import re
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import sinteticos, urls as cv_urls
+
+# nombre de la URL -> (consultas, total_ms, plantillas_ms, bytes). Los ms son holgados
+# (máquinas de CI lentas); las consultas son topes fijos: no dependen del volumen.
+PRESUPUESTOS = {
+    "home": (2, 500, 200, 60_000),
+    "datos_personales": (1, 500, 200, 60_000),
+    "cursos": (3, 800, 400, 250_000),
+    "experiencia": (2, 800, 400, 250_000),
+    "productos_academicos": (3, 800, 400, 250_000),
+    "productos_laborales": (3, 800, 400, 250_000),
+    "reconocimientos": (3, 800, 400, 250_000),
+    "venta_garage": (3, 800, 400, 250_000),
+    "imprimir_hoja_vida": (8, 8000, 0, 5_000_000),
+    "metricas_pdf": (0, 500, 0, 60_000),
+    "metrics": (0, 500, 0, 200_000),
+}
+
+ITEMS_POR_SECCION = 40
+IMAGENES = 6
+
+
+class PresupuestoMixin:
+    """
+    assertNumQueries con tope (no igualdad) + presupuestos de tiempo y tamaño.
+    """
+
+    @contextmanager
+    def assertPresupuesto(self, consultas, total_ms, etiqueta=""):
+        with CaptureQueriesContext(connection) as ctx:
+            inicio = time.perf_counter()
+            yield ctx
+            total = (time.perf_counter() - inicio) * 1000
+        n = len(ctx.captured_queries)
+        if n > consultas:
+            sql = "\n".join(f"  {i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, start=1))
+            self.fail(f"{etiqueta}: {n} consultas (presupuesto {consultas}):\n{sql}")
+        self.assertLessEqual(total, total_ms, f"{etiqueta}: {total:.0f} ms (presupuesto {total_ms} ms)")
+        ctx.total_ms = total
+
+    def assertPlantillas(self, response, plantillas_ms, etiqueta=""):
+        # Lo mide MedicionMiddleware (cabecera Server-Timing)
+        m = re.search(r"tpl;dur=([\d.]+)", response.get("Server-Timing", ""))
+        self.assertIsNotNone(m, f"{etiqueta}: sin Server-Timing")
+        self.assertLessEqual(float(m.group(1)), plantillas_ms, f"{etiqueta}: plantillas {m.group(1)} ms")
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+    CV_PDF_MUESTREO_MEMORIA=0,
+)
+class PresupuestosPorUrlTests(PresupuestoMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = sinteticos.semilla(42)
+        cls.perfil = sinteticos.crear_perfil_completo(rng, 1_000_000_001, ITEMS_POR_SECCION, IMAGENES)
+        cls.perfil.perfilactivo = True
+        cls.perfil.save()
+        cls.staff = User.objects.create_superuser("bench", "b@b.com", "x")
+
+    def setUp(self):
+        cache.clear()
+
+    def _urls(self):
+        """
+        (nombre, url, necesita_staff) de todas las rutas: raíz y /cv/<slug>/.
+        """
+        for patron in cv_urls.rutas:
+            sufijo = "?" + "&".join(f"{k}=on" for k in ("experiencia", "cursos", "reconocimientos",
+                                                         "prod_acad", "prod_lab", "venta")) \
+                if patron.name == "imprimir_hoja_vida" else ""
+            yield patron.name, reverse(patron.name) + sufijo, False
+            yield patron.name, reverse(patron.name, kwargs={"slug": self.perfil.slug}) + sufijo, False
+        yield "metricas_pdf", reverse("metricas_pdf"), True
+        yield "metrics", reverse("metrics"), True
+
+    def test_todas_las_rutas_tienen_presupuesto(self):
+        nombres = {p.name for p in cv_urls.urlpatterns if getattr(p, "name", None)}
+        nombres |= {p.name for p in cv_urls.rutas}
+        self.assertEqual(nombres, set(PRESUPUESTOS))
+
+    def test_presupuestos(self):
+        for nombre, url, staff in self._urls():
+            with self.subTest(url=url):
+                cache.clear()
+                if staff:
+                    self.client.force_login(self.staff)
+                consultas, total_ms, plantillas_ms, max_bytes = PRESUPUESTOS[nombre]
+                # Sesión + usuario del staff: dos consultas que no son de la vista
+                with self.assertPresupuesto(consultas + 2 * staff, total_ms, etiqueta=url):
+                    response = self.client.get(url)
+                self.client.logout()
+
+                self.assertEqual(response.status_code, 200, url)
+                self.assertLessEqual(len(response.content), max_bytes, f"{url}: {len(response.content)} bytes")
+                if plantillas_ms:
+                    self.assertPlantillas(response, plantillas_ms, url)
+
+    def test_sin_n_mas_1(self):
+        # Duplicar el volumen no cambia el número de consultas de ninguna ruta
+        antes = {}
+        for nombre, url, staff in self._urls():
+            if staff:
+                continue
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(url)
+            antes[url] = len(ctx.captured_queries)
+
+        rng = sinteticos.semilla(7)
+        for model, objs in sinteticos.items(rng, self.perfil, ITEMS_POR_SECCION, desde=ITEMS_POR_SECCION).items():
+            model.objects.bulk_create(objs)
+
+        for url, n in antes.items():
+            cache.clear()
+            with self.subTest(url=url), self.assertNumQueries(n):
+                self.client.get(url)
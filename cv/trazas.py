@@ -0,0 +1,189 @@
+"""
+Trazas por fases del render del PDF.
+
+    with trazas.trazar() as traza:
+        ...
+        with trazas.fase("consultas"):
+            ...
+        trazas.contar("imagenes")
+
+Fuera de `trazar()` las funciones de este módulo no hacen nada (una lectura
+de ContextVar), así que el código instrumentado no paga por no medir.
+
+Los tiempos de fase son exclusivos: si "imagenes" ocurre dentro de
+"galeria", su tiempo no se cuenta también en "galeria".
+"""
+import contextvars
+import functools
+import json
+import logging
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from . import metricas
+
+logger = logging.getLogger("cv.trazas")
+
+_actual = contextvars.ContextVar("cv_traza", default=None)
+
+
+class Traza:
+    def __init__(self, memoria=False):
+        self.inicio = time.perf_counter()
+        self.total = 0.0
+        self.fases = {}
+        self.contadores = {}
+        self.memoria = memoria
+        self.pico_memoria = None
+        self._pila = []  # [[inicio, tiempo_de_hijos], ...]
+
+    def server_timing(self):
+        return ", ".join(f"pdf-{nombre};dur={seg * 1000:.1f}" for nombre, seg in self.fases.items())
+
+    def resumen(self):
+        partes = [f"{k}={v}" for k, v in self.contadores.items()]
+        if self.pico_memoria is not None:
+            partes.append(f"pico_memoria={self.pico_memoria}")
+        return " ".join(partes)
+
+    def como_dict(self):
+        return {
+            "total_ms": round(self.total * 1000, 1),
+            "fases_ms": {k: round(v * 1000, 1) for k, v in self.fases.items()},
+            "contadores": self.contadores,
+            "pico_memoria": self.pico_memoria,
+        }
+
+
+# =========================
+# API DE INSTRUMENTACIÓN
+# =========================
+@contextmanager
+def fase(nombre):
+    traza = _actual.get()
+    if traza is None:
+        yield
+        return
+    marco = [time.perf_counter(), 0.0]
+    traza._pila.append(marco)
+    try:
+        yield
+    finally:
+        traza._pila.pop()
+        duracion = time.perf_counter() - marco[0]
+        traza.fases[nombre] = traza.fases.get(nombre, 0.0) + duracion - marco[1]
+        if traza._pila:
+            traza._pila[-1][1] += duracion
+
+
+def medido(nombre):
+    """
+    Decorador: cada llamada suma a la fase `nombre`.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _actual.get() is None:
+                return funcion(*args, **kwargs)
+            with fase(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def contar(nombre, n=1):
+    traza = _actual.get()
+    if traza is not None:
+        traza.contadores[nombre] = traza.contadores.get(nombre, 0) + n
+
+
+# tracemalloc es global al proceso: solo una traza a la vez lo enciende y lo apaga
+_memoria_lock = threading.Lock()
+
+
+@contextmanager
+def trazar():
+    """
+    Abre una traza; al cerrar se agrega a las estadísticas y se registra.
+    La memoria (tracemalloc, caro) solo se mide en una fracción de las
+    trazas: CV_PDF_MUESTREO_MEMORIA, y nunca en dos a la vez (si otra ya
+    mide, esta no). El pico es el de todo el proceso mientras dura la
+    traza, no solo el de este render: con otros hilos trabajando incluye
+    lo que asignen ellos.
+    """
+    muestreo = getattr(settings, "CV_PDF_MUESTREO_MEMORIA", 0.05)
+    memoria = random.random() < muestreo and _memoria_lock.acquire(blocking=False)
+    if memoria and tracemalloc.is_tracing():
+        # Lo encendió alguien ajeno a las trazas: no se lo apagamos
+        _memoria_lock.release()
+        memoria = False
+    traza = Traza(memoria=memoria)
+    token = _actual.set(traza)
+    if memoria:
+        tracemalloc.start()
+    try:
+        yield traza
+    finally:
+        if memoria:
+            traza.pico_memoria = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            _memoria_lock.release()
+        _actual.reset(token)
+        traza.total = time.perf_counter() - traza.inicio
+        registrar(traza)
+
+
+# =========================
+# AGREGADOS (POR PROCESO)
+# =========================
+_lock = threading.Lock()
+_agregado = {"trazas": 0, "fases": {}, "contadores": {}, "pico_memoria_max": None}
+
+
+def registrar(traza):
+    with _lock:
+        _agregado["trazas"] += 1
+        for nombre, seg in list(traza.fases.items()) + [("total", traza.total)]:
+            f = _agregado["fases"].setdefault(nombre, {"n": 0, "total": 0.0, "max": 0.0})
+            f["n"] += 1
+            f["total"] += seg
+            f["max"] = max(f["max"], seg)
+        for nombre, n in traza.contadores.items():
+            _agregado["contadores"][nombre] = _agregado["contadores"].get(nombre, 0) + n
+        if traza.pico_memoria is not None:
+            _agregado["pico_memoria_max"] = max(_agregado["pico_memoria_max"] or 0, traza.pico_memoria)
+    if "bytes" in traza.contadores:
+        metricas.observar("cv_pdf_render_seconds", traza.total)
+        metricas.observar("cv_pdf_bytes", traza.contadores["bytes"])
+        metricas.incrementar("cv_pdf_cache_total", {"resultado": "miss"})
+    elif "cache_hit" in traza.contadores:
+        metricas.incrementar("cv_pdf_cache_total", {"resultado": "hit"})
+
+    # Cada render ya queda en las métricas; al log solo los lentos y una muestra
+    if traza.total * 1000 >= getattr(settings, "CV_MEDICION_LENTO_MS", 500):
+        logger.warning("pdf lento %s", json.dumps(traza.como_dict()))
+    elif random.random() < getattr(settings, "CV_MEDICION_MUESTREO", 0.1):
+        logger.info("pdf %s", json.dumps(traza.como_dict()))
+
+
+def agregado():
+    with _lock:
+        return {
+            "trazas": _agregado["trazas"],
+            "fases": {
+                nombre: {
+                    "n": f["n"],
+                    "total_ms": round(f["total"] * 1000, 1),
+                    "media_ms": round(f["total"] * 1000 / f["n"], 1),
+                    "max_ms": round(f["max"] * 1000, 1),
+                }
+                for nombre, f in _agregado["fases"].items()
+            },
+            "contadores": dict(_agregado["contadores"]),
+            "pico_memoria_max": _agregado["pico_memoria_max"],
+        }
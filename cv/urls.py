@@ -1,18 +1,36 @@
-from django.urls import path
-from . import views
-
-urlpatterns = [
-    path("", views.home, name="home"),
-
-    # Secciones (para que no falle el {% url %} del template)
-    path("datos-personales/", views.datos_personales, name="datos_personales"),
-    path("cursos/", views.cursos, name="cursos"),
-    path("experiencia/", views.experiencia, name="experiencia"),
-    path("productos-academicos/", views.productos_academicos, name="productos_academicos"),
-    path("productos-laborales/", views.productos_laborales, name="productos_laborales"),
-    path("reconocimientos/", views.reconocimientos, name="reconocimientos"),
-    path("venta-garage/", views.venta_garage, name="venta_garage"),
-
-    # PDF final
-    path("imprimir/", views.imprimir_hoja_vida, name="imprimir_hoja_vida"),
+from django.conf import settings
+from django.urls import include, path
+from . import views, views_async
+
+
+def rutas_de(vistas):
+    # Cada ruta existe dos veces: en la raíz (perfil activo) y bajo /cv/<slug>/ (cualquier perfil)
+    return [
+        path("", vistas.home, name="home"),
+
+        # Secciones (para que no falle el {% url %} del template)
+        path("datos-personales/", vistas.datos_personales, name="datos_personales"),
+        path("cursos/", vistas.cursos, name="cursos"),
+        path("experiencia/", vistas.experiencia, name="experiencia"),
+        path("productos-academicos/", vistas.productos_academicos, name="productos_academicos"),
+        path("productos-laborales/", vistas.productos_laborales, name="productos_laborales"),
+        path("reconocimientos/", vistas.reconocimientos, name="reconocimientos"),
+        path("venta-garage/", vistas.venta_garage, name="venta_garage"),
+
+        # PDF final
+        path("imprimir/", vistas.imprimir_hoja_vida, name="imprimir_hoja_vida"),
+    ]
+
+
+# Bajo ASGI (CV_VISTAS_ASYNC) las páginas públicas usan las vistas async
+rutas = rutas_de(views_async if getattr(settings, "CV_VISTAS_ASYNC", False) else views)
+
+urlpatterns = rutas + [
+    path("cv/<slug:slug>/", include(rutas)),
+
+    # Solo staff
+    path("_metricas/pdf/", views.metricas_pdf, name="metricas_pdf"),
+
+    # Prometheus
+    path("metrics", views.metrics, name="metrics"),
 ]
@@ -0,0 +1,145 @@
+"""
+Variantes async (ASGI) de las vistas públicas: mismo HTML y mismas consultas
+que cv/views.py, con el ORM async. cv/urls.py las usa con CV_VISTAS_ASYNC
+(django_portfolio/asgi.py lo enciende), así un proceso atiende muchos
+clientes lentos sin un hilo por conexión.
+
+Todo se materializa antes de render(): desde el event loop las plantillas
+no pueden tocar la BD.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.shortcuts import aget_object_or_404, render
+
+from . import cache as cache_cv
+from . import views
+from .imagenes import aadjuntar_derivados
+from .models import Datospersonales
+
+
+# =========================
+# Helpers
+# =========================
+async def _get_perfil(slug=None):
+    if slug is None:
+        return await Datospersonales.objects.filter(perfilactivo=True).order_by("-idperfil").afirst()
+    return await aget_object_or_404(Datospersonales, slug=slug)
+
+
+async def _get_counts(perfil):
+    # Los seis conteos siguen siendo una sola consulta (subconsultas escalares, ver views._conteos)
+    if not perfil:
+        return {k: 0 for k in ("cursos", "experiencias", "prod_acad", "prod_lab", "reconoc", "venta")}
+
+    clave = await cache_cv.aclave(perfil.pk, "counts")
+    counts = await cache.aget(clave)
+    if counts is None:
+        fila = await Datospersonales.objects.filter(pk=perfil.pk).values(**views._conteos()).aget()
+        counts = {k[2:]: v for k, v in fila.items()}
+        await cache.aset(clave, counts, cache_cv.TIMEOUT)
+    return counts
+
+
+async def _items(perfil, relacion, orden, campo_imagen=None, marcar_pdf=False):
+    """
+    Ítems visibles de `perfil.<relacion>` en una lista, con `is_pdf` y los
+    derivados de `campo_imagen` ya adjuntos (como las vistas sync).
+    """
+    if not perfil:
+        return []
+    qs = getattr(perfil, relacion).filter(activarparaqueseveaenfront=True).order_by(*orden)
+    items = [obj async for obj in qs]
+    if marcar_pdf:
+        for it in items:
+            nombre = it.certificado_imagen.name if it.certificado_imagen else ""
+            it.is_pdf = bool(nombre) and nombre.lower().endswith(".pdf")
+    if campo_imagen:
+        await aadjuntar_derivados(items, campo_imagen)
+    return items
+
+
+def _pdf_en_hilo(perfil, secciones, usar_cache):
+    # Hilo del pool (no el del request): su conexión a la BD se cierra al terminar
+    # (CONN_MAX_AGE), como haría request_finished en un hilo de request
+    try:
+        return views.pdf_trazado(perfil, secciones, usar_cache)
+    finally:
+        close_old_connections()
+
+
+# =========================
+# Views web
+# =========================
+async def home(request, slug=None):
+    perfil = await _get_perfil(slug)
+    return render(request, "home.html", {
+        "perfil": perfil,
+        "permitir_impresion": bool(perfil and perfil.permitir_impresion),
+        "counts": await _get_counts(perfil),
+    })
+
+
+async def datos_personales(request, slug=None):
+    perfil = await _get_perfil(slug)
+    return render(request, "secciones/datos_personales.html", {"perfil": perfil})
+
+
+async def cursos(request, slug=None):
+    perfil = await _get_perfil(slug)
+    items = await _items(perfil, "cursos", ("-fechafin", "-fechainicio", "-idcursorealizado"),
+                         "certificado_imagen", marcar_pdf=True)
+    return render(request, "secciones/cursos.html", {"perfil": perfil, "items": items})
+
+
+async def experiencia(request, slug=None):
+    perfil = await _get_perfil(slug)
+    items = await _items(perfil, "experiencias", ("-fechafin", "-fechainicio", "-idexperiencialaboral"))
+    return render(request, "secciones/experiencia.html", {"perfil": perfil, "items": items})
+
+
+async def productos_academicos(request, slug=None):
+    perfil = await _get_perfil(slug)
+    items = await _items(perfil, "productos_academicos", ("-idproductoacademico",), "imagenproducto",
+                         marcar_pdf=True)
+    return render(request, "secciones/productos_academicos.html", {"perfil": perfil, "items": items})
+
+
+async def productos_laborales(request, slug=None):
+    perfil = await _get_perfil(slug)
+    items = await _items(perfil, "productos_laborales", ("-fechaproducto", "-idproductolaboral"),
+                         "imagenproducto", marcar_pdf=True)
+    return render(request, "secciones/productos_laborales.html", {"perfil": perfil, "items": items})
+
+
+async def reconocimientos(request, slug=None):
+    perfil = await _get_perfil(slug)
+    items = await _items(perfil, "reconocimientos", ("-fechareconocimiento", "-idreconocimiento"),
+                         "certificado_imagen", marcar_pdf=True)
+    return render(request, "secciones/reconocimientos.html", {"perfil": perfil, "items": items})
+
+
+async def venta_garage(request, slug=None):
+    perfil = await _get_perfil(slug)
+    items = await _items(perfil, "venta_garage", ("-fecha", "-idventagarage"), "foto_producto")
+    return render(request, "secciones/venta_garage.html", {"perfil": perfil, "items": items})
+
+
+async def imprimir_hoja_vida(request, slug=None):
+    perfil = await _get_perfil(slug)
+
+    if not perfil:
+        return HttpResponse("Perfil no encontrado", status=404)
+
+    if not perfil.permitir_impresion:
+        return HttpResponseForbidden("No autorizado", status=403)
+
+    # El render (CPU + BD) va a un hilo del pool y no bloquea el event loop. Al
+    # perfilar se queda en el hilo del request, que es el que mide cProfile.
+    secciones = views.secciones_de(request.GET)
+    if getattr(request, "_perfilando", False):
+        contenido, traza = await sync_to_async(views.pdf_trazado)(perfil, secciones, False)
+    else:
+        contenido, traza = await sync_to_async(_pdf_en_hilo, thread_sensitive=False)(perfil, secciones, True)
+    return views.respuesta_pdf(perfil, contenido, traza)
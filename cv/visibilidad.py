@@ -0,0 +1,44 @@
+from django.db import transaction
+
+from . import cache as cache_cv
+from .models import (
+    Cursosrealizados,
+    Experiencialaboral,
+    Productosacademicos,
+    Productoslaborales,
+    Reconocimientos,
+    Ventagarage,
+)
+
+MODELOS_SECCION = (
+    Cursosrealizados,
+    Experiencialaboral,
+    Productosacademicos,
+    Productoslaborales,
+    Reconocimientos,
+    Ventagarage,
+)
+
+
+def cambiar_visibilidad(querysets, visible):
+    """
+    Muestra u oculta en el front todos los ítems de los querysets:
+    un UPDATE por modelo (sin save() por fila) y una sola invalidación
+    de cache por perfil afectado al confirmar. Devuelve las filas cambiadas.
+    """
+    perfiles = set()
+    total = 0
+    with transaction.atomic():
+        for qs in querysets:
+            qs = qs.exclude(activarparaqueseveaenfront=visible)
+            perfiles.update(qs.values_list("perfil_id", flat=True).distinct())
+            total += qs.update(activarparaqueseveaenfront=visible)
+        transaction.on_commit(lambda: cache_cv.invalidar(perfiles))
+    return total
+
+
+def cambiar_visibilidad_perfiles(perfil_ids, visible, modelos=MODELOS_SECCION):
+    """
+    Igual que cambiar_visibilidad, para todas las secciones de los perfiles dados.
+    """
+    return cambiar_visibilidad([m.objects.filter(perfil_id__in=perfil_ids) for m in modelos], visible)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_portfolio.settings')
+# Bajo ASGI, las páginas públicas usan las vistas async de cv/views_async.py
+os.environ.setdefault('CV_VISTAS_ASYNC', '1')
 
 application = get_asgi_application()
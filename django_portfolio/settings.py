@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
 from dotenv import load_dotenv
 
@@ -35,26 +36,30 @@ INSTALLED_APPS = [
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
+
+    # App principal (antes de staticfiles: su collectstatic genera el CSS crítico)
+    "cv",
+
     "django.contrib.staticfiles",
 
     # Cloudinary
     "cloudinary",
     "cloudinary_storage",
-
-    # App principal
-    "cv",
 ]
 
 # ==================================================
 # MIDDLEWARE
 # ==================================================
 MIDDLEWARE = [
+    "cv.middleware.MedicionMiddleware",  # primero: mide todo el stack
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "cv.middleware.WhiteNoiseMiddleware",  # WhiteNoise apto para ASGI
+    "cv.middleware.CacheControlMiddleware",  # antes de la sesión (ver su Vary: Cookie)
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "cv.middleware.PerfiladorMiddleware",  # ?_profile=1 (staff)
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -136,9 +141,15 @@ USE_CLOUDINARY = bool(os.getenv("CLOUDINARY_URL"))
 
 if USE_CLOUDINARY:
     # -------- MEDIA EN CLOUDINARY (Render) --------
+    # Las lecturas (PDF, derivados) pasan por una cache local en disco (LRU)
     STORAGES = {
         "default": {
-            "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
+            "BACKEND": "cv.storage.CacheLocalStorage",
+            "OPTIONS": {
+                "backend": "cloudinary_storage.storage.MediaCloudinaryStorage",
+                "directorio": os.getenv("MEDIA_CACHE_DIR") or None,
+                "max_bytes": int(os.getenv("MEDIA_CACHE_MB", "512")) * 1024 * 1024,
+            },
         },
         "staticfiles": {
             "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
@@ -158,6 +169,123 @@ else:
     MEDIA_URL = "/media/"
     MEDIA_ROOT = BASE_DIR / "media"
 
+# ==================================================
+# CACHE (LRU por proceso + cache compartida entre workers)
+# ==================================================
+# Nivel 2 sin servicios extra: "archivo" (un directorio en el disco de la máquina,
+# lo comparten los workers de gunicorn) o "bd" (tabla cv_cache: python manage.py
+# createcachetable, la comparten también varias máquinas). Los tests usan memoria
+# (settings_test.py) para no leer lo que dejó el servidor de desarrollo.
+CV_CACHE_COMPARTIDA = os.getenv("CV_CACHE_COMPARTIDA", "archivo")
+
+_CACHES_COMPARTIDAS = {
+    "archivo": {
+        "BACKEND": "cv.cache_backend.CacheArchivos",
+        "LOCATION": os.getenv("CV_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "cv-cache"),
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CV_CACHE_MAX_ENTRADAS", "5000"))},
+    },
+    "bd": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "cv_cache",
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CV_CACHE_MAX_ENTRADAS", "5000"))},
+    },
+    "memoria": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "cv-compartida",
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "cv.cache_backend.CacheDosNiveles",
+        "OPTIONS": {
+            "compartida": "compartida",
+            "max_mb_local": int(os.getenv("CV_CACHE_LOCAL_MB", "32")),
+            "ttl_local": int(os.getenv("CV_CACHE_LOCAL_TTL", "30")),
+        },
+    },
+    "compartida": _CACHES_COMPARTIDAS[CV_CACHE_COMPARTIDA],
+}
+
+# ==================================================
+# CACHE HTTP (navegador y proxies)
+# ==================================================
+# Páginas públicas: el navegador las guarda poco (el admin edita el CV), un proxy
+# algo más; después se sirven viejas mientras se revalidan, o si el origen falla.
+_CV_HTTP_PAGINA = {
+    "public": True,
+    "max_age": int(os.getenv("CV_HTTP_MAX_AGE", "60")),
+    "s_maxage": int(os.getenv("CV_HTTP_S_MAXAGE", "300")),
+    "stale_while_revalidate": int(os.getenv("CV_HTTP_STALE_WHILE_REVALIDATE", "600")),
+    "stale_if_error": int(os.getenv("CV_HTTP_STALE_IF_ERROR", "86400")),
+    "vary": ["Accept-Encoding"],
+}
+# El PDF es un documento que se descarga y se guarda: uno viejo servido por un
+# proxy (datos ya corregidos, o la impresión ya desactivada) no se nota y no se
+# arregla al recargar. Poco tiempo en los proxies y sin stale-while-revalidate;
+# los re-renders los ahorra la cache del servidor (cv/cache.py), no los proxies.
+_CV_HTTP_PDF = {
+    **{k: v for k, v in _CV_HTTP_PAGINA.items() if k != "stale_while_revalidate"},
+    "s_maxage": int(os.getenv("CV_HTTP_PDF_S_MAXAGE", "60")),
+    "vary": [],
+}
+
+# url_name -> directivas (kwargs de patch_cache_control, más "vary"). Las rutas
+# que no están aquí: "private, no-cache"; el admin: siempre "private, no-store".
+CV_CACHE_CONTROL = {
+    **{nombre: _CV_HTTP_PAGINA for nombre in (
+        "home", "datos_personales", "cursos", "experiencia", "productos_academicos",
+        "productos_laborales", "reconocimientos", "venta_garage",
+    )},
+    "imprimir_hoja_vida": _CV_HTTP_PDF,
+    "metricas_pdf": {"private": True, "no_store": True},
+    "metrics": {"private": True, "no_store": True},
+}
+
+# ==================================================
+# ASGI
+# ==================================================
+# Vistas públicas async (ORM async); django_portfolio/asgi.py lo enciende
+CV_VISTAS_ASYNC = os.getenv("CV_VISTAS_ASYNC", "0") == "1"
+
+# ==================================================
+# PDF
+# ==================================================
+# reportlab / Pillow se importan con el primer PDF; "1" los carga al arrancar (workers de PDF)
+CV_PDF_PRECARGA = os.getenv("CV_PDF_PRECARGA", "0") == "1"
+# Procesos del pool de la exportación masiva (cv/exportacion.py): por defecto las
+# CPUs asignadas al contenedor, nunca más que CV_EXPORTAR_MAX_PROCESOS
+CV_EXPORTAR_PROCESOS = int(os.getenv("CV_EXPORTAR_PROCESOS")) if os.getenv("CV_EXPORTAR_PROCESOS") else None
+CV_EXPORTAR_MAX_PROCESOS = int(os.getenv("CV_EXPORTAR_MAX_PROCESOS", "4"))
+
+# ==================================================
+# MEDICIÓN (Server-Timing, logs, trazas del PDF, /metrics)
+# ==================================================
+CV_MEDICION_MUESTREO = float(os.getenv("CV_MEDICION_MUESTREO", "0.1"))
+CV_MEDICION_LENTO_MS = float(os.getenv("CV_MEDICION_LENTO_MS", "500"))
+# Fracción de renders de PDF en los que se mide el pico de memoria (tracemalloc)
+CV_PDF_MUESTREO_MEMORIA = float(os.getenv("CV_PDF_MUESTREO_MEMORIA", "0.05"))
+
+# /metrics (Prometheus): cada proceso vuelca su estado a este directorio compartido
+CV_METRICAS_DIR = os.getenv("CV_METRICAS_DIR") or None
+CV_METRICAS_INTERVALO = float(os.getenv("CV_METRICAS_INTERVALO", "1"))
+# Token del scraper (Authorization: Bearer ...); sin él /metrics solo lo ve el staff
+CV_METRICAS_TOKEN = os.getenv("CV_METRICAS_TOKEN", "")
+
+# Por defecto solo lo lento (WARNING); CV_MEDICION_LOG_LEVEL=INFO suma los muestreados
+CV_MEDICION_LOG_LEVEL = os.getenv("CV_MEDICION_LOG_LEVEL", "WARNING")
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "cv.medicion": {"handlers": ["console"], "level": CV_MEDICION_LOG_LEVEL},
+        "cv.trazas": {"handlers": ["console"], "level": CV_MEDICION_LOG_LEVEL},
+    },
+}
+
 # ==================================================
 # DEFAULT
 # ==================================================
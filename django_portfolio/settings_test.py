@@ -0,0 +1,16 @@
+"""
+Settings de los tests (manage.py test los elige solo, ver manage.py).
+
+La cache compartida va en memoria: los tests no leen lo que dejó el
+servidor de desarrollo en el directorio de la cache ni escriben en él. Los
+logs de medición se callan: con la BD de pruebas casi todo parece "lento".
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES, LOGGING, _CACHES_COMPARTIDAS
+
+CACHES = {**CACHES, "compartida": _CACHES_COMPARTIDAS["memoria"]}
+
+LOGGING = {
+    **LOGGING,
+    "loggers": {nombre: {**config, "level": "ERROR"} for nombre, config in LOGGING["loggers"].items()},
+}
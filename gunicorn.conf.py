@@ -0,0 +1,72 @@
+"""
+Configuración de gunicorn para producción (la usa el Procfile).
+
+- preload_app: Django se carga una vez en el master y los workers lo
+  comparten por copy-on-write (menos RSS por worker, arranque más rápido).
+- gthread: un worker por CPU disponible, con varios hilos cada uno (las
+  vistas esperan a la BD y al storage de media).
+- max_requests con jitter: recicla los workers para contener la
+  fragmentación de memoria de Pillow, sin que se reinicien todos a la vez.
+- when_ready: calienta el perfil activo, las fuentes y las caches en el
+  master, antes de crear los workers (ver cv/calentamiento.py). El PDF
+  (reportlab y su primer render) solo con GUNICORN_PRECARGA_PDF=1, en los
+  despliegues que sirven PDFs; por defecto no carga en el master.
+- Métricas (cv/metricas.py): on_starting borra las de un arranque anterior
+  y worker_exit vuelca las del worker que sale, para no perder lo contado
+  desde su último volcado.
+
+Cada valor se puede cambiar por variable de entorno sin tocar este archivo.
+"""
+import os
+
+
+def _cpus():
+    # CPUs asignadas al contenedor, no las de la máquina
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+wsgi_app = "django_portfolio.wsgi:application"
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+preload_app = True
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", max(2, _cpus())))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+# Un PDF grande sin cache puede tardar varios segundos
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# El latido de los workers en memoria, no en un disco que puede bloquearse
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def on_starting(server):
+    # Con preload_app Django ya está cargado en el master
+    from cv import metricas
+
+    metricas.limpiar()
+
+
+def when_ready(server):
+    if os.environ.get("GUNICORN_CALENTAR", "1") != "1":
+        return
+    from cv.calentamiento import calentar
+
+    # Precargar el PDF cuesta memoria en cada worker; solo donde se sirven PDFs
+    hechos = calentar(pdf=os.environ.get("GUNICORN_PRECARGA_PDF", "0") == "1")
+    server.log.info("Calentamiento: %s", ", ".join(hechos))
+
+
+def worker_exit(server, worker):
+    from cv import metricas
+
+    metricas.volcar()
@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_portfolio.settings')
+    # Los tests usan sus propios settings salvo que se pida otro (--settings o variable de entorno)
+    test = sys.argv[1:2] == ['test']
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_portfolio.settings_test' if test else 'django_portfolio.settings')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc: